@@ -52,6 +52,11 @@ class ProcessingParams:
     tile_size: int = 100000  # Tile size in meters for large datasets
     tile_overlap: int = 1000  # Overlap between tiles
 
+    @property
+    def n_jobs(self) -> int:
+        """Number of parallel workers implied by cpu_fraction."""
+        return max(1, int((os.cpu_count() or 1) * self.cpu_fraction))
+
 
 @dataclass
 class OutputPaths:
@@ -89,7 +94,11 @@ class CSBConfig:
         """Load configuration from INI file."""
         parser = ConfigParser()
         parser.read(ini_path)
+        return cls.from_parser(parser)
 
+    @classmethod
+    def from_parser(cls, parser: ConfigParser) -> "CSBConfig":
+        """Build configuration from an already-populated ConfigParser."""
         # Data paths
         data = DataPaths(
             cdl_30m=Path(parser.get("data", "cdl_30m")),
@@ -122,10 +131,19 @@ class CSBConfig:
     def ensure_directories(self):
         """Create output directories if they don't exist."""
         self.output.base_dir.mkdir(parents=True, exist_ok=True)
-        self.output.create_dir.mkdir(parents=True, exist_ok=True)
-        self.output.prep_dir.mkdir(parents=True, exist_ok=True)
-        self.output.distribute_dir.mkdir(parents=True, exist_ok=True)
-        self.output.logs_dir.mkdir(parents=True, exist_ok=True)
+
+        # Subdirectories normally live directly under base_dir, so a plain
+        # mkdir suffices; only walk ancestors for custom locations
+        for subdir in (
+            self.output.create_dir,
+            self.output.prep_dir,
+            self.output.distribute_dir,
+            self.output.logs_dir,
+        ):
+            try:
+                subdir.mkdir(exist_ok=True)
+            except FileNotFoundError:
+                subdir.mkdir(parents=True, exist_ok=True)
 
 
 def load_config(config_path: Optional[Path] = None) -> CSBConfig:
@@ -141,20 +159,23 @@ def load_config(config_path: Optional[Path] = None) -> CSBConfig:
     Returns:
         CSBConfig instance
     """
-    if config_path is None:
-        # Check environment variable
-        env_path = os.environ.get("CSB_CONFIG")
-        if env_path:
-            config_path = Path(env_path)
-        # Check local config
-        elif Path("config/csb_foss.ini").exists():
-            config_path = Path("config/csb_foss.ini")
-        # Check user config
-        elif Path.home().joinpath(".csb_foss/config.ini").exists():
-            config_path = Path.home() / ".csb_foss" / "config.ini"
-        else:
-            raise FileNotFoundError(
-                "No configuration file found. Provide path or set CSB_CONFIG env var."
-            )
-
-    return CSBConfig.from_ini(config_path)
+    if config_path is not None:
+        candidates = [config_path]
+    elif os.environ.get("CSB_CONFIG"):
+        candidates = [Path(os.environ["CSB_CONFIG"])]
+    else:
+        candidates = [
+            Path("config/csb_foss.ini"),
+            Path.home() / ".csb_foss" / "config.ini",
+        ]
+
+    # ConfigParser.read skips files it cannot open, so try each candidate
+    # directly instead of probing with exists() first; the first one wins
+    parser = ConfigParser()
+    for candidate in candidates:
+        if parser.read(candidate):
+            return CSBConfig.from_parser(parser)
+
+    raise FileNotFoundError(
+        "No configuration file found. Provide path or set CSB_CONFIG env var."
+    )
@@ -5,15 +5,45 @@ Provides efficient spatial joins, attribute calculations, and
 data management using DuckDB with the spatial extension.
 """
 
+import re
+import shutil
 from pathlib import Path
 from typing import Optional
 
 import duckdb
 
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# INSTALL verifies the extension on disk (or downloads it); once per
+# process is enough, while LOAD is cheap and needed per connection
+_SPATIAL_INSTALLED = False
+
+
+def _identifier(name: str) -> str:
+    """
+    Validate a table or column name before interpolating it into SQL.
+
+    Values (paths, FIPS codes, years) are bound as query parameters;
+    identifiers cannot be, so they are restricted to plain names.
+
+    Args:
+        name: Table or column name
+
+    Returns:
+        The name, unchanged
+
+    Raises:
+        ValueError: If the name is not a plain SQL identifier
+    """
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
 
 def create_csb_database(
     db_path: Optional[Path] = None,
     memory_limit: str = "8GB",
+    threads: Optional[int] = None,
 ) -> duckdb.DuckDBPyConnection:
     """
     Create a DuckDB connection with spatial extension.
@@ -21,21 +51,39 @@ def create_csb_database(
     Args:
         db_path: Path to database file (None for in-memory)
         memory_limit: Memory limit for DuckDB
+        threads: Worker threads for DuckDB (None for DuckDB's default),
+                 typically ``config.params.n_jobs``
 
     Returns:
         DuckDB connection
     """
     if db_path is not None:
-        db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            db_path.parent.mkdir(exist_ok=True)
+        except FileNotFoundError:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
         con = duckdb.connect(str(db_path))
     else:
         con = duckdb.connect()
 
     # Configure
-    con.execute(f"SET memory_limit = '{memory_limit}'")
+    con.execute("SET memory_limit = ?", [memory_limit])
+    if threads is not None:
+        con.execute("SET threads = ?", [threads])
+
+    # Row order is not meaningful for these workloads; letting DuckDB
+    # reorder within pipelines lowers peak memory in large scans/joins
+    con.execute("SET preserve_insertion_order = false")
+    con.execute("SET enable_progress_bar = false")
+
+    if db_path is not None:
+        con.execute("SET temp_directory = ?", [str(db_path.parent / "duckdb_tmp")])
 
     # Load spatial extension
-    con.execute("INSTALL spatial")
+    global _SPATIAL_INSTALLED
+    if not _SPATIAL_INSTALLED:
+        con.execute("INSTALL spatial")
+        _SPATIAL_INSTALLED = True
     con.execute("LOAD spatial")
 
     return con
@@ -55,9 +103,9 @@ def load_geoparquet(
         table_name: Name for the table
     """
     con.execute(f"""
-        CREATE OR REPLACE TABLE {table_name} AS
-        SELECT * FROM ST_Read('{parquet_path}')
-    """)
+        CREATE OR REPLACE TABLE {_identifier(table_name)} AS
+        SELECT * FROM ST_Read(?)
+    """, [str(parquet_path)])
 
 
 def load_geopandas(
@@ -73,17 +121,36 @@ def load_geopandas(
         gdf: GeoDataFrame
         table_name: Name for the table
     """
-    # Convert to WKB for geometry
-    import geopandas as gpd
-
-    df = gdf.copy()
-    df["geometry"] = df.geometry.apply(lambda g: g.wkb)
-
-    con.execute(f"""
-        CREATE OR REPLACE TABLE {table_name} AS
-        SELECT *, ST_GeomFromWKB(geometry) as geom
-        FROM df
-    """)
+    import pyarrow as pa
+
+    # Export to Arrow with WKB geometry; DuckDB scans the Arrow table in
+    # vectorized batches without a per-row Python round-trip
+    table = pa.table(gdf.to_arrow(index=False, geometry_encoding="WKB"))
+
+    # Drop the geoarrow extension metadata so the column arrives as plain
+    # BLOB and is parsed explicitly by ST_GeomFromWKB
+    geom_idx = table.schema.get_field_index("geometry")
+    table = table.set_column(
+        geom_idx,
+        table.schema.field(geom_idx).remove_metadata(),
+        table.column(geom_idx),
+    )
+
+    con.register("gdf_arrow", table)
+    try:
+        con.execute(f"""
+            CREATE OR REPLACE TABLE {_identifier(table_name)} AS
+            SELECT * REPLACE (ST_GeomFromWKB(geometry) AS geometry)
+            FROM gdf_arrow
+        """)
+    finally:
+        con.unregister("gdf_arrow")
+
+
+def _has_spatial_join_operator() -> bool:
+    """Whether this DuckDB plans ST_Intersects joins with the SPATIAL_JOIN operator."""
+    major, minor = (int(part) for part in duckdb.__version__.split(".")[:2])
+    return (major, minor) >= (1, 3)
 
 
 def spatial_join_largest_overlap(
@@ -105,33 +172,125 @@ def spatial_join_largest_overlap(
         output_table: Name for output table
         join_fields: Fields to join from admin table
     """
-    fields_select = ", ".join([f"a.{f}" for f in join_fields])
+    polygons_table = _identifier(polygons_table)
+    admin_table = _identifier(admin_table)
+    output_table = _identifier(output_table)
+    fields_select = ", ".join([f"a.{_identifier(f)}" for f in join_fields])
+
+    if _has_spatial_join_operator():
+        # A bare ST_Intersects condition lets the planner pick SPATIAL_JOIN
+        join_predicate = "ST_Intersects(p.geometry, a.geometry)"
+    else:
+        # Older versions plan ST_Intersects as a nested-loop join; add
+        # bounding-box range predicates so candidates are pruned by an
+        # inequality join before the exact intersection test
+        join_predicate = """
+                ST_XMin(p.geometry) <= ST_XMax(a.geometry)
+                AND ST_XMax(p.geometry) >= ST_XMin(a.geometry)
+                AND ST_YMin(p.geometry) <= ST_YMax(a.geometry)
+                AND ST_YMax(p.geometry) >= ST_YMin(a.geometry)
+                AND ST_Intersects(p.geometry, a.geometry)"""
 
     con.execute(f"""
         CREATE OR REPLACE TABLE {output_table} AS
-        WITH overlap_areas AS (
+        WITH candidates AS (
             SELECT
                 p.*,
                 {fields_select},
-                ST_Area(ST_Intersection(p.geometry, a.geometry)) as overlap_area
+                a.geometry AS admin_geometry,
+                COUNT(*) OVER (PARTITION BY p.gridcode) AS n_candidates
             FROM {polygons_table} p
             JOIN {admin_table} a
-                ON ST_Intersects(p.geometry, a.geometry)
+                ON {join_predicate}
         ),
-        ranked_overlaps AS (
-            SELECT *,
-                ROW_NUMBER() OVER (
-                    PARTITION BY gridcode
-                    ORDER BY overlap_area DESC
-                ) as rn
-            FROM overlap_areas
+        overlap_areas AS (
+            -- ST_Intersection is the dominant cost; only evaluate it when a
+            -- polygon has more than one candidate (a sole candidate wins)
+            SELECT * EXCLUDE (admin_geometry),
+                CASE
+                    WHEN n_candidates = 1 THEN 0.0
+                    ELSE ST_Area(ST_Intersection(geometry, admin_geometry))
+                END AS overlap_area
+            FROM candidates
+        ),
+        best_overlaps AS (
+            -- Hash-aggregate argmax per polygon instead of sorting every
+            -- partition with ROW_NUMBER()
+            SELECT UNNEST(arg_max(o, o.overlap_area))
+            FROM overlap_areas o
+            GROUP BY o.gridcode
         )
-        SELECT * EXCLUDE (rn, overlap_area)
-        FROM ranked_overlaps
-        WHERE rn = 1
+        SELECT * EXCLUDE (overlap_area, n_candidates)
+        FROM best_overlaps
     """)
 
 
+def largest_overlap_matches(
+    con: duckdb.DuckDBPyConnection,
+    polygons_table: str,
+    admin_table: str,
+    polygon_key: str,
+    admin_key: str,
+) -> dict:
+    """
+    Match each polygon to the admin unit it overlaps most.
+
+    Unlike spatial_join_largest_overlap this returns only key pairs, so
+    callers holding the data in GeoDataFrames can attach admin attributes
+    without round-tripping geometries through DuckDB.
+
+    Args:
+        con: DuckDB connection
+        polygons_table: Name of polygon table
+        admin_table: Name of admin boundary table
+        polygon_key: Unique key column in the polygon table
+        admin_key: Unique key column in the admin table
+
+    Returns:
+        Dict of numpy arrays {polygon_key: ..., admin_key: ...}, one entry
+        per polygon that intersects any admin unit
+    """
+    polygons_table = _identifier(polygons_table)
+    admin_table = _identifier(admin_table)
+    polygon_key = _identifier(polygon_key)
+    admin_key = _identifier(admin_key)
+
+    if _has_spatial_join_operator():
+        join_predicate = "ST_Intersects(p.geometry, a.geometry)"
+    else:
+        join_predicate = """
+                ST_XMin(p.geometry) <= ST_XMax(a.geometry)
+                AND ST_XMax(p.geometry) >= ST_XMin(a.geometry)
+                AND ST_YMin(p.geometry) <= ST_YMax(a.geometry)
+                AND ST_YMax(p.geometry) >= ST_YMin(a.geometry)
+                AND ST_Intersects(p.geometry, a.geometry)"""
+
+    return con.execute(f"""
+        WITH candidates AS (
+            SELECT
+                p.{polygon_key},
+                a.{admin_key},
+                p.geometry AS polygon_geometry,
+                a.geometry AS admin_geometry,
+                COUNT(*) OVER (PARTITION BY p.{polygon_key}) AS n_candidates
+            FROM {polygons_table} p
+            JOIN {admin_table} a
+                ON {join_predicate}
+        )
+        SELECT
+            {polygon_key},
+            arg_max(
+                {admin_key},
+                CASE
+                    WHEN n_candidates = 1 THEN 0.0
+                    ELSE ST_Area(ST_Intersection(polygon_geometry, admin_geometry))
+                END
+            ) AS {admin_key}
+        FROM candidates
+        GROUP BY {polygon_key}
+    """).fetchnumpy()
+
+
 def calculate_csb_fields(
     con: duckdb.DuckDBPyConnection,
     table_name: str,
@@ -147,46 +306,36 @@ def calculate_csb_fields(
         start_year: First year of analysis
         end_year: Last year of analysis
     """
-    # Calculate acres (area in sq meters / 4046.86)
-    con.execute(f"""
-        ALTER TABLE {table_name}
-        ADD COLUMN IF NOT EXISTS csb_acres DOUBLE
-    """)
-
-    con.execute(f"""
-        UPDATE {table_name}
-        SET csb_acres = ST_Area(geometry) / 4046.86
-    """)
-
-    # Calculate centroid coordinates
-    con.execute(f"""
-        ALTER TABLE {table_name}
-        ADD COLUMN IF NOT EXISTS inside_x DOUBLE
-    """)
+    years_str = f"{start_year % 100:02d}{end_year % 100:02d}"
 
-    con.execute(f"""
-        ALTER TABLE {table_name}
-        ADD COLUMN IF NOT EXISTS inside_y DOUBLE
-    """)
+    derived = {
+        # Area in acres (sq meters / 4046.86)
+        "csb_acres": "ST_Area(geometry) / 4046.86",
+        # Centroid coordinates (centroid evaluated once per row)
+        "inside_x": "ST_X(_centroid)",
+        "inside_y": "ST_Y(_centroid)",
+        "csb_years": "CAST($csb_years AS VARCHAR(4))",
+    }
 
-    con.execute(f"""
-        UPDATE {table_name}
-        SET
-            inside_x = ST_X(ST_Centroid(geometry)),
-            inside_y = ST_Y(ST_Centroid(geometry))
-    """)
+    # Rebuild the table in a single pass instead of ALTER + UPDATE per
+    # column (each UPDATE rewrites the whole table). Existing columns are
+    # replaced in place, new ones are appended.
+    table_name = _identifier(table_name)
+    existing = set(con.table(table_name).columns)
+    replaced = [f"{expr} AS {col}" for col, expr in derived.items() if col in existing]
+    appended = [f"{expr} AS {col}" for col, expr in derived.items() if col not in existing]
 
-    # Set CSB years
-    years_str = f"{start_year % 100:02d}{end_year % 100:02d}"
-    con.execute(f"""
-        ALTER TABLE {table_name}
-        ADD COLUMN IF NOT EXISTS csb_years VARCHAR(4)
-    """)
+    select = "* EXCLUDE (_centroid)"
+    if replaced:
+        select += f" REPLACE ({', '.join(replaced)})"
+    if appended:
+        select += ", " + ", ".join(appended)
 
     con.execute(f"""
-        UPDATE {table_name}
-        SET csb_years = '{years_str}'
-    """)
+        CREATE OR REPLACE TABLE {table_name} AS
+        SELECT {select}
+        FROM (SELECT *, ST_Centroid(geometry) AS _centroid FROM {table_name})
+    """, {"csb_years": years_str})
 
 
 def generate_csb_id(
@@ -202,14 +351,26 @@ def generate_csb_id(
         con: DuckDB connection
         table_name: Table to update
     """
-    con.execute(f"""
-        ALTER TABLE {table_name}
-        ADD COLUMN IF NOT EXISTS csb_id VARCHAR(15)
-    """)
+    table_name = _identifier(table_name)
+
+    csb_id = (
+        "CAST(state_fips || csb_years || "
+        "LPAD(CAST(ROW_NUMBER() OVER (ORDER BY state_fips) AS VARCHAR), 9, '0') "
+        "AS VARCHAR(15))"
+    )
+
+    # Single CTAS pass instead of ALTER + full-table UPDATE; ordering the
+    # sequence by state also clusters each state's rows for export
+    if "csb_id" in con.table(table_name).columns:
+        select = f"* REPLACE ({csb_id} AS csb_id)"
+    else:
+        select = f"*, {csb_id} AS csb_id"
 
     con.execute(f"""
-        UPDATE {table_name}
-        SET csb_id = state_fips || csb_years || LPAD(CAST(rowid AS VARCHAR), 9, '0')
+        CREATE OR REPLACE TABLE {table_name} AS
+        SELECT {select}
+        FROM {table_name}
+        ORDER BY state_fips
     """)
 
 
@@ -233,9 +394,24 @@ def export_by_state(
     Returns:
         List of output file paths
     """
-    from .schema import FIPS_TO_STATE
+    from .schema import CSB_OUTPUT_COLUMNS, FIPS_TO_STATE
 
+    table_name = _identifier(table_name)
     output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Export through a projected view so only the published columns (in
+    # the published order) are scanned and written
+    existing = set(con.table(table_name).columns)
+    columns = ", ".join(c for c in CSB_OUTPUT_COLUMNS if c in existing)
+    export_view = f"{table_name}_export"
+    con.execute(f"""
+        CREATE OR REPLACE TEMP VIEW {export_view} AS
+        SELECT {columns} FROM {table_name}
+    """)
+
+    if state_fips is None and format == "geoparquet":
+        return _export_partitioned_parquet(con, export_view, output_dir)
+
     outputs = []
 
     if state_fips is not None:
@@ -243,7 +419,7 @@ def export_by_state(
     else:
         # Get all states in data
         result = con.execute(f"""
-            SELECT DISTINCT state_fips FROM {table_name}
+            SELECT DISTINCT state_fips FROM {export_view}
             WHERE state_fips IS NOT NULL
         """).fetchall()
         states = [(row[0], FIPS_TO_STATE.get(row[0], row[0])) for row in result]
@@ -253,21 +429,80 @@ def export_by_state(
             output_path = output_dir / f"CSB{abbrev}.parquet"
             con.execute(f"""
                 COPY (
-                    SELECT * FROM {table_name}
-                    WHERE state_fips = '{fips}'
-                ) TO '{output_path}' (FORMAT PARQUET)
-            """)
+                    SELECT * FROM {export_view}
+                    WHERE state_fips = $fips
+                ) TO $path (FORMAT PARQUET)
+            """, {"fips": fips, "path": str(output_path)})
         else:
             output_path = output_dir / f"CSB{abbrev}.geojson"
             con.execute(f"""
                 COPY (
-                    SELECT * FROM {table_name}
-                    WHERE state_fips = '{fips}'
-                ) TO '{output_path}' (FORMAT JSON)
-            """)
+                    SELECT * FROM {export_view}
+                    WHERE state_fips = $fips
+                ) TO $path (FORMAT JSON)
+            """, {"fips": fips, "path": str(output_path)})
+
+        outputs.append(output_path)
+
+    return outputs
+
+
+def _export_partitioned_parquet(
+    con: duckdb.DuckDBPyConnection,
+    table_name: str,
+    output_dir: Path,
+) -> list[Path]:
+    """
+    Export every state with one Hive-partitioned COPY.
+
+    DuckDB writes all partitions in a single parallel scan of the table;
+    the partition files are then renamed to CSB{abbrev}.parquet.
+
+    Args:
+        con: DuckDB connection
+        table_name: Source table
+        output_dir: Output directory
+
+    Returns:
+        List of output file paths
+    """
+    from .schema import FIPS_TO_STATE
+
+    staging_dir = output_dir / "_state_partitions"
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+
+    con.execute(f"""
+        COPY (
+            SELECT * FROM {table_name}
+            WHERE state_fips IS NOT NULL
+        ) TO ? (
+            FORMAT PARQUET,
+            PARTITION_BY (state_fips),
+            WRITE_PARTITION_COLUMNS true
+        )
+    """, [str(staging_dir)])
+
+    outputs = []
+
+    for partition_dir in sorted(staging_dir.glob("state_fips=*")):
+        fips = partition_dir.name.split("=", 1)[1]
+        abbrev = FIPS_TO_STATE.get(fips, fips)
+        output_path = output_dir / f"CSB{abbrev}.parquet"
+
+        part_files = sorted(partition_dir.glob("*.parquet"))
+        if len(part_files) == 1:
+            part_files[0].replace(output_path)
+        else:
+            con.execute("""
+                COPY (SELECT * FROM read_parquet($files))
+                TO $path (FORMAT PARQUET)
+            """, {"files": [str(f) for f in part_files], "path": str(output_path)})
 
         outputs.append(output_path)
 
+    shutil.rmtree(staging_dir)
+
     return outputs
 
 
@@ -284,7 +519,10 @@ def merge_tables(
         input_tables: List of table names to merge
         output_table: Output table name
     """
-    union_query = " UNION ALL ".join([f"SELECT * FROM {t}" for t in input_tables])
+    output_table = _identifier(output_table)
+    union_query = " UNION ALL ".join(
+        [f"SELECT * FROM {_identifier(t)}" for t in input_tables]
+    )
 
     con.execute(f"""
         CREATE OR REPLACE TABLE {output_table} AS
@@ -306,20 +544,20 @@ def get_table_stats(
     Returns:
         Dictionary of statistics
     """
-    count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-
-    total_area = con.execute(f"""
-        SELECT SUM(ST_Area(geometry)) FROM {table_name}
-    """).fetchone()[0]
+    table_name = _identifier(table_name)
 
-    states = con.execute(f"""
-        SELECT DISTINCT state_fips FROM {table_name}
-        WHERE state_fips IS NOT NULL
-    """).fetchall()
+    # All statistics from a single scan
+    count, total_area, states = con.execute(f"""
+        SELECT
+            COUNT(*),
+            SUM(ST_Area(geometry)),
+            LIST(DISTINCT state_fips) FILTER (WHERE state_fips IS NOT NULL)
+        FROM {table_name}
+    """).fetchone()
 
     return {
         "polygon_count": count,
         "total_area_sqm": total_area,
         "total_area_acres": total_area / 4046.86 if total_area else 0,
-        "states": [row[0] for row in states],
+        "states": states or [],
     }
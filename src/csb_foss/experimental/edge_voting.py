@@ -13,6 +13,124 @@ import rasterio
 from scipy.ndimage import generic_filter
 from tqdm import tqdm
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional (pip install csb-foss[accel])
+    njit = None
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _edge_votes_kernel(stack, offsets, out, divisor):
+        """
+        Fused edge-vote stencil: one pass over the stack, rows in parallel.
+
+        Writes ``votes / divisor`` into ``out`` (divisor 1 for raw counts,
+        n_years for stability), so normalization needs no second pass.
+        """
+        n_years, h, w = stack.shape
+
+        for y in prange(1, h - 1):
+            for x in range(1, w - 1):
+                count = 0
+                for t in range(n_years):
+                    v = stack[t, y, x]
+                    for k in range(offsets.shape[0]):
+                        if v != stack[t, y + offsets[k, 0], x + offsets[k, 1]]:
+                            count += 1
+                            break
+                out[y, x] = count / divisor
+
+        # Image boundary pixels are always edges
+        border = n_years / divisor
+        out[0, :] = border
+        out[h - 1, :] = border
+        out[:, 0] = border
+        out[:, w - 1] = border
+
+    @njit(parallel=True, cache=True)
+    def _edge_votes_pixel_major_kernel(stack, offsets, out):
+        """Edge-vote stencil over a (height, width, n_years) stack."""
+        h, w, n_years = stack.shape
+
+        for y in prange(1, h - 1):
+            for x in range(1, w - 1):
+                count = 0
+                for t in range(n_years):
+                    v = stack[y, x, t]
+                    for k in range(offsets.shape[0]):
+                        if v != stack[y + offsets[k, 0], x + offsets[k, 1], t]:
+                            count += 1
+                            break
+                out[y, x] = count
+
+        out[0, :] = n_years
+        out[h - 1, :] = n_years
+        out[:, 0] = n_years
+        out[:, w - 1] = n_years
+
+
+    @njit(parallel=True, cache=True)
+    def _gradient_kernel(stack, out):
+        """Count forward (down/right) value changes per pixel across years."""
+        n_years, h, w = stack.shape
+
+        for y in prange(h):
+            has_down = y + 1 < h
+            for x in range(w):
+                has_right = x + 1 < w
+                count = 0
+                for t in range(n_years):
+                    v = stack[t, y, x]
+                    if has_down and v != stack[t, y + 1, x]:
+                        count += 1
+                    if has_right and v != stack[t, y, x + 1]:
+                        count += 1
+                out[y, x] = count
+
+
+def _neighbor_offsets(connectivity: int) -> list[tuple[int, int]]:
+    """Neighbor (dy, dx) offsets for 4 (cardinal) or 8 (with diagonals) connectivity."""
+    if connectivity == 4:
+        return [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+    # 8-connectivity
+    return [
+        (-1, -1), (-1, 0), (-1, 1),
+        (0, -1),           (0, 1),
+        (1, -1),  (1, 0),  (1, 1),
+    ]
+
+
+def _compact_categorical(cdl_stack: np.ndarray) -> np.ndarray:
+    """
+    Return a C-contiguous copy of the stack in the narrowest unsigned dtype.
+
+    CDL codes fit in uint8. The edge stencils are memory-bound, so the
+    byte width of the stack directly sets their throughput.
+
+    Args:
+        cdl_stack: Array of categorical values
+
+    Returns:
+        Array with the same values as uint8/uint16 (or unchanged if the
+        values do not fit or are not integers)
+    """
+    if cdl_stack.dtype == np.uint8 or cdl_stack.dtype.kind not in "iu":
+        return np.ascontiguousarray(cdl_stack)
+
+    if cdl_stack.size == 0:
+        return np.ascontiguousarray(cdl_stack, dtype=np.uint8)
+
+    lo, hi = cdl_stack.min(), cdl_stack.max()
+    if lo >= 0 and hi <= np.iinfo(np.uint8).max:
+        return np.ascontiguousarray(cdl_stack, dtype=np.uint8)
+    if lo >= 0 and hi <= np.iinfo(np.uint16).max:
+        return np.ascontiguousarray(cdl_stack, dtype=np.uint16)
+
+    return np.ascontiguousarray(cdl_stack)
+
 
 def compute_temporal_edge_votes(
     cdl_stack: np.ndarray,
@@ -30,18 +148,30 @@ def compute_temporal_edge_votes(
     Returns:
         2D array of edge vote counts (0 to n_years)
     """
+    cdl_stack = _compact_categorical(cdl_stack)
     n_years, h, w = cdl_stack.shape
+
+    offsets = _neighbor_offsets(connectivity)
+
+    if njit is not None:
+        edge_votes = np.empty((h, w), dtype=np.uint8)
+        _edge_votes_kernel(
+            cdl_stack,
+            np.array(offsets, dtype=np.intp),
+            edge_votes,
+            1,
+        )
+        return edge_votes
+
     edge_votes = np.zeros((h, w), dtype=np.uint8)
 
-    # Define neighbor offsets based on connectivity
-    if connectivity == 4:
-        offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    else:  # 8-connectivity
-        offsets = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1),
-        ]
+    # Pixels on the image boundary are always edges; mark them once and
+    # only compute the interior per year
+    edge_votes[0, :] = n_years
+    edge_votes[-1, :] = n_years
+    edge_votes[:, 0] = n_years
+    edge_votes[:, -1] = n_years
+    interior_votes = edge_votes[1:-1, 1:-1]
 
     iterator = range(n_years)
     if progress:
@@ -49,29 +179,68 @@ def compute_temporal_edge_votes(
 
     for year_idx in iterator:
         year_data = cdl_stack[year_idx]
+        center = year_data[1:-1, 1:-1]
 
         # Find edges where any neighbor differs
-        edges = np.zeros((h, w), dtype=bool)
+        edges = np.zeros(center.shape, dtype=bool)
 
         for dy, dx in offsets:
-            # Shift array
-            shifted = np.roll(np.roll(year_data, dy, axis=0), dx, axis=1)
+            # Compare against the (dy, dx) neighbor via an aligned slice view
+            neighbor = year_data[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+            edges |= center != neighbor
 
-            # Mark where values differ
-            edges |= (year_data != shifted)
+        interior_votes += edges
 
-        # Handle boundary effects (edges at image boundary are always edges)
-        if dy != 0 or dx != 0:
-            if dy == -1:
-                edges[0, :] = True
-            elif dy == 1:
-                edges[-1, :] = True
-            if dx == -1:
-                edges[:, 0] = True
-            elif dx == 1:
-                edges[:, -1] = True
+    return edge_votes
 
-        edge_votes += edges.astype(np.uint8)
+
+def compute_temporal_edge_votes_pixel_major(
+    stack_hwt: np.ndarray,
+    connectivity: int = 4,
+) -> np.ndarray:
+    """
+    Edge votes for a pixel-major stack of shape (height, width, n_years).
+
+    Equivalent to ``compute_temporal_edge_votes(stack_hwt.transpose(2, 0, 1))``
+    but each pixel's year sequence is one contiguous read, so all years of a
+    neighbor comparison come from the same cache line instead of streaming
+    the full plane once per year.
+
+    Args:
+        stack_hwt: 3D array of shape (height, width, n_years) with CDL values,
+                   e.g. ``cdl_stack.transpose(1, 2, 0).copy()``
+        connectivity: 4 (cardinal) or 8 (include diagonals)
+
+    Returns:
+        2D array of edge vote counts (0 to n_years)
+    """
+    stack_hwt = _compact_categorical(stack_hwt)
+    h, w, n_years = stack_hwt.shape
+    offsets = _neighbor_offsets(connectivity)
+
+    edge_votes = np.empty((h, w), dtype=np.uint8)
+
+    if njit is not None:
+        _edge_votes_pixel_major_kernel(
+            stack_hwt,
+            np.array(offsets, dtype=np.intp),
+            edge_votes,
+        )
+        return edge_votes
+
+    edge_votes[0, :] = n_years
+    edge_votes[-1, :] = n_years
+    edge_votes[:, 0] = n_years
+    edge_votes[:, -1] = n_years
+
+    center = stack_hwt[1:-1, 1:-1]
+    edges = np.zeros(center.shape, dtype=bool)
+
+    for dy, dx in offsets:
+        neighbor = stack_hwt[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+        edges |= center != neighbor
+
+    edge_votes[1:-1, 1:-1] = edges.sum(axis=2, dtype=np.uint8)
 
     return edge_votes
 
@@ -92,10 +261,22 @@ def compute_edge_stability(
     Returns:
         2D array of stability values (0.0 to 1.0)
     """
-    n_years = cdl_stack.shape[0]
+    cdl_stack = _compact_categorical(cdl_stack)
+    n_years, h, w = cdl_stack.shape
+
+    if njit is not None:
+        # Normalize inside the stencil; no intermediate vote buffer
+        stability = np.empty((h, w), dtype=np.float32)
+        _edge_votes_kernel(
+            cdl_stack,
+            np.array(_neighbor_offsets(4), dtype=np.intp),
+            stability,
+            n_years,
+        )
+        return stability
+
     edge_votes = compute_temporal_edge_votes(cdl_stack, progress=progress)
-    stability = edge_votes.astype(np.float32) / n_years
-    return stability
+    return np.divide(edge_votes, n_years, dtype=np.float32)
 
 
 def threshold_stable_edges(
@@ -139,30 +320,28 @@ def compute_edge_gradient(
     Returns:
         2D array of gradient magnitudes
     """
+    cdl_stack = _compact_categorical(cdl_stack)
     n_years, h, w = cdl_stack.shape
-    gradient = np.zeros((h, w), dtype=np.float32)
 
-    iterator = range(n_years)
-    if progress:
-        iterator = tqdm(iterator, desc="Computing gradients")
-
-    for year_idx in iterator:
-        year_data = cdl_stack[year_idx].astype(np.float32)
+    # Count value changes on the integer data; the last row/column has no
+    # forward neighbor and contributes nothing
+    change_count = np.zeros((h, w), dtype=np.uint16)
 
-        # Compute differences in x and y directions
-        diff_y = np.abs(np.diff(year_data, axis=0))
-        diff_x = np.abs(np.diff(year_data, axis=1))
+    if njit is not None:
+        _gradient_kernel(cdl_stack, change_count)
+    else:
+        iterator = range(n_years)
+        if progress:
+            iterator = tqdm(iterator, desc="Computing gradients")
 
-        # Pad to original size
-        diff_y = np.vstack([diff_y, np.zeros((1, w))])
-        diff_x = np.hstack([diff_x, np.zeros((h, 1))])
+        for year_idx in iterator:
+            year_data = cdl_stack[year_idx]
 
-        # Add to gradient (non-zero difference = edge)
-        gradient += (diff_y > 0).astype(np.float32)
-        gradient += (diff_x > 0).astype(np.float32)
+            change_count[:-1, :] += year_data[1:, :] != year_data[:-1, :]
+            change_count[:, :-1] += year_data[:, 1:] != year_data[:, :-1]
 
-    # Normalize
-    gradient = gradient / (2 * n_years)
+    # Normalize in a single pass straight to float32
+    gradient = np.divide(change_count, 2 * n_years, dtype=np.float32)
 
     return gradient
 
@@ -186,10 +365,19 @@ def save_edge_votes(
     with rasterio.open(reference_raster) as src:
         profile = src.profile.copy()
 
+    # Tiled zstd with horizontal differencing: multi-threaded compression,
+    # better ratios than LZW on small integer counts, fast windowed reads
     profile.update(
         dtype=rasterio.uint8,
         count=1,
-        compress="lzw",
+        compress="zstd",
+        zstd_level=3,
+        predictor=2,
+        tiled=True,
+        blockxsize=512,
+        blockysize=512,
+        num_threads="all_cpus",
+        bigtiff="if_safer",
     )
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -10,12 +10,72 @@ from typing import Optional, Tuple
 
 import numpy as np
 import rasterio
+from joblib import Parallel, delayed
 from rasterio.windows import Window
-from scipy.ndimage import distance_transform_edt
 from skimage.feature import canny
 from skimage.filters import sobel
 from tqdm import tqdm
 
+from ..raster.io import generate_windows
+from .watershed import _edt
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional (pip install csb-foss[accel])
+    njit = None
+
+# Halo read around each NAIP window: the Canny smoothing footprint (4 sigma)
+# plus margin for hysteresis chains that cross window seams.
+_EDGE_HALO = 48
+
+# Largest snap radius (pixels) resolved by dilation rather than an EDT
+_DILATE_MAX_RADIUS = 4
+
+# Sector boundary for quantizing gradient direction in the fast Canny NMS
+_TAN_22_5 = 0.41421357
+
+
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _ndvi_kernel(red, nir, out):
+        """NDVI with divide guard and clip fused into one sweep."""
+        for i in prange(red.shape[0]):
+            for j in range(red.shape[1]):
+                r = np.float32(red[i, j])
+                n = np.float32(nir[i, j])
+                d = n + r
+                v = (n - r) / d if d > 0 else np.float32(0.0)
+                if v < -1.0:
+                    v = np.float32(-1.0)
+                elif v > 1.0:
+                    v = np.float32(1.0)
+                out[i, j] = v
+
+    @njit(parallel=True, cache=True)
+    def _nms_kernel(gx, gy, mag, out):
+        """Non-maximum suppression along the quantized gradient direction."""
+        for i in prange(1, mag.shape[0] - 1):
+            for j in range(1, mag.shape[1] - 1):
+                m = mag[i, j]
+                if m == 0:
+                    continue
+                ax = abs(gx[i, j])
+                ay = abs(gy[i, j])
+                if ay <= _TAN_22_5 * ax:
+                    n1 = mag[i, j - 1]
+                    n2 = mag[i, j + 1]
+                elif ax <= _TAN_22_5 * ay:
+                    n1 = mag[i - 1, j]
+                    n2 = mag[i + 1, j]
+                elif (gx[i, j] > 0) == (gy[i, j] > 0):
+                    n1 = mag[i - 1, j - 1]
+                    n2 = mag[i + 1, j + 1]
+                else:
+                    n1 = mag[i - 1, j + 1]
+                    n2 = mag[i + 1, j - 1]
+                out[i, j] = m >= n1 and m >= n2
+
 
 def compute_naip_ndvi(
     naip_path: Path,
@@ -39,12 +99,12 @@ def compute_naip_ndvi(
     """
     with rasterio.open(naip_path) as src:
         if window is not None:
-            red = src.read(red_band, window=window).astype(np.float32)
-            nir = src.read(nir_band, window=window).astype(np.float32)
+            red = src.read(red_band, window=window)
+            nir = src.read(nir_band, window=window)
             transform = src.window_transform(window)
         else:
-            red = src.read(red_band).astype(np.float32)
-            nir = src.read(nir_band).astype(np.float32)
+            red = src.read(red_band)
+            nir = src.read(nir_band)
             transform = src.transform
 
         metadata = {
@@ -54,18 +114,39 @@ def compute_naip_ndvi(
             "height": red.shape[0],
         }
 
+    return _ndvi(red, nir), metadata
+
+
+def _ndvi(red: np.ndarray, nir: np.ndarray) -> np.ndarray:
+    """
+    NDVI from red and NIR bands in their native dtype.
+
+    Args:
+        red: Red band array
+        nir: NIR band array
+
+    Returns:
+        float32 NDVI array clipped to [-1, 1] (0 where NIR + Red is 0)
+    """
+    if njit is not None:
+        ndvi = np.empty(red.shape, dtype=np.float32)
+        _ndvi_kernel(red, nir, ndvi)
+        return ndvi
+
+    red = red.astype(np.float32)
+    nir = nir.astype(np.float32)
+
     # Compute NDVI with division safety
     denominator = nir + red
-    ndvi = np.where(
-        denominator > 0,
-        (nir - red) / denominator,
-        0.0,
-    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ndvi = np.where(
+            denominator > 0,
+            (nir - red) / denominator,
+            0.0,
+        )
 
     # Clip to valid range
-    ndvi = np.clip(ndvi, -1.0, 1.0)
-
-    return ndvi, metadata
+    return np.clip(ndvi, -1.0, 1.0)
 
 
 def detect_naip_edges(
@@ -80,22 +161,27 @@ def detect_naip_edges(
 
     Args:
         ndvi: NDVI array
-        method: "canny" or "sobel"
+        method: "canny", "canny_fast" or "sobel"
         sigma: Gaussian smoothing sigma for Canny
-        low_threshold: Low threshold for Canny hysteresis
-        high_threshold: High threshold for Canny hysteresis
+        low_threshold: Low threshold for Canny hysteresis (on 0-1 NDVI)
+        high_threshold: High threshold for Canny hysteresis (on 0-1 NDVI)
 
     Returns:
         Binary edge map or gradient magnitude
     """
-    if method == "canny":
-        # Normalize NDVI to 0-1 for Canny
-        ndvi_norm = (ndvi + 1) / 2
+    if method in ("canny", "canny_fast"):
+        # Thresholds are defined on NDVI rescaled to 0-1, i.e. (ndvi + 1) / 2.
+        # Gradients ignore the offset and halve with the scale, so doubling
+        # the thresholds gives the same edges without the rescaled copy.
+        low, high = 2.0 * low_threshold, 2.0 * high_threshold
+        if method == "canny_fast":
+            return _fast_canny(ndvi, sigma, low, high).view(np.uint8)
+
         edges = canny(
-            ndvi_norm,
+            ndvi,
             sigma=sigma,
-            low_threshold=low_threshold,
-            high_threshold=high_threshold,
+            low_threshold=low,
+            high_threshold=high,
         )
         return edges.astype(np.uint8)
 
@@ -111,6 +197,94 @@ def detect_naip_edges(
         raise ValueError(f"Unknown method: {method}")
 
 
+def _fast_canny(
+    image: np.ndarray,
+    sigma: float,
+    low_threshold: float,
+    high_threshold: float,
+) -> np.ndarray:
+    """
+    Canny variant with an L1 gradient magnitude and central differences.
+
+    Gradients are scaled to match the Sobel magnitudes used by skimage's
+    canny, so the same thresholds apply; |Gx| + |Gy| overestimates the
+    diagonal magnitude by up to sqrt(2), which is harmless when the edges
+    are max-pooled to CDL resolution afterwards.
+
+    Args:
+        image: 2D image
+        sigma: Gaussian smoothing sigma
+        low_threshold: Low threshold for hysteresis
+        high_threshold: High threshold for hysteresis
+
+    Returns:
+        Boolean edge map
+    """
+    from scipy.ndimage import gaussian_filter, label
+
+    smoothed = gaussian_filter(image, sigma, output=np.float32)
+
+    gx = np.zeros_like(smoothed)
+    gy = np.zeros_like(smoothed)
+    np.subtract(smoothed[:, 2:], smoothed[:, :-2], out=gx[:, 1:-1])
+    np.subtract(smoothed[2:, :], smoothed[:-2, :], out=gy[1:-1, :])
+    gx *= 4
+    gy *= 4
+    mag = np.abs(gx)
+    mag += np.abs(gy)
+
+    local_max = np.zeros(mag.shape, dtype=bool)
+    if njit is not None:
+        _nms_kernel(gx, gy, mag, local_max)
+    else:
+        _nms_numpy(gx, gy, mag, local_max)
+
+    # Hysteresis: keep weak-edge components that contain a strong edge
+    weak = local_max & (mag >= low_threshold)
+    strong = weak & (mag >= high_threshold)
+    components, n_components = label(weak, structure=np.ones((3, 3), dtype=bool))
+    keep = np.zeros(n_components + 1, dtype=bool)
+    keep[components[strong]] = True
+    keep[0] = False
+
+    return keep[components]
+
+
+def _nms_numpy(
+    gx: np.ndarray,
+    gy: np.ndarray,
+    mag: np.ndarray,
+    out: np.ndarray,
+) -> None:
+    """
+    NumPy fallback for _nms_kernel, writing into out's interior.
+
+    Args:
+        gx: Column-direction gradient
+        gy: Row-direction gradient
+        mag: Gradient magnitude
+        out: Boolean output array, same shape as mag
+    """
+    c = (slice(1, -1), slice(1, -1))
+    m, ax, ay = mag[c], np.abs(gx[c]), np.abs(gy[c])
+
+    def shifted(di, dj):
+        return mag[1 + di: mag.shape[0] - 1 + di, 1 + dj: mag.shape[1] - 1 + dj]
+
+    horizontal = ay <= _TAN_22_5 * ax
+    vertical = ~horizontal & (ax <= _TAN_22_5 * ay)
+    diagonal = ~horizontal & ~vertical
+    main_diag = diagonal & ((gx[c] > 0) == (gy[c] > 0))
+    anti_diag = diagonal & ~main_diag
+
+    out[c] = (m > 0) & (
+        (horizontal & (m >= shifted(0, -1)) & (m >= shifted(0, 1)))
+        | (vertical & (m >= shifted(-1, 0)) & (m >= shifted(1, 0)))
+        | (main_diag & (m >= shifted(-1, -1)) & (m >= shifted(1, 1)))
+        | (anti_diag & (m >= shifted(-1, 1)) & (m >= shifted(1, -1)))
+    )
+
+
 def resample_to_cdl_resolution(
     naip_edges: np.ndarray,
     naip_transform,
@@ -131,6 +305,16 @@ def resample_to_cdl_resolution(
     Returns:
         Resampled edge map at CDL resolution
     """
+    block = _aligned_block(naip_edges, naip_transform, cdl_transform, cdl_shape)
+    if block is not None:
+        # Integer decimation on a shared grid: pool k x k blocks directly
+        if method == "mean":
+            pooled = block.mean(axis=(1, 3))
+            if np.issubdtype(naip_edges.dtype, np.integer):
+                pooled = np.rint(pooled)
+            return pooled.astype(naip_edges.dtype)
+        return block.max(axis=(1, 3))
+
     from rasterio.warp import reproject, Resampling
 
     # Choose resampling method
@@ -158,6 +342,76 @@ def resample_to_cdl_resolution(
     return resampled
 
 
+def _aligned_block(
+    naip_edges: np.ndarray,
+    naip_transform,
+    cdl_transform,
+    cdl_shape: Tuple[int, int],
+) -> Optional[np.ndarray]:
+    """
+    View NAIP pixels as (H, k, W, k) blocks under each CDL pixel.
+
+    Only possible when neither grid is rotated, the CDL pixel size is an
+    integer multiple k of the NAIP pixel size, the CDL origin falls on a
+    NAIP pixel corner, and the NAIP array covers the whole CDL extent.
+
+    Args:
+        naip_edges: High-resolution edge map
+        naip_transform: NAIP affine transform
+        cdl_transform: CDL affine transform
+        cdl_shape: Target (height, width)
+
+    Returns:
+        4D view of naip_edges, or None if the grids are not aligned
+    """
+    alignment = _grid_alignment(naip_transform, cdl_transform)
+    if alignment is None:
+        return None
+
+    k, col0, row0 = alignment
+    height, width = cdl_shape
+    if (
+        col0 < 0
+        or row0 < 0
+        or row0 + height * k > naip_edges.shape[0]
+        or col0 + width * k > naip_edges.shape[1]
+    ):
+        return None
+
+    block = naip_edges[row0:row0 + height * k, col0:col0 + width * k]
+    return block.reshape(height, k, width, k)
+
+
+def _grid_alignment(naip_transform, cdl_transform) -> Optional[Tuple[int, int, int]]:
+    """
+    Integer scale and offset between two aligned north-up grids.
+
+    Args:
+        naip_transform: Fine (NAIP) affine transform
+        cdl_transform: Coarse (CDL) affine transform
+
+    Returns:
+        Tuple of (k, col0, row0): CDL pixels are k x k NAIP pixels and the
+        CDL origin is NAIP pixel (row0, col0); None if not aligned
+    """
+    tol = 1e-6
+    if naip_transform.b or naip_transform.d or cdl_transform.b or cdl_transform.d:
+        return None
+
+    kx = cdl_transform.a / naip_transform.a
+    ky = cdl_transform.e / naip_transform.e
+    col0 = (cdl_transform.c - naip_transform.c) / naip_transform.a
+    row0 = (cdl_transform.f - naip_transform.f) / naip_transform.e
+    if any(abs(v - round(v)) > tol for v in (kx, ky, col0, row0)):
+        return None
+
+    k = int(round(kx))
+    if k < 1 or k != int(round(ky)):
+        return None
+
+    return k, int(round(col0)), int(round(row0))
+
+
 def segment_with_naip(
     naip_path: Path,
     road_mask: np.ndarray,
@@ -190,32 +444,21 @@ def segment_with_naip(
     from .watershed import watershed_segment
 
     if progress:
-        print("Computing NDVI from NAIP...")
+        print("Computing NAIP edges at target resolution...")
 
-    ndvi, naip_meta = compute_naip_ndvi(naip_path)
-
-    if progress:
-        print("Detecting edges in NDVI...")
-
-    edges = detect_naip_edges(ndvi, method=edge_method, sigma=edge_sigma)
-
-    if progress:
-        print("Resampling to target resolution...")
-
-    # Resample edges to CDL resolution
-    edges_resampled = resample_to_cdl_resolution(
-        edges,
-        naip_meta["transform"],
+    # NDVI, edges and resampling run window by window, so only the
+    # target-resolution edge map is ever held in full
+    edges_resampled = _naip_edges_on_grid(
+        naip_path,
         reference_transform,
         reference_shape,
-        method="max",
+        edge_method=edge_method,
+        edge_sigma=edge_sigma,
     )
 
     # Combine with road mask
-    combined_edges = np.maximum(
-        edges_resampled.astype(np.float32),
-        road_mask.astype(np.float32),
-    )
+    combined_edges = edges_resampled.astype(np.float32, copy=False)
+    np.maximum(combined_edges, road_mask, out=combined_edges, casting="unsafe")
 
     if progress:
         print("Running watershed segmentation...")
@@ -226,6 +469,103 @@ def segment_with_naip(
     return labels
 
 
+def _naip_edges_on_grid(
+    naip_path: Path,
+    reference_transform,
+    reference_shape: Tuple[int, int],
+    edge_method: str = "canny",
+    edge_sigma: float = 2.0,
+    tile_size: int = 2048,
+) -> np.ndarray:
+    """
+    Stream a NAIP image through NDVI, edge detection and max-resampling.
+
+    Windows are read with a halo for the edge detector and, when the
+    grids are aligned, cut on target pixel boundaries so each window
+    takes the block-pooling path of resample_to_cdl_resolution.
+
+    Args:
+        naip_path: Path to NAIP COG
+        reference_transform: Target affine transform
+        reference_shape: Target (height, width)
+        edge_method: Edge detection method
+        edge_sigma: Smoothing for edge detection
+        tile_size: Approximate window size in NAIP pixels
+
+    Returns:
+        Edge map at target resolution
+    """
+    from rasterio.windows import bounds as window_bounds
+
+    out = None
+    height, width = reference_shape
+    inverse = ~reference_transform
+
+    with rasterio.open(naip_path) as src:
+        naip_transform = src.transform
+        full = Window(0, 0, src.width, src.height)
+
+        # Window size and phase so window edges fall on target pixel edges
+        k, col_phase, row_phase = (
+            _grid_alignment(naip_transform, reference_transform) or (1, 0, 0)
+        )
+        size = max(k, (tile_size // k) * k)
+
+        for row_off in range(-((size - row_phase) % size), src.height, size):
+            for col_off in range(-((size - col_phase) % size), src.width, size):
+                win = Window(col_off, row_off, size, size).intersection(full)
+                padded = Window(
+                    win.col_off - _EDGE_HALO,
+                    win.row_off - _EDGE_HALO,
+                    win.width + 2 * _EDGE_HALO,
+                    win.height + 2 * _EDGE_HALO,
+                ).intersection(full)
+
+                # Target pixels touched by this window
+                left, bottom, right, top = window_bounds(win, naip_transform)
+                xs, ys = inverse * (
+                    np.array([left, right]),
+                    np.array([top, bottom]),
+                )
+                c0 = max(int(np.floor(min(xs) + 1e-9)), 0)
+                c1 = min(int(np.ceil(max(xs) - 1e-9)), width)
+                r0 = max(int(np.floor(min(ys) + 1e-9)), 0)
+                r1 = min(int(np.ceil(max(ys) - 1e-9)), height)
+                if c0 >= c1 or r0 >= r1:
+                    continue
+
+                red = src.read(1, window=padded)
+                nir = src.read(4, window=padded)
+                ndvi = _ndvi(red, nir)
+                if edge_method == "sobel":
+                    # Raw magnitudes; normalized once after pooling, since
+                    # per-window maxima would scale windows differently
+                    edges = sobel(ndvi).astype(np.float32)
+                else:
+                    edges = detect_naip_edges(ndvi, method=edge_method, sigma=edge_sigma)
+                i0 = int(win.row_off - padded.row_off)
+                j0 = int(win.col_off - padded.col_off)
+                edges = edges[i0:i0 + int(win.height), j0:j0 + int(win.width)]
+
+                pooled = resample_to_cdl_resolution(
+                    edges,
+                    src.window_transform(win),
+                    reference_transform * reference_transform.translation(c0, r0),
+                    (r1 - r0, c1 - c0),
+                    method="max",
+                )
+
+                if out is None:
+                    out = np.zeros(reference_shape, dtype=pooled.dtype)
+                np.maximum(out[r0:r1, c0:c1], pooled, out=out[r0:r1, c0:c1])
+
+    if out is None:
+        out = np.zeros(reference_shape, dtype=np.uint8)
+    elif edge_method == "sobel" and out.max() > 0:
+        out /= out.max()
+    return out
+
+
 def refine_cdl_boundaries(
     cdl_boundaries: np.ndarray,
     naip_edges: np.ndarray,
@@ -259,9 +599,6 @@ def refine_cdl_boundaries(
             method="max",
         )
 
-    # Distance transform from NAIP edges
-    naip_distance = distance_transform_edt(~naip_edges.astype(bool))
-
     # Convert snap_distance from CRS units to pixels
     if cdl_transform is not None:
         pixel_size = abs(cdl_transform[0])  # Assume square pixels
@@ -269,28 +606,62 @@ def refine_cdl_boundaries(
     else:
         snap_pixels = snap_distance / 30.0  # Assume 30m pixels
 
+    cdl_mask = cdl_boundaries > 0
+    naip_mask = naip_edges > 0
+
     # Find CDL boundary pixels that are within snap distance of NAIP edge
-    can_snap = (cdl_boundaries > 0) & (naip_distance <= snap_pixels)
+    can_snap = cdl_mask & _within_distance(naip_mask, snap_pixels)
 
     # Create refined boundaries
     # Keep NAIP edges where CDL boundaries can snap, otherwise keep CDL
-    refined = cdl_boundaries.copy()
-    refined[can_snap] = 0  # Remove snappable CDL boundaries
+    refined = np.where(can_snap, 0, cdl_boundaries).astype(cdl_boundaries.dtype, copy=False)
 
     # Add NAIP edges that are near CDL boundaries
-    cdl_distance = distance_transform_edt(~cdl_boundaries.astype(bool))
-    naip_near_cdl = (naip_edges > 0) & (cdl_distance <= snap_pixels)
-    refined = np.maximum(refined, naip_near_cdl.astype(refined.dtype))
+    naip_near_cdl = naip_mask & _within_distance(cdl_mask, snap_pixels)
+    np.maximum(refined, naip_near_cdl, out=refined, casting="unsafe")
 
     return refined
 
 
+def _within_distance(mask: np.ndarray, radius: float) -> np.ndarray:
+    """
+    Pixels within a Euclidean distance of any True pixel in mask.
+
+    Same result as thresholding the EDT of ~mask, but for the small snap
+    radii used in practice a dilation with a disk footprint is much
+    cheaper than a full distance transform.
+
+    Args:
+        mask: Boolean source mask
+        radius: Distance in pixels
+
+    Returns:
+        Boolean array, True where the distance to mask is <= radius
+    """
+    if radius < 1:
+        return mask.copy()
+
+    if radius > _DILATE_MAX_RADIUS:
+        return _edt(~mask) <= radius
+
+    from scipy.ndimage import binary_dilation
+
+    r = int(radius)
+    yy, xx = np.mgrid[-r:r + 1, -r:r + 1]
+    disk = yy * yy + xx * xx <= radius * radius
+    return binary_dilation(mask, structure=disk)
+
+
 def process_naip_tiles(
     naip_dir: Path,
     output_dir: Path,
     reference_raster: Path,
     tile_pattern: str = "*.tif",
     progress: bool = True,
+    red_band: int = 1,
+    nir_band: int = 4,
+    tile_size: int = 2048,
+    n_jobs: int = -1,
 ) -> list[Path]:
     """
     Process multiple NAIP tiles to extract edges.
@@ -301,38 +672,125 @@ def process_naip_tiles(
         reference_raster: Reference raster for georeferencing
         tile_pattern: Glob pattern for NAIP tiles
         progress: Show progress
+        red_band: Band index for red (1-indexed)
+        nir_band: Band index for NIR (1-indexed)
+        tile_size: Window size used when a tile is not internally tiled
+        n_jobs: Number of worker processes (-1 for all cores)
 
     Returns:
         List of output edge map paths
     """
     output_dir.mkdir(parents=True, exist_ok=True)
-    outputs = []
 
     tiles = list(naip_dir.glob(tile_pattern))
 
+    # Tiles are independent; run one per worker process. Workers keep
+    # GDAL and numba single-threaded so n_jobs processes don't each spawn
+    # a full thread pool.
+    single_threaded = n_jobs != 1 and len(tiles) > 1
+    results = Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_process_naip_tile)(
+            tile_path,
+            output_dir,
+            red_band,
+            nir_band,
+            tile_size,
+            single_threaded,
+        )
+        for tile_path in tiles
+    )
+
     if progress:
-        tiles = tqdm(tiles, desc="Processing NAIP tiles")
+        results = tqdm(results, total=len(tiles), desc="Processing NAIP tiles")
+
+    return list(results)
+
+
+def _process_naip_tile(
+    tile_path: Path,
+    output_dir: Path,
+    red_band: int,
+    nir_band: int,
+    tile_size: int,
+    single_threaded: bool = False,
+) -> Path:
+    """
+    Extract edges from one NAIP tile, streaming it window by window.
+
+    Args:
+        tile_path: Path to NAIP COG/GeoTIFF
+        output_dir: Output directory for the edge map
+        red_band: Band index for red (1-indexed)
+        nir_band: Band index for NIR (1-indexed)
+        tile_size: Window size used when the tile is not internally tiled
+        single_threaded: Limit GDAL and numba to one thread (worker processes)
 
-    for tile_path in tiles:
-        output_path = output_dir / f"{tile_path.stem}_edges.tif"
+    Returns:
+        Output edge map path
+    """
+    output_path = output_dir / f"{tile_path.stem}_edges.tif"
 
-        # Compute NDVI and edges
-        ndvi, meta = compute_naip_ndvi(tile_path)
-        edges = detect_naip_edges(ndvi)
+    if single_threaded and njit is not None:
+        import numba
 
-        # Save edges
-        with rasterio.open(tile_path) as src:
-            profile = src.profile.copy()
+        numba.set_num_threads(1)
 
+    gdal_threads = 1 if single_threaded else "ALL_CPUS"
+    with rasterio.Env(GDAL_NUM_THREADS=gdal_threads), rasterio.open(tile_path) as src:
+        profile = src.profile.copy()
         profile.update(
             dtype=rasterio.uint8,
             count=1,
             compress="lzw",
         )
+        full = Window(0, 0, src.width, src.height)
 
         with rasterio.open(output_path, "w", **profile) as dst:
-            dst.write(edges, 1)
+            # Stream NDVI + edges window by window; each read is padded
+            # by a halo so Canny's smoothing sees the same neighbourhood
+            # it would on the full tile.
+            for win in _naip_windows(src, tile_path, tile_size):
+                padded = Window(
+                    win.col_off - _EDGE_HALO,
+                    win.row_off - _EDGE_HALO,
+                    win.width + 2 * _EDGE_HALO,
+                    win.height + 2 * _EDGE_HALO,
+                ).intersection(full)
+
+                red = src.read(red_band, window=padded)
+                nir = src.read(nir_band, window=padded)
+                edges = detect_naip_edges(_ndvi(red, nir))
+
+                r0 = int(win.row_off - padded.row_off)
+                c0 = int(win.col_off - padded.col_off)
+                dst.write(
+                    edges[r0:r0 + int(win.height), c0:c0 + int(win.width)],
+                    1,
+                    window=win,
+                )
+
+    return output_path
+
+
+def _naip_windows(src, tile_path: Path, tile_size: int):
+    """
+    Windows to stream a NAIP tile through.
 
-        outputs.append(output_path)
+    Internally tiled inputs are walked block by block; striped inputs
+    (tiny or full-width blocks) are cut into square windows instead.
 
-    return outputs
+    Args:
+        src: Open rasterio dataset
+        tile_path: Path of the dataset, for generate_windows
+        tile_size: Window size for striped inputs
+
+    Yields:
+        rasterio Windows covering the dataset
+    """
+    block_h, block_w = src.block_shapes[0]
+    if min(block_h, block_w) >= 256 and block_w < src.width:
+        for _, win in src.block_windows(1):
+            yield win
+    else:
+        for win, _ in generate_windows(tile_path, tile_size=tile_size):
+            yield win
@@ -5,15 +5,39 @@ Incorporates TIGER/Line road and rail data as hard boundary constraints
 for field segmentation.
 """
 
+import hashlib
+import json
+import os
+from itertools import repeat
 from pathlib import Path
 from typing import Optional, Union
 
 import geopandas as gpd
 import numpy as np
+import pyogrio
 import rasterio
+import shapely
+from rasterio.enums import MergeAlg
 from rasterio.features import rasterize
 from shapely.geometry import LineString, MultiLineString
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional (pip install csb-foss[accel])
+    njit = None
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _weighted_sum_kernel(edges, roads, edge_scale, road_weight, out):
+        """out = edges * edge_scale + roads * road_weight in one sweep."""
+        for i in prange(edges.shape[0]):
+            out[i] = (
+                np.float32(edges[i]) * edge_scale
+                + np.float32(roads[i]) * road_weight
+            )
+
 
 def load_tiger_roads(
     roads_path: Path,
@@ -21,6 +45,7 @@ def load_tiger_roads(
     crs: Optional[str] = None,
     mtfcc_filter: Optional[list[str]] = None,
     layer: Optional[str] = None,
+    columns: Optional[list[str]] = None,
 ) -> gpd.GeoDataFrame:
     """
     Load TIGER/Line road data.
@@ -32,27 +57,22 @@ def load_tiger_roads(
         mtfcc_filter: Optional list of MTFCC codes to include
                      (e.g., ['S1100', 'S1200'] for primary/secondary roads)
         layer: Layer name for geodatabase (auto-detected if None)
+        columns: Attribute columns to read (all if None, [] for geometry only)
 
     Returns:
         GeoDataFrame of road lines
     """
-    # Auto-detect layer for geodatabases
     roads_path = Path(roads_path)
-    if layer is None and roads_path.suffix.lower() == '.gdb':
-        import fiona
-        layers = fiona.listlayers(roads_path)
-        layer = 'Roads' if 'Roads' in layers else layers[0] if layers else None
-
-    # Read with optional bbox filter
-    read_kwargs = {'bbox': bounds} if bounds is not None else {}
-    if layer is not None:
-        read_kwargs['layer'] = layer
+    layer = _tiger_layer(roads_path, layer, "Roads")
 
-    gdf = gpd.read_file(roads_path, **read_kwargs)
+    where = None
+    if mtfcc_filter is not None:
+        fields = pyogrio.read_info(roads_path, layer=layer)["fields"]
+        if "MTFCC" in fields:
+            codes = ", ".join("'" + str(c).replace("'", "''") + "'" for c in mtfcc_filter)
+            where = f"MTFCC IN ({codes})" if codes else "1 = 0"
 
-    # Filter by MTFCC if specified
-    if mtfcc_filter is not None and "MTFCC" in gdf.columns:
-        gdf = gdf[gdf["MTFCC"].isin(mtfcc_filter)]
+    gdf = _read_tiger(roads_path, bounds, layer, columns, where)
 
     # Reproject if needed
     if crs is not None and gdf.crs != crs:
@@ -66,6 +86,7 @@ def load_tiger_rails(
     bounds: Optional[tuple[float, float, float, float]] = None,
     crs: Optional[str] = None,
     layer: Optional[str] = None,
+    columns: Optional[list[str]] = None,
 ) -> gpd.GeoDataFrame:
     """
     Load TIGER/Line railroad data.
@@ -75,23 +96,15 @@ def load_tiger_rails(
         bounds: Optional bounding box to filter
         crs: Target CRS for reprojection
         layer: Layer name for geodatabase (auto-detected if None)
+        columns: Attribute columns to read (all if None, [] for geometry only)
 
     Returns:
         GeoDataFrame of railroad lines
     """
-    # Auto-detect layer for geodatabases
     rails_path = Path(rails_path)
-    if layer is None and rails_path.suffix.lower() == '.gdb':
-        import fiona
-        layers = fiona.listlayers(rails_path)
-        layer = 'Rails' if 'Rails' in layers else layers[0] if layers else None
-
-    # Read with optional bbox filter
-    read_kwargs = {'bbox': bounds} if bounds is not None else {}
-    if layer is not None:
-        read_kwargs['layer'] = layer
+    layer = _tiger_layer(rails_path, layer, "Rails")
 
-    gdf = gpd.read_file(rails_path, **read_kwargs)
+    gdf = _read_tiger(rails_path, bounds, layer, columns)
 
     if crs is not None and gdf.crs != crs:
         gdf = gdf.to_crs(crs)
@@ -99,6 +112,60 @@ def load_tiger_rails(
     return gdf
 
 
+def _tiger_layer(path: Path, layer: Optional[str], preferred: str) -> Optional[str]:
+    """
+    Pick the layer to read, auto-detecting it for geodatabases.
+
+    Args:
+        path: Path to TIGER data
+        layer: Explicit layer name, returned unchanged if given
+        preferred: Layer name to use when present in a geodatabase
+
+    Returns:
+        Layer name, or None to read the default layer
+    """
+    if layer is None and path.suffix.lower() == '.gdb':
+        layers = [name for name, _ in pyogrio.list_layers(path)]
+        layer = preferred if preferred in layers else layers[0] if layers else None
+    return layer
+
+
+def _read_tiger(
+    path: Path,
+    bounds: Optional[tuple[float, float, float, float]],
+    layer: Optional[str],
+    columns: Optional[list[str]],
+    where: Optional[str] = None,
+) -> gpd.GeoDataFrame:
+    """
+    Read TIGER features through pyogrio.
+
+    The bbox and attribute filter are handed to GDAL, so a spatial index
+    (.qix, GeoPackage R-tree) is used when the source has one.
+
+    Args:
+        path: Path to TIGER data
+        bounds: Optional bounding box filter
+        layer: Layer name, or None for the default layer
+        columns: Attribute columns to read
+        where: Optional OGR SQL attribute filter
+
+    Returns:
+        GeoDataFrame of features
+    """
+    read_kwargs = {}
+    if bounds is not None:
+        read_kwargs['bbox'] = tuple(bounds)
+    if layer is not None:
+        read_kwargs['layer'] = layer
+    if columns is not None:
+        read_kwargs['columns'] = columns
+    if where is not None:
+        read_kwargs['where'] = where
+
+    return pyogrio.read_dataframe(path, **read_kwargs)
+
+
 def buffer_infrastructure(
     gdf: gpd.GeoDataFrame,
     buffer_distance: float = 15.0,
@@ -113,9 +180,21 @@ def buffer_infrastructure(
     Returns:
         GeoDataFrame with buffered geometries
     """
-    gdf = gdf.copy()
-    gdf["geometry"] = gdf.geometry.buffer(buffer_distance)
-    return gdf
+    return gdf.set_geometry(_buffered_geoms(gdf, buffer_distance), crs=gdf.crs)
+
+
+def _buffered_geoms(gdf: gpd.GeoDataFrame, buffer_distance: float) -> np.ndarray:
+    """
+    Buffer the geometry column in one vectorized GEOS call.
+
+    Args:
+        gdf: GeoDataFrame of line geometries
+        buffer_distance: Buffer distance in CRS units
+
+    Returns:
+        Object ndarray of buffered shapely geometries
+    """
+    return shapely.buffer(np.asarray(gdf.geometry.values), buffer_distance)
 
 
 def rasterize_roads(
@@ -140,20 +219,13 @@ def rasterize_roads(
 
     # Buffer roads
     if buffer_distance > 0:
-        buffered = buffer_infrastructure(roads_gdf, buffer_distance)
-        geometries = buffered.geometry.tolist()
+        geometries = _buffered_geoms(roads_gdf, buffer_distance)
     else:
-        geometries = roads_gdf.geometry.tolist()
+        geometries = np.asarray(roads_gdf.geometry.values)
 
     # Rasterize
-    mask = rasterize(
-        geometries,
-        out_shape=shape,
-        transform=transform,
-        fill=0,
-        default_value=1,
-        dtype=np.uint8,
-    )
+    mask = np.zeros(shape, dtype=np.uint8)
+    _burn(geometries, mask, transform)
 
     return mask
 
@@ -164,16 +236,25 @@ def create_road_mask(
     reference_raster: Path = None,
     buffer_distance: float = 15.0,
     bounds: Optional[tuple[float, float, float, float]] = None,
+    cache_dir: Optional[Path] = None,
+    use_cache: bool = True,
 ) -> np.ndarray:
     """
     Create combined road/rail mask for segmentation constraints.
 
+    Masks are cached on disk as COGs keyed by the input files (path, size,
+    mtime), bounds, buffer distance and reference grid, so repeated runs
+    over the same area skip reading, buffering and rasterizing TIGER data.
+
     Args:
         roads_path: Path to TIGER roads data
         rails_path: Path to TIGER rails data
         reference_raster: Reference raster for georeferencing
         buffer_distance: Buffer distance in meters
         bounds: Optional bounding box filter
+        cache_dir: Mask cache directory (default ~/.cache/csb-foss, or
+                   $XDG_CACHE_HOME/csb-foss)
+        use_cache: Read and write the mask cache
 
     Returns:
         Binary mask array (1 = infrastructure, 0 = not)
@@ -186,37 +267,168 @@ def create_road_mask(
         if bounds is None:
             bounds = src.bounds
 
-    all_geometries = []
+    cache_path = None
+    if use_cache:
+        if cache_dir is None:
+            cache_root = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+            cache_dir = Path(cache_root) / "csb-foss"
+        key = _road_mask_cache_key(
+            roads_path, rails_path, bounds, buffer_distance, crs, transform, shape
+        )
+        cache_path = Path(cache_dir) / f"roadmask_{key}.tif"
+        if cache_path.exists():
+            with rasterio.open(cache_path) as cached:
+                return cached.read(1)
+
+    mask = _build_road_mask(
+        roads_path, rails_path, bounds, crs, transform, shape, buffer_distance
+    )
+
+    if cache_path is not None:
+        _write_cached_mask(mask, cache_path, crs, transform)
+
+    return mask
 
-    # Load and buffer roads
+
+def _build_road_mask(
+    roads_path: Optional[Path],
+    rails_path: Optional[Path],
+    bounds: tuple[float, float, float, float],
+    crs,
+    transform,
+    shape: tuple[int, int],
+    buffer_distance: float,
+) -> np.ndarray:
+    """
+    Load, buffer and rasterize roads and rails onto the reference grid.
+
+    Args:
+        roads_path: Path to TIGER roads data
+        rails_path: Path to TIGER rails data
+        bounds: Bounding box filter
+        crs: Reference CRS
+        transform: Reference affine transform
+        shape: Reference (height, width)
+        buffer_distance: Buffer distance in meters
+
+    Returns:
+        Binary mask array (1 = infrastructure, 0 = not)
+    """
+    # Roads and rails are burned into one buffer in turn, so only one
+    # source's geometries are held at a time
+    mask = np.zeros(shape, dtype=np.uint8)
+
+    # Load, buffer and burn roads
     if roads_path is not None and roads_path.exists():
-        roads = load_tiger_roads(roads_path, bounds=bounds, crs=crs)
+        roads = load_tiger_roads(roads_path, bounds=bounds, crs=crs, columns=[])
         if len(roads) > 0:
-            buffered_roads = buffer_infrastructure(roads, buffer_distance)
-            all_geometries.extend(buffered_roads.geometry.tolist())
+            _burn(_buffered_geoms(roads, buffer_distance), mask, transform)
+        del roads
 
-    # Load and buffer rails
+    # Load, buffer and burn rails
     if rails_path is not None and rails_path.exists():
-        rails = load_tiger_rails(rails_path, bounds=bounds, crs=crs)
+        rails = load_tiger_rails(rails_path, bounds=bounds, crs=crs, columns=[])
         if len(rails) > 0:
-            buffered_rails = buffer_infrastructure(rails, buffer_distance)
-            all_geometries.extend(buffered_rails.geometry.tolist())
+            _burn(_buffered_geoms(rails, buffer_distance), mask, transform)
+        del rails
+
+    return mask
+
+
+def _road_mask_cache_key(
+    roads_path: Optional[Path],
+    rails_path: Optional[Path],
+    bounds: tuple[float, float, float, float],
+    buffer_distance: float,
+    crs,
+    transform,
+    shape: tuple[int, int],
+) -> str:
+    """
+    Cache key for a road mask.
+
+    Args:
+        roads_path: Path to TIGER roads data
+        rails_path: Path to TIGER rails data
+        bounds: Bounding box filter
+        buffer_distance: Buffer distance in meters
+        crs: Reference CRS
+        transform: Reference affine transform
+        shape: Reference (height, width)
 
-    if not all_geometries:
-        # Return empty mask if no infrastructure
-        return np.zeros(shape, dtype=np.uint8)
+    Returns:
+        16-character hex digest
+    """
+
+    def source(path):
+        if path is None or not Path(path).exists():
+            return None
+        stat = Path(path).stat()
+        return [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+
+    payload = {
+        "roads": source(roads_path),
+        "rails": source(rails_path),
+        "bounds": [float(b) for b in bounds],
+        "buffer": float(buffer_distance),
+        "crs": crs.to_wkt() if crs is not None else None,
+        "transform": list(transform)[:6],
+        "shape": list(shape),
+    }
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _write_cached_mask(mask: np.ndarray, cache_path: Path, crs, transform) -> None:
+    """
+    Write a road mask to the cache as a COG.
+
+    Written to a temporary name and renamed into place so concurrent runs
+    never read a partial file.
 
-    # Rasterize combined geometries
-    mask = rasterize(
-        all_geometries,
-        out_shape=shape,
+    Args:
+        mask: Binary road mask array
+        cache_path: Destination path
+        crs: Mask CRS
+        transform: Mask affine transform
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp.tif")
+
+    with rasterio.open(
+        tmp_path,
+        "w",
+        driver="COG",
+        height=mask.shape[0],
+        width=mask.shape[1],
+        count=1,
+        dtype=rasterio.uint8,
+        crs=crs,
         transform=transform,
-        fill=0,
-        default_value=1,
-        dtype=np.uint8,
-    )
+        blocksize=512,
+        compress="deflate",
+    ) as dst:
+        dst.write(mask, 1)
+
+    os.replace(tmp_path, cache_path)
 
-    return mask
+
+def _burn(geometries: np.ndarray, mask: np.ndarray, transform) -> None:
+    """
+    Burn geometries as 1 into an existing uint8 mask in place.
+
+    Args:
+        geometries: Array of shapely geometries
+        mask: uint8 mask to write into; existing 1s are preserved
+        transform: Affine transform of the mask
+    """
+    rasterize(
+        zip(geometries, repeat(1)),
+        out=mask,
+        transform=transform,
+        all_touched=False,
+        merge_alg=MergeAlg.replace,
+    )
 
 
 def save_road_mask(
@@ -271,15 +483,27 @@ def combine_edge_sources(
     Returns:
         Combined edge map (float)
     """
-    # Normalize temporal edges to 0-1 if needed
-    if temporal_edges.max() > 1:
-        temporal_edges = temporal_edges.astype(np.float32) / temporal_edges.max()
-
-    # Combine with weights
-    combined = temporal_edges * edge_weight + road_mask.astype(np.float32) * road_weight
+    # Normalize temporal edges to 0-1 if needed; folded into the weight
+    edge_max = temporal_edges.max()
+    edge_scale = edge_weight / edge_max if edge_max > 1 else edge_weight
+
+    # Combine with weights into a single float32 output
+    combined = np.empty(temporal_edges.shape, dtype=np.float32)
+    if njit is not None:
+        _weighted_sum_kernel(
+            temporal_edges.reshape(-1),
+            road_mask.reshape(-1),
+            np.float32(edge_scale),
+            np.float32(road_weight),
+            combined.reshape(-1),
+        )
+    else:
+        np.multiply(temporal_edges, edge_scale, out=combined, casting="unsafe")
+        combined += np.multiply(road_mask, road_weight, dtype=np.float32)
 
     # Normalize to 0-1
-    if combined.max() > 0:
-        combined = combined / combined.max()
+    combined_max = combined.max()
+    if combined_max > 0:
+        combined /= combined_max
 
     return combined
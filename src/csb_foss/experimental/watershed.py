@@ -11,6 +11,63 @@ from scipy.ndimage import distance_transform_edt, label
 from skimage.segmentation import watershed
 from skimage.feature import peak_local_max
 
+try:
+    import cupy as cp
+    from cucim.core.morphology import distance_transform_edt as _edt_gpu
+    _HAS_GPU = True
+except ImportError:  # cuCIM is optional (pip install csb-foss[gpu])
+    _HAS_GPU = False
+
+# Below this many pixels the host<->device copies outweigh the GPU EDT.
+_GPU_EDT_MIN_SIZE = 1_000_000
+
+
+def _edt(mask: np.ndarray) -> np.ndarray:
+    """
+    Euclidean distance transform, on the GPU via cuCIM when available.
+
+    Args:
+        mask: Boolean array; distances are measured to the nearest False
+
+    Returns:
+        float64 distance array on the host
+    """
+    if _HAS_GPU and mask.size >= _GPU_EDT_MIN_SIZE:
+        return cp.asnumpy(_edt_gpu(cp.asarray(mask)))
+    return distance_transform_edt(mask)
+
+
+def _interior_masks(
+    edge_map: np.ndarray,
+    road_mask: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Threshold an edge map into EDT input and watershed mask.
+
+    Equivalent to thresholding the inverted map (1 - edges) at 0.5 and
+    0.3, but compares the edge map directly instead of materializing the
+    inverted float array.
+
+    Args:
+        edge_map: Edge confidence map (0-1 float or 0-255 uint8)
+        road_mask: Optional binary road mask, excluded from the mask
+
+    Returns:
+        Tuple of (interior pixels for the EDT, watershed mask)
+    """
+    # Normalize thresholds rather than the map when it is not 0-1
+    scale = edge_map.max()
+    scale = scale if scale > 1 else 1.0
+
+    interior_bin = edge_map < 0.5 * scale
+    mask = edge_map < 0.7 * scale
+
+    # If road mask provided, exclude roads from segmentation
+    if road_mask is not None:
+        mask &= road_mask == 0
+
+    return interior_bin, mask
+
 
 def watershed_segment(
     edge_map: np.ndarray,
@@ -32,42 +89,35 @@ def watershed_segment(
     Returns:
         Integer label array where each segment has a unique value
     """
-    # Normalize edge map to 0-1 if needed
-    if edge_map.max() > 1:
-        edge_map = edge_map.astype(np.float32) / edge_map.max()
-
-    # Invert edge map: interior = high, edges = low
-    # This makes distance transform work correctly
-    interior = 1.0 - edge_map
-
-    # Create mask for watershed (where to compute)
-    # Include all non-edge areas
-    mask = interior > 0.3
-
-    # If road mask provided, exclude roads from segmentation
-    if road_mask is not None:
-        mask = mask & (road_mask == 0)
+    interior_bin, mask = _interior_masks(edge_map, road_mask)
 
     # Distance transform from edges
     # Pixels far from edges get high values
-    distance = distance_transform_edt(interior > 0.5)
+    distance = _edt(interior_bin)
 
-    # Find local maxima as markers (field centers)
+    # Find local maxima as markers (field centers). Without a road mask the
+    # distance is already zero everywhere outside the mask, so the labels
+    # argument (and skimage's per-label pass) would not change the peaks.
     local_max_coords = peak_local_max(
         distance,
         min_distance=min_distance,
         exclude_border=False,
-        labels=mask.astype(int),
+        labels=mask.view(np.uint8) if road_mask is not None else None,
     )
 
     # Create marker image
-    markers = np.zeros(edge_map.shape, dtype=np.int32)
-    for i, (y, x) in enumerate(local_max_coords):
-        markers[y, x] = i + 1
-
-    # Expand markers using connected components
-    # This helps with very small initial markers
-    markers, n_markers = label(markers > 0)
+    if min_distance >= 2:
+        # Peaks are at least min_distance (>= 2) apart, so none touch and
+        # each is its own marker; number them in raster order like label()
+        order = np.lexsort((local_max_coords[:, 1], local_max_coords[:, 0]))
+        ys, xs = local_max_coords[order, 0], local_max_coords[order, 1]
+        markers = np.zeros(edge_map.shape, dtype=np.int32)
+        markers[ys, xs] = np.arange(1, len(ys) + 1, dtype=np.int32)
+    else:
+        # Adjacent peaks are possible; merge them using connected components
+        markers = np.zeros(edge_map.shape, dtype=bool)
+        markers[local_max_coords[:, 0], local_max_coords[:, 1]] = True
+        markers, _ = label(markers)
 
     # Perform watershed
     # Use negative distance so watershed flows from edges toward centers
@@ -107,30 +157,63 @@ def remove_small_segments(
     """
     from scipy.ndimage import find_objects
 
-    labels = labels.copy()
-    unique_labels = np.unique(labels)
-    unique_labels = unique_labels[unique_labels > 0]  # Exclude background
-
-    for lbl in unique_labels:
-        mask = labels == lbl
-        size = mask.sum()
-
-        if size < min_size:
-            # Find neighboring labels
-            from scipy.ndimage import binary_dilation
-
-            dilated = binary_dilation(mask)
-            neighbors = labels[dilated & ~mask]
-            neighbors = neighbors[neighbors > 0]
-            neighbors = neighbors[neighbors != lbl]
-
-            if len(neighbors) > 0:
-                # Merge to most common neighbor
-                unique, counts = np.unique(neighbors, return_counts=True)
-                target_label = unique[counts.argmax()]
-                labels[mask] = target_label
-
-    return labels
+    # All segment sizes in one pass
+    sizes = np.bincount(labels.ravel())
+    small = np.flatnonzero(sizes < min_size)
+    small = small[(small > 0) & (sizes[small] > 0)]
+
+    if small.size == 0:
+        return labels.copy()
+
+    # remap[old] = current group; applied to the whole raster once at the
+    # end. Members of each group are tracked so remap never needs chasing.
+    remap = np.arange(sizes.size, dtype=labels.dtype)
+    members = {}
+    group_sizes = sizes.copy()
+    h, w = labels.shape
+
+    # Bounding box (row start, row stop, col start, col stop) of each
+    # label's current group, grown as it absorbs other segments
+    boxes = np.zeros((sizes.size, 4), dtype=np.int64)
+    for i, found in enumerate(find_objects(labels), start=1):
+        if found is not None:
+            rows, cols = found
+            boxes[i] = rows.start, rows.stop, cols.start, cols.stop
+
+    for lbl in small:
+        # Segment may have grown past the threshold by absorbing others
+        if group_sizes[lbl] >= min_size:
+            continue
+
+        # Work inside the group's bounding box, padded by one pixel, with
+        # labels as they stand after earlier merges
+        r0, r1, c0, c1 = boxes[lbl]
+        sub = remap[labels[max(r0 - 1, 0):min(r1 + 1, h), max(c0 - 1, 0):min(c1 + 1, w)]]
+        mask = sub == lbl
+
+        # One-pixel ring around the segment (4-connected dilation)
+        ring = np.zeros_like(mask)
+        ring[1:, :] |= mask[:-1, :]
+        ring[:-1, :] |= mask[1:, :]
+        ring[:, 1:] |= mask[:, :-1]
+        ring[:, :-1] |= mask[:, 1:]
+        ring &= ~mask
+
+        neighbors = sub[ring]
+        neighbors = neighbors[(neighbors > 0) & (neighbors != lbl)]
+
+        if len(neighbors) > 0:
+            # Merge to most common neighbor
+            unique, counts = np.unique(neighbors, return_counts=True)
+            target_label = unique[counts.argmax()]
+            absorbed = members.pop(lbl, [lbl])
+            remap[absorbed] = target_label
+            members.setdefault(target_label, [target_label]).extend(absorbed)
+            group_sizes[target_label] += group_sizes[lbl]
+            tr0, tr1, tc0, tc1 = boxes[target_label]
+            boxes[target_label] = min(tr0, r0), max(tr1, r1), min(tc0, c0), max(tc1, c1)
+
+    return remap[labels]
 
 
 def segment_with_markers(
@@ -149,16 +232,8 @@ def segment_with_markers(
     Returns:
         Label array
     """
-    # Normalize edge map
-    if edge_map.max() > 1:
-        edge_map = edge_map.astype(np.float32) / edge_map.max()
-
-    interior = 1.0 - edge_map
-    distance = distance_transform_edt(interior > 0.5)
-
-    mask = interior > 0.3
-    if road_mask is not None:
-        mask = mask & (road_mask == 0)
+    interior_bin, mask = _interior_masks(edge_map, road_mask)
+    distance = _edt(interior_bin)
 
     labels = watershed(-distance, markers, mask=mask)
 
@@ -186,22 +261,23 @@ def refine_segment_boundaries(
     Returns:
         Refined label array
     """
+    from scipy.ndimage import center_of_mass
+
     for _ in range(iterations):
         # Use centroid of each segment as marker
         markers = np.zeros_like(labels)
 
-        from scipy.ndimage import center_of_mass
-
         unique_labels = np.unique(labels)
         unique_labels = unique_labels[unique_labels > 0]
 
-        for lbl in unique_labels:
-            mask = labels == lbl
-            if mask.sum() > 0:
-                cy, cx = center_of_mass(mask.astype(float))
-                cy, cx = int(cy), int(cx)
-                if 0 <= cy < labels.shape[0] and 0 <= cx < labels.shape[1]:
-                    markers[cy, cx] = lbl
+        if len(unique_labels) > 0:
+            # All centroids in a single call
+            centroids = np.array(
+                center_of_mass(np.ones(labels.shape, dtype=np.uint8), labels, unique_labels)
+            )
+            cy = np.clip(centroids[:, 0].astype(np.intp), 0, labels.shape[0] - 1)
+            cx = np.clip(centroids[:, 1].astype(np.intp), 0, labels.shape[1] - 1)
+            markers[cy, cx] = unique_labels
 
         # Re-run watershed
         labels = segment_with_markers(edge_map, markers)
@@ -219,17 +295,22 @@ def labels_to_edges(labels: np.ndarray) -> np.ndarray:
     Returns:
         Binary edge array
     """
-    from scipy.ndimage import sobel
-
-    # Compute gradient magnitude
-    gx = sobel(labels.astype(float), axis=0)
-    gy = sobel(labels.astype(float), axis=1)
-    gradient = np.sqrt(gx**2 + gy**2)
-
-    # Threshold to get edges
-    edges = (gradient > 0).astype(np.uint8)
+    edges = np.zeros(labels.shape, dtype=bool)
+
+    # Mark both pixels of every differing 8-neighbour pair; this is the
+    # footprint a Sobel gradient on the labels would flag
+    pairs = (
+        ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),
+        ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),
+        ((slice(1, None), slice(1, None)), (slice(None, -1), slice(None, -1))),
+        ((slice(1, None), slice(None, -1)), (slice(None, -1), slice(1, None))),
+    )
+    for a, b in pairs:
+        diff = labels[a] != labels[b]
+        edges[a] |= diff
+        edges[b] |= diff
 
-    return edges
+    return edges.view(np.uint8)
 
 
 def compute_segment_statistics(
@@ -246,26 +327,35 @@ def compute_segment_statistics(
     Returns:
         Dictionary with segment statistics
     """
-    unique_labels = np.unique(labels)
-    unique_labels = unique_labels[unique_labels > 0]
+    from scipy import ndimage
+
+    unique_labels, counts = np.unique(labels, return_counts=True)
+    keep = unique_labels > 0
+    unique_labels, counts = unique_labels[keep], counts[keep]
+    label_ids = unique_labels.tolist()
 
     stats = {
         "n_segments": len(unique_labels),
-        "sizes": {},
+        "sizes": dict(zip(label_ids, counts.tolist())),
         "values": {} if values is not None else None,
     }
 
-    for lbl in unique_labels:
-        mask = labels == lbl
-        stats["sizes"][int(lbl)] = int(mask.sum())
-
-        if values is not None:
-            segment_values = values[mask]
-            stats["values"][int(lbl)] = {
-                "mean": float(segment_values.mean()),
-                "std": float(segment_values.std()),
-                "min": float(segment_values.min()),
-                "max": float(segment_values.max()),
-            }
+    if values is not None and label_ids:
+        # One labelled pass per statistic instead of one mask per segment
+        means = ndimage.mean(values, labels, unique_labels)
+        stds = ndimage.standard_deviation(values, labels, unique_labels)
+        mins = ndimage.minimum(values, labels, unique_labels)
+        maxs = ndimage.maximum(values, labels, unique_labels)
+
+        stats["values"] = {
+            lbl: {"mean": mean, "std": std, "min": vmin, "max": vmax}
+            for lbl, mean, std, vmin, vmax in zip(
+                label_ids,
+                np.asarray(means, dtype=float).tolist(),
+                np.asarray(stds, dtype=float).tolist(),
+                np.asarray(mins, dtype=float).tolist(),
+                np.asarray(maxs, dtype=float).tolist(),
+            )
+        }
 
     return stats
@@ -9,9 +9,10 @@ from pathlib import Path
 from typing import Optional
 
 import geopandas as gpd
+import numpy as np
 
 from ..config import CSBConfig
-from ..raster.io import get_cdl_paths_for_years
+from ..raster.io import build_stack_vrt, get_cdl_paths_for_years
 from ..raster.combine import combine_cdl_rasters, combine_cdl_rasters_windowed
 from ..vector.vectorize import vectorize_raster, filter_by_crop_presence
 from ..vector.eliminate import tiered_eliminate
@@ -32,7 +33,7 @@ def create_csb(
         progress: Show progress information
 
     Returns:
-        Path to output GeoPackage
+        Path to output GeoParquet
     """
     config.ensure_directories()
 
@@ -58,6 +59,15 @@ def create_csb(
     if progress:
         print(f"   Found {len(cdl_paths)} years: {list(cdl_paths.keys())}")
 
+    # One multi-band VRT lets each window read every year through a single
+    # dataset; rasters on differing grids keep per-year reads
+    try:
+        stack_path = build_stack_vrt(
+            cdl_paths, config.output.create_dir / "cdl_stack.vrt"
+        )
+    except ValueError:
+        stack_path = None
+
     # Step 2: Combine rasters
     if progress:
         print("\n2. Combining CDL rasters...")
@@ -70,6 +80,7 @@ def create_csb(
         combined_path,
         lookup_path,
         progress=progress,
+        stack_path=stack_path,
     )
 
     # Step 3: Vectorize or run experimental segmentation
@@ -87,11 +98,12 @@ def create_csb(
             lookup_path,
             config,
             progress,
+            stack_path=stack_path,
         )
 
-    # Save output
-    output_path = config.output.create_dir / f"csb_{start_year}_{end_year}.gpkg"
-    output_gdf.to_file(output_path, driver="GPKG")
+    # Save output (GeoParquet: columnar handoff to the prep stage)
+    output_path = config.output.create_dir / f"csb_{start_year}_{end_year}.parquet"
+    output_gdf.to_parquet(output_path)
 
     if progress:
         print(f"\nCreate stage complete: {len(output_gdf)} polygons")
@@ -167,6 +179,7 @@ def run_experimental_track(
     lookup_path: Path,
     config: CSBConfig,
     progress: bool = True,
+    stack_path: Optional[Path] = None,
 ) -> gpd.GeoDataFrame:
     """
     Run experimental (improved) processing track.
@@ -180,6 +193,7 @@ def run_experimental_track(
         lookup_path: Path to lookup table
         config: Configuration
         progress: Show progress
+        stack_path: Optional multi-year VRT over cdl_paths
 
     Returns:
         Processed GeoDataFrame
@@ -188,16 +202,22 @@ def run_experimental_track(
     from ..experimental.edge_voting import compute_temporal_edge_votes, save_edge_votes
     from ..experimental.road_integration import create_road_mask, combine_edge_sources
     from ..experimental.watershed import watershed_segment
-    from ..vector.vectorize import enrich_from_lookup
+    from ..vector.vectorize import enrich_from_lookup, polygons_from_shapes
+    from concurrent.futures import ThreadPoolExecutor
     from rasterio.features import shapes
-    from shapely.geometry import shape
     import rasterio
 
+    # The combined raster is only needed in step 9; decode it in the
+    # background (GDAL releases the GIL) while edges are computed
+    reader = ThreadPoolExecutor(max_workers=1)
+    combined_future = reader.submit(_read_band_threaded, combined_path)
+    reader.shutdown(wait=False)
+
     # Step 3: Load CDL stack
     if progress:
         print("\n3. Loading CDL stack for edge voting...")
 
-    stack, years, metadata = read_multi_year_stack(cdl_paths)
+    stack, years, metadata = read_multi_year_stack(cdl_paths, stack_path=stack_path)
 
     # Step 4: Compute temporal edge votes
     if progress:
@@ -253,17 +273,14 @@ def run_experimental_track(
         transform = src.transform
         crs = src.crs
 
-    geometries = []
-    values = []
-
-    for geom, val in shapes(labels.astype('int32'), transform=transform):
-        if val == 0:  # Skip background
-            continue
-        geometries.append(shape(geom))
-        values.append(int(val))
+    # Background (label 0) is masked out rather than traced and dropped
+    labels = labels.astype(np.int32, copy=False)
+    geometries, values = polygons_from_shapes(
+        shapes(labels, mask=labels > 0, transform=transform)
+    )
 
     gdf = gpd.GeoDataFrame(
-        {"segment_id": values},
+        {"segment_id": values.astype(np.int32)},
         geometry=geometries,
         crs=crs,
     )
@@ -274,15 +291,18 @@ def run_experimental_track(
 
     # For each segment, find the majority gridcode from combined raster
     # (simplified: use centroid sampling)
-    with rasterio.open(combined_path) as src:
-        combined_data = src.read(1)
-
-    for idx in gdf.index:
-        centroid = gdf.loc[idx, 'geometry'].centroid
-        col, row = ~transform * (centroid.x, centroid.y)
-        row, col = int(row), int(col)
-        if 0 <= row < combined_data.shape[0] and 0 <= col < combined_data.shape[1]:
-            gdf.loc[idx, 'gridcode'] = combined_data[row, col]
+    combined_data = combined_future.result()
+
+    centroids = gdf.geometry.centroid
+    cols, rows = ~transform * (centroids.x.to_numpy(), centroids.y.to_numpy())
+    rows, cols = rows.astype(np.int64), cols.astype(np.int64)
+    inside = (
+        (rows >= 0) & (rows < combined_data.shape[0])
+        & (cols >= 0) & (cols < combined_data.shape[1])
+    )
+    gridcode = np.full(len(gdf), np.nan)
+    gridcode[inside] = combined_data[rows[inside], cols[inside]]
+    gdf['gridcode'] = gridcode
 
     # Enrich from lookup
     gdf = enrich_from_lookup(gdf, lookup_path)
@@ -298,3 +318,19 @@ def run_experimental_track(
     )
 
     return gdf
+
+
+def _read_band_threaded(raster_path: Path) -> np.ndarray:
+    """
+    Read band 1 with GDAL decompressing blocks on all cores.
+
+    Args:
+        raster_path: Raster to read
+
+    Returns:
+        Band 1 as a 2D array
+    """
+    import rasterio
+
+    with rasterio.Env(GDAL_NUM_THREADS="ALL_CPUS"), rasterio.open(raster_path) as src:
+        return src.read(1)
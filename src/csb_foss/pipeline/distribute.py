@@ -6,30 +6,74 @@ Replaces CSB-Run/CSB-Run/CSB-distribute.py
 """
 
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
 import rasterio
+import shapely
 from rasterio.features import rasterize
 
 from ..config import CSBConfig
 from ..db.schema import STATE_FIPS, FIPS_TO_STATE
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional (pip install csb-foss[accel])
+    njit = None
+
+# Outputs written by default. Shapefiles are opt-in: add "shp" to formats.
+DEFAULT_FORMATS = ("gpkg", "tif")
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _scanline_fill_kernel(
+        x0, y0, x1, y1, edge_start, values, row_start, row_geoms, max_edges, out
+    ):
+        """Even-odd fill of pixel centres, rows in parallel, later geoms win."""
+        height, width = out.shape
+        for r in prange(height):
+            xs = np.empty(max_edges, dtype=np.float64)
+            yc = r + 0.5
+            for j in range(row_start[r], row_start[r + 1]):
+                g = row_geoms[j]
+                n = 0
+                for e in range(edge_start[g], edge_start[g + 1]):
+                    ya, yb = y0[e], y1[e]
+                    if (ya <= yc < yb) or (yb <= yc < ya):
+                        xs[n] = x0[e] + (yc - ya) * (x1[e] - x0[e]) / (yb - ya)
+                        n += 1
+                if n < 2:
+                    continue
+                crossings = np.sort(xs[:n])
+                for k in range(0, n - 1, 2):
+                    c0 = max(int(np.floor(crossings[k] + 0.5)), 0)
+                    c1 = min(int(np.floor(crossings[k + 1] + 0.5)), width)
+                    for c in range(c0, c1):
+                        out[r, c] = values[g]
+
 
 def distribute_csb(
     config: CSBConfig,
     input_path: Optional[Path] = None,
     states: Optional[List[str]] = None,
     progress: bool = True,
+    formats: Sequence[str] = DEFAULT_FORMATS,
 ) -> dict:
     """
     Stage 3: Merge to national and export by state.
 
     Args:
         config: CSB configuration
-        input_path: Path to input GeoPackage (from prep stage)
+        input_path: Path to input GeoParquet or GeoPackage (from prep stage)
         states: Optional list of state abbreviations to export (None = all)
         progress: Show progress information
+        formats: Outputs to write: "gpkg" (one GeoPackage with a layer per
+            state), "shp" (a Shapefile per state) and/or "tif"
 
     Returns:
         Dictionary of output paths by format
@@ -44,7 +88,7 @@ def distribute_csb(
 
     # Find input if not specified
     if input_path is None:
-        input_path = config.output.prep_dir / f"csb_{start_year}_{end_year}_prep.gpkg"
+        input_path = config.output.prep_dir / f"csb_{start_year}_{end_year}_prep.parquet"
 
     if not input_path.exists():
         raise FileNotFoundError(f"Input not found: {input_path}")
@@ -53,7 +97,10 @@ def distribute_csb(
     if progress:
         print("\n1. Loading CSB polygons...")
 
-    gdf = gpd.read_file(input_path)
+    if input_path.suffix == ".parquet":
+        gdf = gpd.read_parquet(input_path)
+    else:
+        gdf = gpd.read_file(input_path)
 
     if progress:
         print(f"   Loaded {len(gdf)} polygons")
@@ -82,20 +129,39 @@ def distribute_csb(
         "tif": [],
     }
 
+    # All states go into one GeoPackage as separate layers, so the file
+    # is opened by GDAL once per layer rather than created per state
+    years_str = f"{start_year % 100:02d}{end_year % 100:02d}"
+    gpkg_path = config.output.distribute_dir / "gpkg" / f"CSB{years_str}.gpkg"
+
+    # Split by state once instead of scanning the full frame per state
+    if "state_fips" in gdf.columns:
+        state_groups = dict(list(gdf.groupby("state_fips", sort=False)))
+    else:
+        state_groups = None
+
     for state in states:
         if progress:
             print(f"   Processing {state}...")
 
+        if state_groups is not None:
+            state_fips = STATE_FIPS.get(state.upper())
+            state_gdf = state_groups.get(state_fips, gdf.iloc[:0])
+        else:
+            state_gdf = gdf
+
         state_outputs = export_state(
-            gdf,
+            state_gdf,
             state,
             config.output.distribute_dir,
             start_year,
             end_year,
+            formats=formats,
+            gpkg_path=gpkg_path,
         )
 
         for fmt, path in state_outputs.items():
-            if path is not None:
+            if path is not None and path not in outputs[fmt]:
                 outputs[fmt].append(path)
 
     if progress:
@@ -127,30 +193,64 @@ def generate_csb_ids(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         gdf["csb_years"] = "0000"
 
     # Generate IDs
-    gdf["csb_id"] = gdf.apply(
-        lambda row: f"{row['state_fips']}{row['csb_years']}{row.name:09d}",
-        axis=1,
-    )
+    seq = pd.Series(_zero_padded(gdf.index), index=gdf.index)
+    gdf["csb_id"] = gdf["state_fips"].astype(str) + gdf["csb_years"].astype(str) + seq
 
     return gdf
 
 
+def _zero_padded(index: pd.Index, width: int = 9) -> np.ndarray:
+    """
+    Format an index as zero-padded decimal strings.
+
+    Non-negative integers that fit in width digits are written digit by
+    digit into a byte buffer, avoiding a Python str per row; anything else
+    goes through str.zfill.
+
+    Args:
+        index: Index to format
+        width: Minimum number of digits
+
+    Returns:
+        Array of strings
+    """
+    values = index.to_numpy()
+    if not np.issubdtype(values.dtype, np.integer) or (
+        len(values) and (values.min() < 0 or values.max() >= 10**width)
+    ):
+        return pd.Series(index.astype(str)).str.zfill(width).to_numpy()
+
+    digits = np.empty((len(values), width), dtype=np.uint8)
+    remaining = values.astype(np.int64)
+    for j in range(width - 1, -1, -1):
+        np.remainder(remaining, 10, out=digits[:, j], casting="unsafe")
+        remaining //= 10
+    digits += ord("0")
+
+    return digits.view(f"S{width}").ravel().astype(f"U{width}")
+
+
 def export_state(
     gdf: gpd.GeoDataFrame,
     state: str,
     output_dir: Path,
     start_year: int,
     end_year: int,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    gpkg_path: Optional[Path] = None,
 ) -> dict:
     """
     Export data for a single state in multiple formats.
 
     Args:
-        gdf: Full GeoDataFrame
+        gdf: Full GeoDataFrame, or the state's rows already split out
         state: State abbreviation (e.g., "TN")
         output_dir: Base output directory
         start_year: First year
         end_year: Last year
+        formats: Any of "gpkg", "shp" and "tif"
+        gpkg_path: Shared GeoPackage to write the state into as a layer
+            (default: a GeoPackage per state)
 
     Returns:
         Dictionary of format to output path
@@ -162,10 +262,12 @@ def export_state(
     if state_fips is None:
         return outputs
 
+    # Frames already split by state are used as they are, not re-indexed
     if "state_fips" in gdf.columns:
-        state_gdf = gdf[gdf["state_fips"] == state_fips].copy()
+        in_state = gdf["state_fips"] == state_fips
+        state_gdf = gdf if in_state.all() else gdf[in_state]
     else:
-        state_gdf = gdf.copy()
+        state_gdf = gdf
 
     if len(state_gdf) == 0:
         return outputs
@@ -173,48 +275,83 @@ def export_state(
     years_str = f"{start_year % 100:02d}{end_year % 100:02d}"
     base_name = f"CSB{state.upper()}{years_str}"
 
-    # Create state directories
-    gpkg_dir = output_dir / "gpkg"
-    shp_dir = output_dir / "shp"
-    tif_dir = output_dir / "tif"
-
-    for d in [gpkg_dir, shp_dir, tif_dir]:
-        d.mkdir(parents=True, exist_ok=True)
-
-    # Export GeoPackage
-    gpkg_path = gpkg_dir / f"{base_name}.gpkg"
-    state_gdf.to_file(gpkg_path, driver="GPKG")
-    outputs["gpkg"] = gpkg_path
+    # Export GeoPackage (layer named after the state file)
+    if "gpkg" in formats:
+        if gpkg_path is None:
+            gpkg_path = output_dir / "gpkg" / f"{base_name}.gpkg"
+        gpkg_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_vector(state_gdf, gpkg_path, "GPKG", layer=base_name)
+        outputs["gpkg"] = gpkg_path
 
     # Export Shapefile
-    shp_path = shp_dir / f"{base_name}.shp"
-    state_gdf.to_file(shp_path, driver="ESRI Shapefile")
-    outputs["shp"] = shp_path
+    if "shp" in formats:
+        shp_dir = output_dir / "shp"
+        shp_dir.mkdir(parents=True, exist_ok=True)
+        shp_path = shp_dir / f"{base_name}.shp"
+        _write_vector(state_gdf, shp_path, "ESRI Shapefile")
+        outputs["shp"] = shp_path
 
     # Export Raster (CSBID as value)
-    tif_path = tif_dir / f"{base_name}.tif"
-    export_state_raster(state_gdf, tif_path)
-    outputs["tif"] = tif_path
+    if "tif" in formats:
+        tif_dir = output_dir / "tif"
+        tif_dir.mkdir(parents=True, exist_ok=True)
+        tif_path = tif_dir / f"{base_name}.tif"
+        export_state_raster(state_gdf, tif_path)
+        outputs["tif"] = tif_path
 
     return outputs
 
 
+def _write_vector(
+    gdf: gpd.GeoDataFrame,
+    path: Path,
+    driver: str,
+    layer: Optional[str] = None,
+) -> None:
+    """
+    Write a GeoDataFrame with pyogrio, through Arrow when GDAL supports it.
+
+    Args:
+        gdf: GeoDataFrame to write
+        path: Output path
+        driver: OGR driver name
+        layer: Layer name; an existing layer of that name is replaced
+    """
+    pyogrio.write_dataframe(
+        gdf,
+        path,
+        layer=layer,
+        driver=driver,
+        use_arrow=pyogrio.__gdal_version__ >= (3, 8, 0),
+    )
+
+
 def export_state_raster(
     gdf: gpd.GeoDataFrame,
     output_path: Path,
     resolution: float = 30.0,
+    block_size: int = 512,
 ) -> Path:
     """
     Export state polygons as raster with CSBID as pixel value.
 
+    The 15-digit CSBID is stored as int64 (0 where no polygon), so pixel
+    values map straight back to features. The output is tiled and each tile
+    is burned and written on its own, so peak memory is one tile rather
+    than the whole state.
+
     Args:
         gdf: GeoDataFrame with csb_id column
         output_path: Output path
         resolution: Pixel size in CRS units
+        block_size: Tile size in pixels (multiple of 16)
 
     Returns:
         Output path
     """
+    from rasterio.transform import from_bounds
+    from rasterio.windows import bounds as window_bounds
+
     # Get bounds
     bounds = gdf.total_bounds
     minx, miny, maxx, maxy = bounds
@@ -224,36 +361,124 @@ def export_state_raster(
     height = int((maxy - miny) / resolution)
 
     # Create transform
-    from rasterio.transform import from_bounds
-
     transform = from_bounds(minx, miny, maxx, maxy, width, height)
 
-    # Create shapes for rasterization
-    # Use row index as value (CSBID is string, can't use directly)
-    shapes = [(geom, idx) for idx, geom in enumerate(gdf.geometry, start=1)]
-
-    # Rasterize
-    raster = rasterize(
-        shapes,
-        out_shape=(height, width),
-        transform=transform,
-        fill=0,
-        dtype="int32",
-    )
+    geoms = gdf.geometry.values
+    csb_ids = gdf["csb_id"].astype(np.int64).to_numpy()
 
-    # Write raster
     profile = {
         "driver": "GTiff",
-        "dtype": "int32",
+        "dtype": "int64",
         "width": width,
         "height": height,
         "count": 1,
         "crs": gdf.crs,
         "transform": transform,
         "compress": "lzw",
+        "predictor": 2,
+        "tiled": True,
+        "blockxsize": block_size,
+        "blockysize": block_size,
     }
 
     with rasterio.open(output_path, "w", **profile) as dst:
-        dst.write(raster, 1)
+        windows = [window for _, window in dst.block_windows(1)]
+
+        # One bulk query of the spatial index for all tiles; pairs sorted by
+        # tile, then ascending polygon to keep rasterize's last-wins rule
+        tile_boxes = shapely.box(
+            *np.array([window_bounds(w, transform) for w in windows]).T
+        )
+        tile_idx, poly_idx = gdf.sindex.query(tile_boxes)
+        order = np.lexsort((poly_idx, tile_idx))
+        tile_idx, poly_idx = tile_idx[order], poly_idx[order]
+        splits = np.searchsorted(tile_idx, np.arange(len(windows) + 1))
+
+        for i, window in enumerate(windows):
+            tile = np.zeros((int(window.height), int(window.width)), dtype=np.int64)
+            hits = poly_idx[splits[i]:splits[i + 1]]
+            if len(hits):
+                _burn_polygons(
+                    geoms[hits], csb_ids[hits], tile, dst.window_transform(window)
+                )
+            dst.write(tile, 1, window=window)
 
     return output_path
+
+
+def _burn_polygons(
+    geoms: np.ndarray,
+    values: np.ndarray,
+    out: np.ndarray,
+    transform,
+) -> None:
+    """
+    Burn polygons into ``out`` by pixel-centre inclusion, later ones on top.
+
+    With numba installed, polygon edges are scan-converted row by row in
+    parallel using GDAL's rasterization rules; otherwise this defers to
+    ``rasterio.features.rasterize``.
+
+    Args:
+        geoms: Polygon or MultiPolygon geometries
+        values: Burn value per geometry
+        out: Array to burn into
+        transform: Affine transform of ``out``
+    """
+    if njit is None:
+        rasterize(zip(geoms, values), out=out, transform=transform)
+        return
+
+    # Ring vertices in pixel space, with the geometry each belongs to
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, ring_idx = shapely.get_coordinates(rings, return_index=True)
+    if len(coords) < 2:
+        return
+    px, py = ~transform * (coords[:, 0], coords[:, 1])
+
+    # Consecutive vertices of a (closed) ring form an edge; edges stay
+    # grouped by geometry in input order
+    same_ring = ring_idx[1:] == ring_idx[:-1]
+    edge_geom = part_geom[ring_part[ring_idx[:-1][same_ring]]]
+    x0, y0 = px[:-1][same_ring], py[:-1][same_ring]
+    x1, y1 = px[1:][same_ring], py[1:][same_ring]
+    edges_per_geom = np.bincount(edge_geom, minlength=len(geoms))
+    edge_start = np.concatenate(([0], np.cumsum(edges_per_geom)))
+
+    # Rows whose centres each geometry can reach, clipped to the output
+    height = out.shape[0]
+    ymin = np.full(len(geoms), np.inf)
+    ymax = np.full(len(geoms), -np.inf)
+    np.minimum.at(ymin, edge_geom, np.minimum(y0, y1))
+    np.maximum.at(ymax, edge_geom, np.maximum(y0, y1))
+    has_edges = edges_per_geom > 0
+    row0 = np.zeros(len(geoms), dtype=np.int64)
+    row1 = np.zeros(len(geoms), dtype=np.int64)
+    row0[has_edges] = np.clip(np.floor(ymin[has_edges]), 0, height)
+    row1[has_edges] = np.clip(np.ceil(ymax[has_edges]), 0, height)
+    n_rows = np.maximum(row1 - row0, 0)
+
+    # Geometries touching each row, in input order (stable sort by row)
+    row_geoms = np.repeat(np.arange(len(geoms)), n_rows)
+    rows = np.repeat(row0, n_rows) + (
+        np.arange(len(row_geoms)) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    )
+    order = np.argsort(rows, kind="stable")
+    row_geoms = row_geoms[order]
+    row_start = np.concatenate(
+        ([0], np.cumsum(np.bincount(rows, minlength=height)))
+    )
+
+    _scanline_fill_kernel(
+        x0,
+        y0,
+        x1,
+        y1,
+        edge_start,
+        np.asarray(values, dtype=out.dtype),
+        row_start,
+        row_geoms,
+        int(edges_per_geom.max()),
+        out,
+    )
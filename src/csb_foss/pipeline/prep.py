@@ -8,12 +8,17 @@ Replaces CSB-Run/CSB-Run/CSB-prep.py
 from pathlib import Path
 from typing import Optional
 
+import duckdb
 import geopandas as gpd
+import numpy as np
+import pandas as pd
 from rasterstats import zonal_stats
 
 from ..config import CSBConfig
 from ..db.duckdb_ops import (
     create_csb_database,
+    largest_overlap_matches,
+    load_geopandas,
     spatial_join_largest_overlap,
     calculate_csb_fields,
 )
@@ -29,11 +34,11 @@ def prep_csb(
 
     Args:
         config: CSB configuration
-        input_path: Path to input GeoPackage (from create stage)
+        input_path: Path to input GeoParquet or GeoPackage (from create stage)
         progress: Show progress information
 
     Returns:
-        Path to output GeoPackage
+        Path to output GeoParquet
     """
     config.ensure_directories()
 
@@ -45,7 +50,7 @@ def prep_csb(
 
     # Find input if not specified
     if input_path is None:
-        input_path = config.output.create_dir / f"csb_{start_year}_{end_year}.gpkg"
+        input_path = config.output.create_dir / f"csb_{start_year}_{end_year}.parquet"
 
     if not input_path.exists():
         raise FileNotFoundError(f"Input not found: {input_path}")
@@ -54,7 +59,10 @@ def prep_csb(
     if progress:
         print("\n1. Loading CSB polygons...")
 
-    gdf = gpd.read_file(input_path)
+    if input_path.suffix == ".parquet":
+        gdf = gpd.read_parquet(input_path)
+    else:
+        gdf = gpd.read_file(input_path)
 
     if progress:
         print(f"   Loaded {len(gdf)} polygons")
@@ -64,7 +72,9 @@ def prep_csb(
         if progress:
             print("\n2. Joining with admin boundaries...")
 
-        gdf = spatial_join_admin(gdf, config.data.admin_boundaries, progress)
+        gdf = spatial_join_admin(
+            gdf, config.data.admin_boundaries, progress, threads=config.params.n_jobs
+        )
     else:
         if progress:
             print("\n2. Skipping admin join (no boundaries configured)")
@@ -81,9 +91,9 @@ def prep_csb(
 
     gdf = calculate_derived_fields(gdf, start_year, end_year)
 
-    # Save output
-    output_path = config.output.prep_dir / f"csb_{start_year}_{end_year}_prep.gpkg"
-    gdf.to_file(output_path, driver="GPKG")
+    # Save output (GeoParquet: columnar handoff to the distribute stage)
+    output_path = config.output.prep_dir / f"csb_{start_year}_{end_year}_prep.parquet"
+    gdf.to_parquet(output_path)
 
     if progress:
         print(f"\nPrep stage complete: {len(gdf)} polygons")
@@ -96,6 +106,7 @@ def spatial_join_admin(
     gdf: gpd.GeoDataFrame,
     admin_path: Path,
     progress: bool = True,
+    threads: Optional[int] = None,
 ) -> gpd.GeoDataFrame:
     """
     Join CSB polygons with administrative boundaries.
@@ -107,21 +118,68 @@ def spatial_join_admin(
         gdf: CSB polygons
         admin_path: Path to admin boundaries
         progress: Show progress
+        threads: DuckDB worker threads (None for DuckDB's default)
 
     Returns:
         GeoDataFrame with admin attributes added
     """
+
     admin_gdf = gpd.read_file(admin_path)
 
     # Ensure same CRS
     if gdf.crs != admin_gdf.crs:
         admin_gdf = admin_gdf.to_crs(gdf.crs)
 
-    # Perform spatial join
-    joined = gpd.sjoin(gdf, admin_gdf, how="left", predicate="intersects")
-
-    # For polygons that intersect multiple admin units, keep largest overlap
-    # (simplified: sjoin already picks first match)
+    # Largest-overlap matching runs in DuckDB (parallel, spatially
+    # indexed); only the matched row numbers come back. Without the
+    # spatial extension (e.g. offline), match with vectorized shapely.
+    try:
+        con = create_csb_database(threads=threads)
+    except duckdb.Error:
+        con = None
+
+    if con is None:
+        admin_index = _largest_overlap_index(
+            gdf.geometry.values, admin_gdf.geometry.values
+        )
+    else:
+        try:
+            load_geopandas(
+                con,
+                gpd.GeoDataFrame(
+                    {"csb_row": np.arange(len(gdf))}, geometry=gdf.geometry.values
+                ),
+                "csb_geoms",
+            )
+            load_geopandas(
+                con,
+                gpd.GeoDataFrame(
+                    {"admin_row": np.arange(len(admin_gdf))},
+                    geometry=admin_gdf.geometry.values,
+                ),
+                "admin_geoms",
+            )
+            matches = largest_overlap_matches(
+                con, "csb_geoms", "admin_geoms", "csb_row", "admin_row"
+            )
+        finally:
+            con.close()
+
+        admin_index = np.full(len(gdf), -1, dtype=np.int64)
+        admin_index[matches["csb_row"]] = matches["admin_row"]
+
+    # Attach admin attributes; polygons without a match (-1) get nulls
+    admin_attrs = pd.DataFrame(
+        admin_gdf.drop(columns=admin_gdf.geometry.name)
+    ).reset_index(drop=True)
+    admin_attrs = admin_attrs.reindex(admin_index)
+    admin_attrs.index = gdf.index
+
+    # Same column suffixing as gpd.sjoin on name clashes
+    overlap = set(gdf.columns) & set(admin_attrs.columns)
+    joined = gdf.rename(columns={c: f"{c}_left" for c in overlap})
+    admin_attrs = admin_attrs.rename(columns={c: f"{c}_right" for c in overlap})
+    joined = pd.concat([joined, admin_attrs], axis=1)
 
     # Expected admin columns
     admin_cols = ["STATE_FIPS", "STATEFP", "COUNTYFP", "COUNTY", "ASD"]
@@ -138,13 +196,47 @@ def spatial_join_admin(
             elif col == "ASD":
                 joined = joined.rename(columns={col: "asd"})
 
-    # Drop join index column
-    if "index_right" in joined.columns:
-        joined = joined.drop(columns=["index_right"])
-
     return joined
 
 
+def _largest_overlap_index(geoms, admin_geoms) -> np.ndarray:
+    """
+    Position of the admin geometry each polygon overlaps most.
+
+    Candidate pairs come from one bulk STRtree query; intersection areas
+    are computed in a single vectorized call, only for polygons with more
+    than one candidate.
+
+    Args:
+        geoms: Polygon geometry array
+        admin_geoms: Admin boundary geometry array
+
+    Returns:
+        int64 array with one admin position per polygon (-1 for no match)
+    """
+    import shapely
+
+    tree = shapely.STRtree(admin_geoms)
+    poly, admin = tree.query(geoms, predicate="intersects")
+
+    overlap = np.zeros(len(poly))
+    n_candidates = np.bincount(poly, minlength=len(geoms))
+    multi = n_candidates[poly] > 1
+    overlap[multi] = shapely.area(
+        shapely.intersection(geoms[poly[multi]], admin_geoms[admin[multi]])
+    )
+
+    # Largest overlap first within each polygon; first row per polygon wins
+    order = np.lexsort((admin, -overlap, poly))
+    poly, admin = poly[order], admin[order]
+    first = np.ones(len(poly), dtype=bool)
+    first[1:] = poly[1:] != poly[:-1]
+
+    admin_index = np.full(len(geoms), -1, dtype=np.int64)
+    admin_index[poly[first]] = admin[first]
+    return admin_index
+
+
 def calculate_crop_majority(
     gdf: gpd.GeoDataFrame,
     config: CSBConfig,
@@ -163,7 +255,7 @@ def calculate_crop_majority(
     Returns:
         GeoDataFrame with cdl_YYYY columns
     """
-    from ..raster.io import get_cdl_paths_for_years
+    from ..raster.io import build_stack_vrt, get_cdl_paths_for_years
     from tqdm import tqdm
 
     cdl_paths = get_cdl_paths_for_years(
@@ -173,29 +265,254 @@ def calculate_crop_majority(
     )
 
     years = sorted(cdl_paths.keys())
-    iterator = tqdm(years, desc="Zonal stats") if progress else years
 
-    for year in iterator:
-        cdl_path = cdl_paths[year]
-        col_name = f"cdl_{year}"
+    # Skip years whose column already exists and is populated
+    todo = [
+        year for year in years
+        if not (f"cdl_{year}" in gdf.columns and gdf[f"cdl_{year}"].notna().all())
+    ]
+    if not todo:
+        return gdf
+
+    todo_paths = {year: cdl_paths[year] for year in todo}
+    if _same_integer_grid(list(todo_paths.values())) and not _has_overlaps(gdf):
+        # Rasterize polygons once per window and count every year against
+        # it, reading all years through one multi-band VRT
+        stack_path = build_stack_vrt(
+            todo_paths, config.output.prep_dir / "cdl_stack.vrt"
+        )
+        majority = _zonal_majority_stack(
+            gdf, stack_path, n_jobs=config.params.n_jobs, progress=progress
+        )
+        for i, year in enumerate(todo):
+            gdf[f"cdl_{year}"] = majority[:, i]
+        return gdf
 
-        # Skip if column already exists and populated
-        if col_name in gdf.columns and gdf[col_name].notna().all():
-            continue
+    iterator = tqdm(todo, desc="Zonal stats") if progress else todo
 
+    for year in iterator:
         # Calculate zonal stats
         stats = zonal_stats(
             gdf,
-            str(cdl_path),
+            str(cdl_paths[year]),
             stats=["majority"],
             geojson_out=False,
         )
 
-        gdf[col_name] = [s["majority"] for s in stats]
+        gdf[f"cdl_{year}"] = [s["majority"] for s in stats]
 
     return gdf
 
 
+def _has_overlaps(gdf: gpd.GeoDataFrame) -> bool:
+    """
+    Check whether any two polygons share interior area.
+
+    Args:
+        gdf: Polygons
+
+    Returns:
+        True if some pair of geometries has intersecting interiors
+    """
+    import shapely
+
+    left, right = gdf.sindex.query(gdf.geometry.values, predicate="intersects")
+    pairs = left < right
+    geoms = gdf.geometry.values
+    return bool(
+        shapely.relate_pattern(
+            geoms[left[pairs]], geoms[right[pairs]], "T********"
+        ).any()
+    )
+
+
+def _same_integer_grid(raster_paths: list[Path]) -> bool:
+    """
+    Check that rasters share one integer dtype and grid (CRS, transform, shape).
+
+    The dtype must be at most 32 bits, so (polygon, value) keys fit in int64.
+
+    Args:
+        raster_paths: Raster paths
+
+    Returns:
+        True if all rasters can be read with the same windows
+    """
+    import rasterio
+
+    grids = set()
+    for path in raster_paths:
+        with rasterio.open(path) as src:
+            dtype = np.dtype(src.dtypes[0])
+            if not np.issubdtype(dtype, np.integer) or dtype.itemsize > 4:
+                return False
+            grids.add(
+                (src.crs, src.transform, src.width, src.height, src.dtypes[0])
+            )
+    return len(grids) == 1
+
+
+def _zonal_majority_stack(
+    gdf: gpd.GeoDataFrame,
+    stack_path: Path,
+    window_size: int = 4096,
+    n_jobs: int = 1,
+    progress: bool = True,
+) -> np.ndarray:
+    """
+    Majority raster value per polygon for each band of a raster stack.
+
+    Same semantics as rasterstats' majority: pixel-centre inclusion,
+    raster nodata excluded, ties go to the smallest value, NaN where a
+    polygon covers no pixel. The raster grid is walked in windows; each
+    window's polygons are rasterized once and reused for every band.
+    Polygons must not overlap, since each pixel is assigned to one zone.
+
+    Args:
+        gdf: Polygons, in the rasters' CRS
+        stack_path: Integer raster with one band per layer (e.g. a year VRT)
+        window_size: Window size in pixels
+        n_jobs: Number of threads processing windows (-1 for all cores)
+        progress: Show progress
+
+    Returns:
+        float64 array of shape (n_polygons, n_bands)
+    """
+    import rasterio
+    from joblib import Parallel, delayed
+    from rasterio.windows import Window, from_bounds
+    from tqdm import tqdm
+
+    with rasterio.open(stack_path) as ref:
+        n_bands = ref.count
+        transform = ref.transform
+        full = Window(0, 0, ref.width, ref.height)
+        # Keys hold value - min, so signed dtypes decode with divmod too
+        info = np.iinfo(ref.dtypes[0])
+        value_min = int(info.min)
+        n_values = int(info.max) - value_min + 1
+
+    n_polys = len(gdf)
+    result = np.full((n_polys, n_bands), np.nan)
+    if n_polys == 0:
+        return result
+
+    bounds = from_bounds(*gdf.total_bounds, transform=transform)
+    col0, row0 = int(np.floor(bounds.col_off)), int(np.floor(bounds.row_off))
+    extent = Window(
+        col0,
+        row0,
+        int(np.ceil(bounds.col_off + bounds.width)) - col0,
+        int(np.ceil(bounds.row_off + bounds.height)) - row0,
+    ).intersection(full)
+
+    windows = [
+        Window(col, row, window_size, window_size).intersection(extent)
+        for row in range(extent.row_off, extent.row_off + extent.height, window_size)
+        for col in range(extent.col_off, extent.col_off + extent.width, window_size)
+    ]
+
+    # Windows are independent; rasterio reads and GDAL rasterization
+    # release the GIL, so threads scale without copying the polygons
+    gdf.sindex
+    results = Parallel(n_jobs=n_jobs, prefer="threads", return_as="generator")(
+        delayed(_window_zone_counts)(
+            gdf, stack_path, win, transform, n_values, value_min
+        )
+        for win in windows
+    )
+    if progress:
+        results = tqdm(results, total=len(windows), desc="Zonal stats")
+
+    # Per band, (polygon * n_values + value - value_min, count) pairs
+    # from each window
+    keys = [[] for _ in range(n_bands)]
+    counts = [[] for _ in range(n_bands)]
+    for window_counts in results:
+        for i, (k, c) in enumerate(window_counts):
+            keys[i].append(k)
+            counts[i].append(c)
+
+    for i in range(n_bands):
+        if not keys[i]:
+            continue
+        # Merge counts for polygons spanning several windows
+        k, inverse = np.unique(np.concatenate(keys[i]), return_inverse=True)
+        c = np.bincount(inverse, weights=np.concatenate(counts[i]))
+        poly, value = np.divmod(k, n_values)
+        value += value_min
+
+        # Highest count first, smallest value on ties; first row per polygon
+        order = np.lexsort((value, -c, poly))
+        poly, value = poly[order], value[order]
+        first = np.ones(len(poly), dtype=bool)
+        first[1:] = poly[1:] != poly[:-1]
+        result[poly[first], i] = value[first]
+
+    return result
+
+
+def _window_zone_counts(
+    gdf: gpd.GeoDataFrame,
+    stack_path: Path,
+    win,
+    transform,
+    n_values: int,
+    value_min: int = 0,
+) -> list:
+    """
+    Count (polygon, value) pairs for every band within one window.
+
+    Args:
+        gdf: Polygons with a built spatial index
+        stack_path: Multi-band integer raster
+        win: Window on the shared grid
+        transform: Affine transform of the shared grid
+        n_values: Number of possible raster values (key multiplier)
+        value_min: Smallest possible raster value (key offset)
+
+    Returns:
+        List with one (keys, counts) pair of arrays per band
+    """
+    import rasterio
+    from rasterio.features import rasterize
+    from rasterio.windows import bounds as window_bounds
+    from rasterio.windows import transform as window_transform
+    from shapely.geometry import box
+
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    with rasterio.open(stack_path) as src:
+        n_bands = src.count
+        hits = gdf.sindex.query(box(*window_bounds(win, transform)))
+        if len(hits) == 0:
+            return [empty] * n_bands
+
+        zones = rasterize(
+            zip(gdf.geometry.values[hits], hits + 1),
+            out_shape=(int(win.height), int(win.width)),
+            transform=window_transform(win, transform),
+            fill=0,
+            dtype=np.int32,
+        )
+        in_zone = zones > 0
+        if not in_zone.any():
+            return [empty] * n_bands
+        zone_ids = zones[in_zone].astype(np.int64) - 1
+
+        stack = src.read(window=win)
+        nodatavals = src.nodatavals
+
+    window_counts = []
+    for band, nodata in zip(stack, nodatavals):
+        values = band[in_zone]
+        valid = values != nodata if nodata is not None else slice(None)
+        key = zone_ids[valid] * n_values + (values[valid].astype(np.int64) - value_min)
+        window_counts.append(np.unique(key, return_counts=True))
+
+    return window_counts
+
+
 def calculate_derived_fields(
     gdf: gpd.GeoDataFrame,
     start_year: int,
@@ -216,15 +533,21 @@ def calculate_derived_fields(
     years_str = f"{start_year % 100:02d}{end_year % 100:02d}"
     gdf["csb_years"] = years_str
 
+    import shapely
+
+    # Each geometry pass runs once over the raw geometry array
+    geoms = gdf.geometry.values
+    areas = shapely.area(geoms)
+
     # Area in acres
-    gdf["csb_acres"] = gdf.geometry.area / 4046.86
+    gdf["csb_acres"] = areas / 4046.86
 
     # Centroid coordinates
-    centroids = gdf.geometry.centroid
-    gdf["inside_x"] = centroids.x
-    gdf["inside_y"] = centroids.y
+    centroids = shapely.centroid(geoms)
+    gdf["inside_x"] = shapely.get_x(centroids)
+    gdf["inside_y"] = shapely.get_y(centroids)
 
     # Shape area in sq meters
-    gdf["shape_area"] = gdf.geometry.area
+    gdf["shape_area"] = areas
 
     return gdf
@@ -7,19 +7,21 @@ memory constraints when processing full state extents.
 
 from pathlib import Path
 from typing import Optional, Tuple
-import json
 
 import geopandas as gpd
 import numpy as np
+import pandas as pd
 import rasterio
-from rasterio.windows import Window, from_bounds
+import shapely
+from rasterio.windows import Window
 from shapely.geometry import box
 from shapely.ops import unary_union
+from joblib import Parallel, delayed
 from tqdm import tqdm
 
 from ..config import CSBConfig
 from ..raster.io import get_cdl_paths_for_years, read_multi_year_stack, get_raster_profile
-from ..raster.combine import encode_year_sequence, calculate_crop_counts
+from ..raster.combine import encode_year_sequence, write_lookup_table
 from ..vector.vectorize import vectorize_raster, filter_by_crop_presence, enrich_from_lookup
 from ..vector.eliminate_fast import tiered_eliminate_fast
 from ..vector.simplify import simplify_polygons
@@ -45,39 +47,55 @@ def generate_state_tiles(
     """
     minx, miny, maxx, maxy = state_bounds
 
-    tiles = []
-    tile_idx = 0
-
     step = tile_size_m - overlap_m
-
-    y = miny
-    row = 0
-    while y < maxy:
-        x = minx
-        col = 0
-        while x < maxx:
-            tile = {
-                "idx": tile_idx,
-                "row": row,
-                "col": col,
-                "bounds": (
-                    x,
-                    y,
-                    min(x + tile_size_m, maxx),
-                    min(y + tile_size_m, maxy),
-                ),
-                "crs": crs,
-            }
-            tiles.append(tile)
-            tile_idx += 1
-            x += step
-            col += 1
-        y += step
-        row += 1
+    xs = np.arange(minx, maxx, step)
+    ys = np.arange(miny, maxy, step)
+
+    # Row-major grid of tile origins, clipped to the state extent
+    yy, xx = np.meshgrid(ys, xs, indexing="ij")
+    bounds = np.column_stack([
+        xx.ravel(),
+        yy.ravel(),
+        np.minimum(xx + tile_size_m, maxx).ravel(),
+        np.minimum(yy + tile_size_m, maxy).ravel(),
+    ])
+    rows, cols = np.divmod(np.arange(len(bounds)), len(xs))
+
+    tiles = [
+        {
+            "idx": idx,
+            "row": row,
+            "col": col,
+            "bounds": tuple(tile_bounds),
+            "crs": crs,
+        }
+        for idx, (row, col, tile_bounds) in enumerate(
+            zip(rows.tolist(), cols.tolist(), bounds.tolist())
+        )
+    ]
 
     return tiles
 
 
+def filter_tiles_to_geometry(tiles: list[dict], geometry) -> list[dict]:
+    """
+    Keep only the tiles that intersect a geometry (e.g. a state outline).
+
+    Args:
+        tiles: Tile dictionaries from generate_state_tiles
+        geometry: Shapely geometry in the tiles' CRS
+
+    Returns:
+        Intersecting tiles, in their original order
+    """
+    if not tiles:
+        return tiles
+
+    boxes = shapely.box(*np.array([tile["bounds"] for tile in tiles]).T)
+    keep = shapely.STRtree(boxes).query(geometry, predicate="intersects")
+    return [tiles[i] for i in np.sort(keep)]
+
+
 def get_tennessee_bounds(crs: str = "EPSG:5070") -> Tuple[float, float, float, float]:
     """
     Get Tennessee state bounds in specified CRS.
@@ -100,6 +118,65 @@ def get_tennessee_bounds(crs: str = "EPSG:5070") -> Tuple[float, float, float, f
     return tn_wgs84
 
 
+# Per-process cache of open CDL datasets, keyed by path. Worker processes
+# run their tiles one at a time, so each handle is only used by one thread.
+_open_datasets: dict[Path, rasterio.io.DatasetReader] = {}
+
+
+def _open_cdl_datasets(cdl_paths: dict[int, Path]) -> dict:
+    """
+    Open CDL rasters once per process and reuse the handles across tiles.
+
+    Args:
+        cdl_paths: Dictionary of year -> CDL path
+
+    Returns:
+        Dictionary of year -> open dataset
+    """
+    datasets = {}
+    for year, path in cdl_paths.items():
+        src = _open_datasets.get(path)
+        if src is None or src.closed:
+            src = _open_datasets[path] = rasterio.open(path)
+        datasets[year] = src
+    return datasets
+
+
+def _close_cdl_datasets() -> None:
+    """Close the datasets cached by _open_cdl_datasets in this process."""
+    for src in _open_datasets.values():
+        src.close()
+    _open_datasets.clear()
+
+
+def _tile_windows(bounds: np.ndarray, transform) -> np.ndarray:
+    """
+    Pixel windows for many tile bounds in one pass.
+
+    Matches ``rasterio.windows.from_bounds`` followed by truncating each
+    field to an integer, using the inverse transform once for all tiles.
+
+    Args:
+        bounds: Array of shape (n_tiles, 4) with (minx, miny, maxx, maxy)
+        transform: Affine transform of the raster grid
+
+    Returns:
+        int64 array of shape (n_tiles, 4) with (col_off, row_off, width, height)
+    """
+    left, bottom, right, top = np.asarray(bounds, dtype=np.float64).T
+    xs = np.stack([left, right, right, left])
+    ys = np.stack([top, top, bottom, bottom])
+
+    inverse = ~transform
+    cols = inverse.a * xs + inverse.b * ys + inverse.c
+    rows = inverse.d * xs + inverse.e * ys + inverse.f
+
+    col_start, row_start = cols.min(axis=0), rows.min(axis=0)
+    width = np.maximum(cols.max(axis=0) - col_start, 0.0)
+    height = np.maximum(rows.max(axis=0) - row_start, 0.0)
+    return np.trunc(np.column_stack([col_start, row_start, width, height])).astype(np.int64)
+
+
 def process_tile(
     tile: dict,
     cdl_paths: dict[int, Path],
@@ -118,89 +195,75 @@ def process_tile(
         progress: Show progress
 
     Returns:
-        Path to output GeoPackage, or None if tile has no data
+        Path to output GeoParquet, or None if tile has no data
     """
     tile_idx = tile["idx"]
     bounds = tile["bounds"]
 
-    # Get first CDL for reference
-    first_path = cdl_paths[min(cdl_paths.keys())]
+    # Handles stay open across tiles handled by this process; the first
+    # year also provides the reference grid
+    datasets = _open_cdl_datasets(cdl_paths)
+    src = datasets[min(cdl_paths.keys())]
 
-    with rasterio.open(first_path) as src:
-        # Get window for this tile
-        window = from_bounds(*bounds, transform=src.transform)
+    # Get window for this tile (precomputed by create_csb_tiled)
+    window = tile.get("window")
+    if window is None:
+        window = Window(*_tile_windows(np.array([bounds]), src.transform)[0])
 
-        # Round to integer pixels
-        window = Window(
-            col_off=int(window.col_off),
-            row_off=int(window.row_off),
-            width=int(window.width),
-            height=int(window.height),
-        )
+    if window.width <= 0 or window.height <= 0:
+        return None
 
-        if window.width <= 0 or window.height <= 0:
-            return None
+    # Tiles entirely off the raster have nothing to read
+    if (
+        window.col_off >= src.width
+        or window.row_off >= src.height
+        or window.col_off + window.width <= 0
+        or window.row_off + window.height <= 0
+    ):
+        return None
 
-        ref_transform = src.window_transform(window)
-        ref_crs = src.crs
+    ref_transform = src.window_transform(window)
+    ref_crs = src.crs
 
     if progress:
         print(f"  Tile {tile_idx}: {window.width}x{window.height} pixels")
 
     # Step 1: Read and combine CDL stack
     try:
-        stack, years, _ = read_multi_year_stack(cdl_paths, window=window)
+        stack, years, _ = read_multi_year_stack(
+            cdl_paths, window=window, datasets=datasets
+        )
     except Exception as e:
         if progress:
             print(f"  Tile {tile_idx}: Error reading - {e}")
         return None
 
     # Check if tile has any data
-    if stack.max() == 0:
+    if not stack.any():
         if progress:
             print(f"  Tile {tile_idx}: No data, skipping")
         return None
 
     # Encode sequences
     coded, lookup = encode_year_sequence(stack)
-    counts = calculate_crop_counts(lookup, len(years))
 
-    # Write temporary combined raster
+    # Lookup for attribute enrichment; the coded raster stays in memory
     tile_dir = output_dir / f"tile_{tile_idx:04d}"
     tile_dir.mkdir(parents=True, exist_ok=True)
 
-    combined_path = tile_dir / "combined.tif"
     lookup_path = tile_dir / "lookup.json"
 
-    profile = {
-        "driver": "GTiff",
-        "dtype": rasterio.uint32,
-        "width": coded.shape[1],
-        "height": coded.shape[0],
-        "count": 1,
-        "crs": ref_crs,
-        "transform": ref_transform,
-        "compress": "lzw",
-    }
-
-    with rasterio.open(combined_path, "w", **profile) as dst:
-        dst.write(coded, 1)
-
     # Save lookup
-    json_lookup = {
-        str(k): {
-            "values": list(v),
-            "years": years,
-            "count0": counts[k][0],
-            "count45": counts[k][1],
-        }
-        for k, v in lookup.items()
-    }
-    with open(lookup_path, "w") as f:
-        json.dump(json_lookup, f)
+    write_lookup_table(lookup_path, lookup, years)
 
     # Step 2: Vectorize
-    gdf = vectorize_raster(combined_path, lookup_path=lookup_path, progress=False)
+    gdf = vectorize_raster(
+        array=coded,
+        transform=ref_transform,
+        crs=ref_crs,
+        lookup_path=lookup_path,
+        progress=False,
+    )
 
     if len(gdf) == 0:
         return None
@@ -215,11 +278,10 @@ def process_tile(
     if len(gdf) == 0:
         return None
 
-    # Step 4: Eliminate (use fast parallel version)
+    # Step 4: Eliminate (use fast vectorized version)
     gdf = tiered_eliminate_fast(
         gdf,
         thresholds=[100.0, 1000.0, 5000.0],
-        n_jobs=-1,
         progress=False,
     )
 
@@ -231,34 +293,64 @@ def process_tile(
     )
 
     # Save tile output
-    output_path = tile_dir / "csb.gpkg"
-    gdf.to_file(output_path, driver="GPKG")
+    output_path = tile_dir / "csb.parquet"
+    gdf.to_parquet(output_path)
 
     # Clean up temporary files
-    combined_path.unlink()
     lookup_path.unlink()
 
     return output_path
 
 
+def _process_tile_safe(
+    tile: dict,
+    cdl_paths: dict[int, Path],
+    output_dir: Path,
+    config: CSBConfig,
+) -> tuple[Optional[Path], Optional[str]]:
+    """
+    Run process_tile in a worker, returning failures instead of raising.
+
+    Args:
+        tile: Tile specification dictionary
+        cdl_paths: Dictionary of year -> CDL path
+        output_dir: Output directory for tile results
+        config: CSB configuration
+
+    Returns:
+        Tuple of (output path or None, error message or None)
+    """
+    try:
+        return process_tile(tile, cdl_paths, output_dir, config, False), None
+    except Exception as e:
+        return None, str(e)
+
+
 def merge_tile_outputs(
     tile_outputs: list[Path],
     output_path: Path,
     overlap_buffer: float = 500.0,
     progress: bool = True,
+    tile_bounds: Optional[list[Tuple[float, float, float, float]]] = None,
 ) -> gpd.GeoDataFrame:
     """
     Merge tile outputs into a single GeoDataFrame.
 
     Handles overlapping polygons at tile boundaries by:
-    1. Dissolving identical polygons
-    2. Keeping the polygon with larger area for overlaps
+    1. Dropping exact duplicates
+    2. Dissolving polygons with the same crop sequence that overlap each other
+
+    Gridcodes are assigned per tile, so polygons are matched on their
+    cdl_<year> values rather than on gridcode.
 
     Args:
-        tile_outputs: List of tile output GeoPackage paths
+        tile_outputs: List of tile output GeoParquet paths
         output_path: Output path for merged result
         overlap_buffer: Buffer for overlap detection in CRS units
         progress: Show progress
+        tile_bounds: Bounds of the processed tiles. When given, only polygons
+            within overlap_buffer of a tile overlap zone are checked for
+            overlaps; otherwise every polygon is a candidate.
 
     Returns:
         Merged GeoDataFrame
@@ -266,34 +358,53 @@ def merge_tile_outputs(
     if progress:
         print(f"Merging {len(tile_outputs)} tile outputs...")
 
-    # Load all tiles
-    gdfs = []
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Load all tiles as Arrow tables; concatenating in Arrow avoids
+    # pd.concat over object-dtype geometry columns
+    tables = []
     iterator = tqdm(tile_outputs, desc="Loading tiles") if progress else tile_outputs
 
     for tile_path in iterator:
         if tile_path is not None and tile_path.exists():
-            gdf = gpd.read_file(tile_path)
-            gdfs.append(gdf)
+            tables.append(pq.read_table(tile_path))
 
-    if not gdfs:
+    if not tables:
         raise ValueError("No valid tile outputs to merge")
 
     # Concatenate all
-    merged = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True))
+    merged = gpd.GeoDataFrame.from_arrow(
+        pa.concat_tables(tables, promote_options="permissive")
+    )
+    # Keep geometry as the last column, as it was when tiles were GeoPackages
+    geom_col = merged.geometry.name
+    merged = merged[[c for c in merged.columns if c != geom_col] + [geom_col]]
 
     if progress:
         print(f"  Total polygons before dedup: {len(merged)}")
 
-    # Remove exact duplicates (same gridcode and overlapping significantly)
-    merged = merged.drop_duplicates(subset=["gridcode", "geometry"])
+    # Duplicates and overlaps can only come from the guard band where tiles
+    # overlap; polygons elsewhere are passed through untouched
+    edge = _guard_band_index(merged.geometry.values, tile_bounds, overlap_buffer)
+
+    # Remove exact duplicates (same crop sequence and identical geometry).
+    # Keying on the WKB bytes from a single vectorized to_wkb call avoids
+    # hashing each shapely geometry object from Python.
+    duplicated = pd.DataFrame({
+        "sequence": _sequence_codes(merged, edge),
+        "wkb": shapely.to_wkb(merged.geometry.values[edge]),
+    }).duplicated().to_numpy()
+    keep = np.ones(len(merged), dtype=bool)
+    keep[edge[duplicated]] = False
+    merged = merged[keep].reset_index(drop=True)
+    edge = (np.cumsum(keep) - 1)[edge[~duplicated]]
 
     # Handle overlapping polygons at tile boundaries
-    # For now, use simple approach: dissolve by gridcode
     if progress:
         print("  Resolving tile boundary overlaps...")
 
-    # Group by gridcode and dissolve touching polygons
-    dissolved = merged.dissolve(by="gridcode", aggfunc="first").reset_index()
+    dissolved = _dissolve_overlapping(merged, edge)
 
     # Re-calculate area
     dissolved["shape_area"] = dissolved.geometry.area
@@ -303,7 +414,10 @@ def merge_tile_outputs(
 
     # Save
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    dissolved.to_file(output_path, driver="GPKG")
+    if output_path.suffix == ".parquet":
+        dissolved.to_parquet(output_path)
+    else:
+        dissolved.to_file(output_path, driver="GPKG")
 
     if progress:
         print(f"  Saved to {output_path}")
@@ -311,6 +425,104 @@ def merge_tile_outputs(
     return dissolved
 
 
+def _guard_band_index(
+    geoms: np.ndarray,
+    tile_bounds: Optional[list[Tuple[float, float, float, float]]] = None,
+    overlap_buffer: float = 500.0,
+) -> np.ndarray:
+    """
+    Positions of polygons in the guard band shared by two or more tiles.
+
+    Args:
+        geoms: Merged tile polygons
+        tile_bounds: Bounds of the processed tiles; without them every
+            polygon is treated as a candidate
+        overlap_buffer: Buffer around overlap zones in CRS units
+
+    Returns:
+        Sorted array of positions into geoms
+    """
+    if tile_bounds is None or len(tile_bounds) < 2:
+        return np.arange(len(geoms))
+
+    boxes = shapely.box(*np.asarray(tile_bounds, dtype=np.float64).T)
+    t1, t2 = shapely.STRtree(boxes).query(boxes, predicate="intersects")
+    keep = t1 < t2
+    zones = shapely.buffer(
+        shapely.intersection(boxes[t1[keep]], boxes[t2[keep]]), overlap_buffer
+    )
+    _, hits = shapely.STRtree(geoms).query(zones, predicate="intersects")
+    return np.unique(hits)
+
+
+def _sequence_codes(gdf: gpd.GeoDataFrame, positions: np.ndarray) -> np.ndarray:
+    """
+    Integer code per polygon for its crop sequence, comparable across tiles.
+
+    encode_year_sequence numbers sequences per tile, so the same sequence has
+    unrelated gridcodes in neighbouring tiles. The decoded cdl_<year> columns
+    are used instead, falling back to gridcode when they are absent.
+
+    Args:
+        gdf: Merged tile polygons
+        positions: Positions of the polygons to code
+
+    Returns:
+        int64 array, equal for polygons with the same sequence
+    """
+    columns = [c for c in gdf.columns if c.startswith("cdl_")] or ["gridcode"]
+    subset = gdf[columns].iloc[positions]
+    return subset.groupby(columns, sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _dissolve_overlapping(gdf: gpd.GeoDataFrame, edge: np.ndarray) -> gpd.GeoDataFrame:
+    """
+    Dissolve overlapping polygons with the same crop sequence, leaving the
+    rest untouched.
+
+    Overlapping polygons are found with an STRtree query and grouped into
+    connected components, so GEOS only unions the small groups that actually
+    overlap instead of every polygon sharing a sequence.
+
+    Args:
+        gdf: Merged tile polygons with cdl_<year> columns and a RangeIndex
+        edge: Positions of the candidate polygons (see _guard_band_index)
+
+    Returns:
+        GeoDataFrame with overlapping groups dissolved
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    geoms = gdf.geometry.values
+
+    edge_geoms = geoms[edge]
+    left, right = shapely.STRtree(edge_geoms).query(edge_geoms, predicate="intersects")
+    sequences = _sequence_codes(gdf, edge)
+    pair = (left < right) & (sequences[left] == sequences[right])
+    left, right = left[pair], right[pair]
+    # Polygons sharing only an edge or corner are neighbours, not overlaps
+    overlapping = ~shapely.touches(edge_geoms[left], edge_geoms[right])
+    left, right = left[overlapping], right[overlapping]
+
+    if len(left) == 0:
+        return gdf
+
+    n = len(edge)
+    adjacency = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    _, component = connected_components(adjacency, directed=False)
+    grouped = np.bincount(component)[component] > 1
+
+    groups = gdf.iloc[edge[grouped]].copy()
+    groups["_component"] = component[grouped]
+    dissolved = groups.dissolve(by="_component", aggfunc="first").reset_index(drop=True)
+
+    untouched = np.ones(len(gdf), dtype=bool)
+    untouched[edge[grouped]] = False
+    result = pd.concat([gdf[untouched], dissolved[gdf.columns]], ignore_index=True)
+    return gpd.GeoDataFrame(result, geometry=gdf.geometry.name, crs=gdf.crs)
+
+
 def create_csb_tiled(
     config: CSBConfig,
     state_bounds: Optional[Tuple[float, float, float, float]] = None,
@@ -318,6 +530,7 @@ def create_csb_tiled(
     overlap_m: float = 1000.0,
     max_tiles: Optional[int] = None,
     progress: bool = True,
+    state_geometry=None,
 ) -> Path:
     """
     Create CSB using tiled processing for large extents.
@@ -329,12 +542,12 @@ def create_csb_tiled(
         overlap_m: Overlap between tiles in meters
         max_tiles: Optional limit on number of tiles to process
         progress: Show progress
+        state_geometry: Optional state outline (shapely geometry in the tile
+            CRS); tiles that miss it are dropped before any raster is read
 
     Returns:
-        Path to output GeoPackage
+        Path to output GeoParquet
     """
-    import pandas as pd
-
     config.ensure_directories()
 
     # Get state bounds
@@ -350,6 +563,12 @@ def create_csb_tiled(
     # Generate tiles
     tiles = generate_state_tiles(state_bounds, tile_size_m, overlap_m)
 
+    if state_geometry is not None:
+        n_grid = len(tiles)
+        tiles = filter_tiles_to_geometry(tiles, state_geometry)
+        if progress:
+            print(f"Tiles intersecting state: {len(tiles)}/{n_grid}")
+
     if max_tiles is not None:
         tiles = tiles[:max_tiles]
 
@@ -366,28 +585,34 @@ def create_csb_tiled(
     if progress:
         print(f"CDL years: {list(cdl_paths.keys())}")
 
+    # Pixel window of every tile on the first year's grid
+    ref_transform = get_raster_profile(cdl_paths[min(cdl_paths)])["transform"]
+    windows = _tile_windows(np.array([tile["bounds"] for tile in tiles]), ref_transform)
+    for tile, window in zip(tiles, windows.tolist()):
+        tile["window"] = Window(*window)
+
     # Process tiles
     output_dir = config.output.create_dir / "tiles"
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    # Tiles are independent: run them in worker processes
+    n_jobs = config.params.n_jobs
+    results = Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_process_tile_safe)(tile, cdl_paths, output_dir, config)
+        for tile in tiles
+    )
+
+    if progress:
+        results = tqdm(results, total=len(tiles), desc="Processing tiles")
+
     tile_outputs = []
+    for tile, (output, error) in zip(tiles, results):
+        if error is not None and progress:
+            print(f"  Tile {tile['idx']} failed: {error}")
+        tile_outputs.append(output)
 
-    iterator = tqdm(tiles, desc="Processing tiles") if progress else tiles
-
-    for tile in iterator:
-        try:
-            output = process_tile(
-                tile,
-                cdl_paths,
-                output_dir,
-                config,
-                progress=False,
-            )
-            tile_outputs.append(output)
-        except Exception as e:
-            if progress:
-                print(f"  Tile {tile['idx']} failed: {e}")
-            tile_outputs.append(None)
+    # Tiles run in this process when n_jobs == 1
+    _close_cdl_datasets()
 
     # Count successful tiles
     successful = sum(1 for o in tile_outputs if o is not None)
@@ -400,13 +625,14 @@ def create_csb_tiled(
     if not valid_outputs:
         raise ValueError("No tiles produced output")
 
-    # Import pandas for merge
-    global pd
-    import pandas as pd
+    output_path = config.output.create_dir / f"csb_{config.params.start_year}_{config.params.end_year}_tiled.parquet"
 
-    output_path = config.output.create_dir / f"csb_{config.params.start_year}_{config.params.end_year}_tiled.gpkg"
-
-    merged = merge_tile_outputs(valid_outputs, output_path, progress=progress)
+    merged = merge_tile_outputs(
+        valid_outputs,
+        output_path,
+        progress=progress,
+        tile_bounds=[tile["bounds"] for tile in tiles],
+    )
 
     if progress:
         print(f"\nTiled processing complete!")
@@ -414,7 +640,3 @@ def create_csb_tiled(
         print(f"  Total area: {merged.shape_area.sum() / 1e6:.1f} km²")
 
     return output_path
-
-
-# Make pandas available at module level
-import pandas as pd
@@ -6,18 +6,92 @@ crop sequence signatures from multi-year CDL rasters.
 """
 
 import json
+import sys
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
+import pandas as pd
 import rasterio
 from rasterio.windows import Window
 from tqdm import tqdm
 
 from .io import read_multi_year_stack, generate_windows, get_raster_profile
 
-
-def encode_year_sequence(stack: np.ndarray) -> tuple[np.ndarray, dict]:
+try:
+    import orjson
+except ImportError:  # orjson is optional (pip install csb-foss[accel])
+    orjson = None
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # numba is optional (pip install csb-foss[accel])
+    njit = None
+
+# Fibonacci hashing multiplier (2^64 / golden ratio)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# Hash table sizes (log2) tried per chunk before handing over to pandas
+_TABLE_BITS_START = 16
+_TABLE_BITS_MAX = 24
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _encode_chunks_kernel(stack, bounds, chunks, bits, codes, uniques, n_uniques):
+        """
+        Pack each pixel's years into a uint64 and factorize it, per chunk.
+
+        Every chunk owns an open-addressing table, so chunks run in
+        parallel; codes are chunk-local in first-seen order. Uniques and
+        counts are stored by position in ``chunks``. A chunk whose unique
+        count would exceed half the table reports -1.
+        """
+        n_years = stack.shape[0]
+        capacity = 1 << bits
+        limit = capacity >> 1
+        shift = np.uint64(64 - bits)
+        for j in prange(chunks.shape[0]):
+            c = chunks[j]
+            table_keys = np.empty(capacity, dtype=np.uint64)
+            table_codes = np.full(capacity, -1, dtype=np.int64)
+            n = 0
+            for i in range(bounds[c], bounds[c + 1]):
+                key = np.uint64(0)
+                for y in range(n_years):
+                    key |= np.uint64(stack[y, i]) << np.uint64(8 * y)
+                h = np.int64((key * _HASH_MULTIPLIER) >> shift)
+                while True:
+                    code = table_codes[h]
+                    if code < 0:
+                        if n < limit:
+                            table_keys[h] = key
+                            table_codes[h] = n
+                            uniques[j, n] = key
+                            code = n
+                            n += 1
+                        break
+                    if table_keys[h] == key:
+                        break
+                    h = (h + 1) & (capacity - 1)
+                if code < 0:
+                    n = -1
+                    break
+                codes[i] = code
+            n_uniques[j] = n
+
+    @njit(parallel=True, cache=True)
+    def _remap_chunks_kernel(codes, bounds, offsets, remap):
+        """Replace chunk-local codes with remap[offset of chunk + code]."""
+        for c in prange(bounds.shape[0] - 1):
+            offset = offsets[c]
+            for i in range(bounds[c], bounds[c + 1]):
+                codes[i] = remap[offset + codes[i]]
+
+
+def encode_year_sequence(stack: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """
     Encode a multi-year CDL stack into unique signature codes.
 
@@ -30,27 +104,119 @@ def encode_year_sequence(stack: np.ndarray) -> tuple[np.ndarray, dict]:
     Returns:
         Tuple of:
             - 2D array of signature codes (uint32 or uint64)
-            - Lookup dict mapping codes to tuples of year values
+            - Lookup array of shape (n_signatures, n_years); row ``code``
+              holds that signature's year values
+    """
+    inverse, unique_vals = factorize_year_sequence(stack)
+    coded = inverse.astype(np.uint32)
+
+    return coded, unpack_year_sequence(unique_vals, stack.shape[0])
+
+
+def pack_year_sequence(stack: np.ndarray) -> np.ndarray:
+    """
+    Pack a multi-year stack into one uint64 per pixel: sum(value_i * 256^i).
+
+    A uint8 stack is packed by laying each pixel's years out as the bytes
+    of a uint64 (one interleaving pass); other dtypes are shifted and
+    accumulated in place, one year at a time.
+
+    Args:
+        stack: 3D array of shape (n_years, height, width), at most 8 years
+
+    Returns:
+        2D uint64 array of packed sequences
     """
     n_years = stack.shape[0]
+    if n_years > 8:
+        raise ValueError(f"At most 8 years can be packed, got {n_years}")
 
-    # Use uint64 for encoding to handle 8+ years
-    combined = np.zeros(stack.shape[1:], dtype=np.uint64)
+    if stack.dtype == np.uint8 and sys.byteorder == "little":
+        lanes = np.zeros(stack.shape[1:] + (8,), dtype=np.uint8)
+        lanes[..., :n_years] = np.moveaxis(stack, 0, -1)
+        return lanes.view(np.uint64)[..., 0]
 
+    combined = np.zeros(stack.shape[1:], dtype=np.uint64)
+    shifted = np.empty_like(combined)
     for i in range(n_years):
-        combined += stack[i].astype(np.uint64) * (256 ** i)
+        np.copyto(shifted, stack[i], casting="unsafe")
+        shifted <<= np.uint64(8 * i)
+        combined += shifted
+    return combined
+
+
+def unpack_year_sequence(packed: np.ndarray, n_years: int) -> np.ndarray:
+    """
+    Inverse of pack_year_sequence for a 1D array of packed values.
 
-    # Find unique values and create compact encoding
-    unique_vals, inverse = np.unique(combined, return_inverse=True)
-    coded = inverse.reshape(stack.shape[1:]).astype(np.uint32)
+    Args:
+        packed: 1D uint64 array of packed sequences
+        n_years: Number of years encoded
 
-    # Build lookup table
-    lookup = {}
-    for code, val in enumerate(unique_vals):
-        year_values = decode_sequence(int(val), n_years)
-        lookup[code] = year_values
+    Returns:
+        uint8 array of shape (len(packed), n_years)
+    """
+    packed = np.ascontiguousarray(packed, dtype=np.uint64)
+    if sys.byteorder == "little":
+        return packed.view(np.uint8).reshape(-1, 8)[:, :n_years].copy()
 
-    return coded, lookup
+    shifts = np.arange(0, 8 * n_years, 8, dtype=np.uint64)
+    return ((packed[:, None] >> shifts) & np.uint64(0xFF)).astype(np.uint8)
+
+
+def factorize_year_sequence(stack: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Factorize the packed year sequence of every pixel.
+
+    Equivalent to ``pd.factorize(pack_year_sequence(stack), sort=True)``.
+    With numba, uint8 stacks are packed and hashed in one fused pass over
+    parallel chunks; the small per-chunk unique sets are then merged and
+    sorted, and chunk codes remapped to the global ones.
+
+    Args:
+        stack: 3D array of shape (n_years, height, width), at most 8 years
+
+    Returns:
+        Tuple of (2D int64 codes, sorted uint64 unique sequences)
+    """
+    n_years = stack.shape[0]
+    shape = stack.shape[1:]
+
+    if njit is None or stack.dtype != np.uint8 or n_years > 8:
+        codes, uniques = pd.factorize(pack_year_sequence(stack).ravel(), sort=True)
+        return codes.reshape(shape), uniques
+
+    flat = np.ascontiguousarray(stack).reshape(n_years, -1)
+    n_pixels = flat.shape[1]
+    n_chunks = max(1, min(numba.get_num_threads(), n_pixels))
+    bounds = np.linspace(0, n_pixels, n_chunks + 1).astype(np.int64)
+    codes = np.empty(n_pixels, dtype=np.int64)
+
+    chunk_uniques = [None] * n_chunks
+    todo = np.arange(n_chunks)
+    bits = _TABLE_BITS_START
+    while len(todo):
+        if bits > _TABLE_BITS_MAX:
+            # Too many distinct sequences for compact tables
+            codes, uniques = pd.factorize(
+                pack_year_sequence(stack).ravel(), sort=True
+            )
+            return codes.reshape(shape), uniques
+
+        # Buffers only for the chunks still to (re)hash, by position in todo
+        uniques = np.empty((len(todo), 1 << (bits - 1)), dtype=np.uint64)
+        n_uniques = np.zeros(len(todo), dtype=np.int64)
+        _encode_chunks_kernel(flat, bounds, todo, bits, codes, uniques, n_uniques)
+        for j in np.flatnonzero(n_uniques >= 0):
+            chunk_uniques[todo[j]] = uniques[j, :n_uniques[j]].copy()
+        todo = todo[n_uniques < 0]
+        bits += 2
+
+    offsets = np.cumsum([0] + [len(u) for u in chunk_uniques])
+    remap, uniques = pd.factorize(np.concatenate(chunk_uniques), sort=True)
+    _remap_chunks_kernel(codes, bounds, offsets, remap.astype(np.int64))
+
+    return codes.reshape(shape), uniques
 
 
 def decode_sequence(value: int, n_years: int) -> tuple[int, ...]:
@@ -64,14 +230,10 @@ def decode_sequence(value: int, n_years: int) -> tuple[int, ...]:
     Returns:
         Tuple of CDL values for each year
     """
-    result = []
-    for _ in range(n_years):
-        result.append(value % 256)
-        value //= 256
-    return tuple(result)
+    return tuple((value >> (8 * i)) & 0xFF for i in range(n_years))
 
 
-def calculate_crop_counts(lookup: dict, n_years: int) -> dict:
+def calculate_crop_counts(lookup, n_years: int) -> dict:
     """
     Calculate COUNT0 and COUNT45 for each signature.
 
@@ -79,18 +241,99 @@ def calculate_crop_counts(lookup: dict, n_years: int) -> dict:
     COUNT45: Number of years with barren land (CDL = 45, originally 131)
 
     Args:
-        lookup: Signature lookup table
+        lookup: Signature lookup array (see encode_year_sequence) or dict
+            mapping codes to year values
         n_years: Number of years
 
     Returns:
         Dict mapping signature code to (COUNT0, COUNT45)
     """
-    counts = {}
-    for code, values in lookup.items():
-        count0 = sum(1 for v in values if v > 0)
-        count45 = sum(1 for v in values if v == 45)
-        counts[code] = (count0, count45)
-    return counts
+    if len(lookup) == 0:
+        return {}
+
+    count0, count45 = _crop_count_arrays(_lookup_matrix(lookup))
+    return dict(zip(_lookup_codes(lookup), zip(count0.tolist(), count45.tolist())))
+
+
+def _lookup_matrix(lookup) -> np.ndarray:
+    """Lookup values as an (n_signatures, n_years) array."""
+    if isinstance(lookup, np.ndarray):
+        return lookup
+    return np.array(list(lookup.values()), dtype=np.int64).reshape(len(lookup), -1)
+
+
+def _lookup_codes(lookup) -> list[int]:
+    """Signature codes of a lookup array (row numbers) or dict (keys)."""
+    if isinstance(lookup, np.ndarray):
+        return list(range(len(lookup)))
+    return [int(k) for k in lookup.keys()]
+
+
+def _crop_count_arrays(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """COUNT0 and COUNT45 per row of an (n_signatures, n_years) array."""
+    return (
+        np.count_nonzero(values > 0, axis=1),
+        np.count_nonzero(values == 45, axis=1),
+    )
+
+
+def write_lookup_table(lookup_path: Path, lookup, years: list[int]) -> None:
+    """
+    Save a lookup table as columnar JSON.
+
+    The file holds one list per field ("codes", "values", "count0",
+    "count45") plus the "years" list, rather than one object per signature.
+
+    Args:
+        lookup_path: Output JSON path
+        lookup: Signature lookup array (see encode_year_sequence) or dict
+            mapping codes to year values
+        years: Years matching the value order
+    """
+    values = _lookup_matrix(lookup)
+    count0, count45 = _crop_count_arrays(values)
+    payload = {
+        "years": [int(y) for y in years],
+        "codes": _lookup_codes(lookup),
+        "values": values.tolist(),
+        "count0": count0.tolist(),
+        "count45": count45.tolist(),
+    }
+
+    lookup_path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        lookup_path.write_bytes(orjson.dumps(payload))
+    else:
+        lookup_path.write_text(json.dumps(payload, separators=(",", ":")))
+
+
+def read_lookup_columns(lookup_path: Path) -> dict:
+    """
+    Read a lookup table JSON into columns.
+
+    Accepts the columnar layout written by write_lookup_table as well as the
+    older one-object-per-signature layout.
+
+    Args:
+        lookup_path: Path to lookup JSON file
+
+    Returns:
+        Dict with "years", "codes", "values", "count0" and "count45" lists
+    """
+    raw = lookup_path.read_bytes()
+    payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    if "codes" in payload:
+        return payload
+
+    entries = list(payload.values())
+    return {
+        "years": entries[0].get("years", []) if entries else [],
+        "codes": [int(k) for k in payload.keys()],
+        "values": [e["values"] for e in entries],
+        "count0": [e.get("count0", 0) for e in entries],
+        "count45": [e.get("count45", 0) for e in entries],
+    }
 
 
 def combine_cdl_rasters(
@@ -99,7 +342,7 @@ def combine_cdl_rasters(
     lookup_path: Optional[Path] = None,
     window: Optional[Window] = None,
     progress: bool = True,
-) -> tuple[Path, dict]:
+) -> tuple[Path, np.ndarray]:
     """
     Combine multi-year CDL rasters into a single signature raster.
 
@@ -113,10 +356,9 @@ def combine_cdl_rasters(
         progress: Show progress bar
 
     Returns:
-        Tuple of (output path, lookup dict)
+        Tuple of (output path, lookup array)
     """
     years = sorted(paths.keys())
-    n_years = len(years)
 
     # Get profile from first raster
     first_path = paths[years[0]]
@@ -148,22 +390,7 @@ def combine_cdl_rasters(
 
     # Save lookup table
     if lookup_path is not None:
-        lookup_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Convert tuple keys to strings for JSON
-        json_lookup = {
-            str(k): {"values": list(v), "years": years}
-            for k, v in lookup.items()
-        }
-
-        # Add counts
-        counts = calculate_crop_counts(lookup, n_years)
-        for k, (c0, c45) in counts.items():
-            json_lookup[str(k)]["count0"] = c0
-            json_lookup[str(k)]["count45"] = c45
-
-        with open(lookup_path, "w") as f:
-            json.dump(json_lookup, f, indent=2)
+        write_lookup_table(lookup_path, lookup, years)
 
     return output_path, lookup
 
@@ -174,7 +401,8 @@ def combine_cdl_rasters_windowed(
     lookup_path: Path,
     tile_size: int = 4096,
     progress: bool = True,
-) -> tuple[Path, dict]:
+    stack_path: Optional[Path] = None,
+) -> tuple[Path, np.ndarray]:
     """
     Combine multi-year CDL rasters using windowed processing.
 
@@ -186,9 +414,10 @@ def combine_cdl_rasters_windowed(
         lookup_path: Path to save lookup table as JSON
         tile_size: Size of processing tiles in pixels
         progress: Show progress bar
+        stack_path: Optional VRT over the same rasters (see build_stack_vrt)
 
     Returns:
-        Tuple of (output path, lookup dict)
+        Tuple of (output path, lookup array)
     """
     years = sorted(paths.keys())
     n_years = len(years)
@@ -202,12 +431,14 @@ def combine_cdl_rasters_windowed(
         compress="lzw",
     )
 
-    # Global lookup accumulator
-    global_lookup = {}
-    next_code = 0
+    # Packed sequence of each global code, in code order
+    global_values = []
+    n_codes = 0
 
-    # Value to code mapping for consistent encoding across tiles
-    value_to_code = {}
+    # Sorted packed values seen so far and their global codes, for
+    # consistent encoding across tiles
+    known_values = np.empty(0, dtype=np.uint64)
+    known_codes = np.empty(0, dtype=np.uint32)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -218,50 +449,50 @@ def combine_cdl_rasters_windowed(
 
         for window, (row_idx, col_idx) in iterator:
             # Read stack for this window
-            stack, _, _ = read_multi_year_stack(paths, window=window)
+            stack, _, _ = read_multi_year_stack(
+                paths, window=window, stack_path=stack_path
+            )
+
+            # Factorize the window's sequences, assign global codes to unseen
+            # ones (ascending), then gather in one pass
+            local, uniques = factorize_year_sequence(stack)
 
-            # Encode without compact remapping
-            combined = np.zeros(stack.shape[1:], dtype=np.uint64)
-            for i in range(n_years):
-                combined += stack[i].astype(np.uint64) * (256 ** i)
+            pos = np.searchsorted(known_values, uniques)
+            seen = pos < len(known_values)
+            seen[seen] = known_values[pos[seen]] == uniques[seen]
 
-            # Map to global codes
-            coded = np.zeros_like(combined, dtype=np.uint32)
+            window_codes = np.empty(len(uniques), dtype=np.uint32)
+            window_codes[seen] = known_codes[pos[seen]]
 
-            for val in np.unique(combined):
-                val = int(val)
-                if val not in value_to_code:
-                    value_to_code[val] = next_code
-                    global_lookup[next_code] = decode_sequence(val, n_years)
-                    next_code += 1
+            new_values = uniques[~seen]
+            if len(new_values):
+                new_codes = np.arange(n_codes, n_codes + len(new_values), dtype=np.uint32)
+                window_codes[~seen] = new_codes
+                global_values.append(new_values)
+                n_codes += len(new_values)
 
-                mask = combined == val
-                coded[mask] = value_to_code[val]
+                # Both runs are sorted; merge them by insertion
+                at = np.searchsorted(known_values, new_values)
+                known_values = np.insert(known_values, at, new_values)
+                known_codes = np.insert(known_codes, at, new_codes)
+
+            coded = window_codes[local]
 
             # Write window
             dst.write(coded, 1, window=window)
 
-    # Save lookup
-    lookup_path.parent.mkdir(parents=True, exist_ok=True)
-
-    counts = calculate_crop_counts(global_lookup, n_years)
-    json_lookup = {
-        str(k): {
-            "values": list(v),
-            "years": years,
-            "count0": counts[k][0],
-            "count45": counts[k][1],
-        }
-        for k, v in global_lookup.items()
-    }
+    global_lookup = unpack_year_sequence(
+        np.concatenate(global_values) if global_values else np.empty(0, dtype=np.uint64),
+        n_years,
+    )
 
-    with open(lookup_path, "w") as f:
-        json.dump(json_lookup, f, indent=2)
+    # Save lookup
+    write_lookup_table(lookup_path, global_lookup, years)
 
     return output_path, global_lookup
 
 
-def load_lookup_table(lookup_path: Path) -> dict:
+def load_lookup_table(lookup_path: Path) -> np.ndarray:
     """
     Load a lookup table from JSON file.
 
@@ -269,17 +500,19 @@ def load_lookup_table(lookup_path: Path) -> dict:
         lookup_path: Path to lookup JSON file
 
     Returns:
-        Lookup dictionary with integer keys
+        uint8 array of shape (n_signatures, n_years) indexed by code
     """
-    with open(lookup_path) as f:
-        json_lookup = json.load(f)
+    columns = read_lookup_columns(lookup_path)
+    codes = np.asarray(columns["codes"], dtype=np.int64)
+    values = np.asarray(columns["values"], dtype=np.uint8).reshape(
+        len(codes), len(columns["years"])
+    )
 
-    # Convert string keys back to integers
-    lookup = {
-        int(k): tuple(v["values"])
-        for k, v in json_lookup.items()
-    }
+    if np.array_equal(codes, np.arange(len(codes))):
+        return values
 
+    lookup = np.zeros((codes.max() + 1, values.shape[1]), dtype=np.uint8)
+    lookup[codes] = values
     return lookup
 
 
@@ -293,19 +526,17 @@ def get_signature_stats(lookup_path: Path) -> dict:
     Returns:
         Dictionary with stats (n_signatures, years, count distributions)
     """
-    with open(lookup_path) as f:
-        json_lookup = json.load(f)
+    columns = read_lookup_columns(lookup_path)
 
-    n_signatures = len(json_lookup)
-    years = json_lookup["0"]["years"] if json_lookup else []
+    n_signatures = len(columns["codes"])
+    years = columns["years"]
 
     count0_dist = {}
     count45_dist = {}
 
-    for entry in json_lookup.values():
-        c0 = entry.get("count0", 0)
-        c45 = entry.get("count45", 0)
+    for c0 in columns["count0"]:
         count0_dist[c0] = count0_dist.get(c0, 0) + 1
+    for c45 in columns["count45"]:
         count45_dist[c45] = count45_dist.get(c45, 0) + 1
 
     return {
@@ -131,6 +131,10 @@ def generate_windows(
     """
     Generate windows for tiled processing of a raster.
 
+    The tile step is rounded down to a multiple of the raster's internal
+    block size along each axis where a block fits, so every window starts
+    on a block boundary and reads whole blocks instead of straddling them.
+
     Args:
         raster_path: Path to raster file
         tile_size: Size of tiles in pixels
@@ -142,15 +146,20 @@ def generate_windows(
     with rasterio.open(raster_path) as src:
         height = src.height
         width = src.width
+        block_height, block_width = src.block_shapes[0]
 
     step = tile_size - overlap
+    row_step = _align_step(step, block_height)
+    col_step = _align_step(step, block_width)
     row_idx = 0
 
-    for row_off in range(0, height, step):
+    # A window starting within overlap of the far edge would lie wholly
+    # inside the previous window's overlap strip, so none is emitted
+    for row_off in range(0, max(height - overlap, 1), row_step):
         col_idx = 0
-        for col_off in range(0, width, step):
-            win_height = min(tile_size, height - row_off)
-            win_width = min(tile_size, width - col_off)
+        for col_off in range(0, max(width - overlap, 1), col_step):
+            win_height = min(row_step + overlap, height - row_off)
+            win_width = min(col_step + overlap, width - col_off)
 
             window = Window(col_off, row_off, win_width, win_height)
             yield window, (row_idx, col_idx)
@@ -159,16 +168,120 @@ def generate_windows(
         row_idx += 1
 
 
+def _align_step(step: int, block: int) -> int:
+    """Round a window step down to a multiple of the block size, if it fits."""
+    if block >= step:
+        return step
+    return step - step % block
+
+
+def build_stack_vrt(
+    paths: dict[int, Path],
+    vrt_path: Path,
+) -> Path:
+    """
+    Write a VRT with one band per year referencing the CDL rasters.
+
+    Reading a window from the VRT returns the whole year stack through a
+    single dataset, so the sources are opened and parsed once rather than
+    per year per read.
+
+    Args:
+        paths: Dictionary mapping year to raster path
+        vrt_path: Output VRT path
+
+    Returns:
+        Path to the VRT (bands in ascending year order)
+
+    Raises:
+        ValueError: If the rasters differ in CRS, transform, shape or dtype
+    """
+    import xml.etree.ElementTree as ET
+
+    from rasterio.dtypes import _gdal_typename
+
+    years = sorted(paths.keys())
+    sources = []
+    for year in years:
+        with rasterio.open(paths[year]) as src:
+            sources.append(
+                (
+                    src.crs,
+                    src.transform,
+                    src.width,
+                    src.height,
+                    src.dtypes[0],
+                    src.nodata,
+                    src.block_shapes[0],
+                )
+            )
+
+    if len({source[:5] for source in sources}) != 1:
+        raise ValueError("CDL rasters do not share one grid and dtype")
+
+    crs, transform, width, height, dtype = sources[0][:5]
+    data_type = _gdal_typename(dtype)
+
+    root = ET.Element(
+        "VRTDataset", rasterXSize=str(width), rasterYSize=str(height)
+    )
+    if crs is not None:
+        ET.SubElement(root, "SRS").text = crs.to_wkt()
+    ET.SubElement(root, "GeoTransform").text = ", ".join(
+        repr(float(v)) for v in transform.to_gdal()
+    )
+
+    rect = {"xOff": "0", "yOff": "0", "xSize": str(width), "ySize": str(height)}
+    for band, (year, source) in enumerate(zip(years, sources), start=1):
+        nodata, (block_y, block_x) = source[5], source[6]
+        vrt_band = ET.SubElement(
+            root, "VRTRasterBand", dataType=data_type, band=str(band)
+        )
+        ET.SubElement(vrt_band, "Description").text = str(year)
+        if nodata is not None:
+            ET.SubElement(vrt_band, "NoDataValue").text = repr(nodata)
+        simple = ET.SubElement(vrt_band, "SimpleSource")
+        ET.SubElement(
+            simple, "SourceFilename", relativeToVRT="0"
+        ).text = str(Path(paths[year]).resolve())
+        ET.SubElement(simple, "SourceBand").text = "1"
+        ET.SubElement(
+            simple,
+            "SourceProperties",
+            RasterXSize=str(width),
+            RasterYSize=str(height),
+            DataType=data_type,
+            BlockXSize=str(block_x),
+            BlockYSize=str(block_y),
+        )
+        ET.SubElement(simple, "SrcRect", **rect)
+        ET.SubElement(simple, "DstRect", **rect)
+
+    vrt_path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(root).write(vrt_path, encoding="utf-8")
+
+    return vrt_path
+
+
 def read_multi_year_stack(
     paths: dict[int, Path],
     window: Optional[Window] = None,
+    stack_path: Optional[Path] = None,
+    datasets: Optional[dict] = None,
 ) -> tuple[np.ndarray, list[int], dict]:
     """
     Read multiple years of CDL into a stacked array.
 
+    Years are read concurrently (GDAL releases the GIL during I/O and
+    decompression) straight into one preallocated stack.
+
     Args:
         paths: Dictionary mapping year to raster path
         window: Optional window for subset reading
+        stack_path: Optional VRT from build_stack_vrt over the same paths;
+            when given, all years are read from it in one call
+        datasets: Optional dictionary mapping year to an already open
+            dataset, to avoid reopening rasters across calls
 
     Returns:
         Tuple of:
@@ -176,17 +289,58 @@ def read_multi_year_stack(
             - List of years in order
             - Metadata dict
     """
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import ExitStack
+
     years = sorted(paths.keys())
-    arrays = []
-    metadata = None
 
-    for year in years:
-        data, meta = read_cdl_window(paths[year], window)
-        arrays.append(data)
-        if metadata is None:
-            metadata = meta
+    if stack_path is not None:
+        with rasterio.open(stack_path) as src:
+            stack = src.read(window=window)
+            metadata = {
+                "transform": (
+                    src.window_transform(window) if window is not None
+                    else src.transform
+                ),
+                "crs": src.crs,
+                "nodata": src.nodata,
+                "width": stack.shape[2],
+                "height": stack.shape[1],
+            }
+        return stack, years, metadata
+
+    with ExitStack() as opened:
+        if datasets is None:
+            datasets = {
+                year: opened.enter_context(rasterio.open(paths[year]))
+                for year in years
+            }
+
+        # The first year fixes the window's shape and dtype
+        first = datasets[years[0]]
+        data = first.read(1, window=window)
+        stack = np.empty((len(years),) + data.shape, dtype=data.dtype)
+        stack[0] = data
+
+        metadata = {
+            "transform": (
+                first.window_transform(window) if window is not None
+                else first.transform
+            ),
+            "crs": first.crs,
+            "nodata": first.nodata,
+            "width": data.shape[1],
+            "height": data.shape[0],
+        }
+
+        # Each year has its own dataset handle, so reads can overlap
+        def read_year(i):
+            datasets[years[i]].read(1, window=window, out=stack[i])
+
+        if len(years) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(years) - 1, 8)) as pool:
+                list(pool.map(read_year, range(1, len(years))))
 
-    stack = np.stack(arrays, axis=0)
     return stack, years, metadata
 
 
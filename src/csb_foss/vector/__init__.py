@@ -1,12 +1,13 @@
 """Vector processing modules for CSB-FOSS."""
 
-from .vectorize import vectorize_raster, filter_by_crop_presence
+from .vectorize import vectorize_raster, vectorize_rasters, filter_by_crop_presence
 from .eliminate import eliminate_small_polygons, tiered_eliminate
 from .eliminate_fast import eliminate_fast, tiered_eliminate_fast
 from .simplify import simplify_polygons
 
 __all__ = [
     "vectorize_raster",
+    "vectorize_rasters",
     "filter_by_crop_presence",
     "eliminate_small_polygons",
     "tiered_eliminate",
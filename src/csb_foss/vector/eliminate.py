@@ -9,16 +9,65 @@ from typing import Optional
 
 import geopandas as gpd
 import numpy as np
-from shapely.geometry import Polygon, MultiPolygon
-from shapely.ops import unary_union
+import shapely
+from shapely.geometry import Polygon
 from tqdm import tqdm
 
+from .simplify import largest_parts
+
+
+def shared_boundary_lengths(boundaries_a, boundaries_b) -> np.ndarray:
+    """
+    Length of the intersection of paired polygon boundaries.
+
+    Runs as one vectorized GEOS call; if GEOS fails on any pair, pairs are
+    retried one at a time and failing pairs get length 0.
+
+    Args:
+        boundaries_a: Boundaries (or array of boundaries) of the first polygons
+        boundaries_b: Array of boundaries of the second polygons
+
+    Returns:
+        float64 array of shared boundary lengths
+    """
+    try:
+        return shapely.length(shapely.intersection(boundaries_a, boundaries_b))
+    except shapely.errors.GEOSException:
+        a, b = np.broadcast_arrays(
+            np.asarray(boundaries_a, dtype=object), np.asarray(boundaries_b, dtype=object)
+        )
+        lengths = np.zeros(len(b), dtype=np.float64)
+        for i, (x, y) in enumerate(zip(a, b)):
+            try:
+                lengths[i] = x.intersection(y).length
+            except shapely.errors.GEOSException:
+                pass
+        return lengths
+
+
+def bbox_overlap(bounds_a: np.ndarray, bounds_b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Width and height of the overlap of paired bounding boxes.
+
+    Args:
+        bounds_a: (..., 4) xmin, ymin, xmax, ymax of the first boxes
+        bounds_b: (..., 4) bounds of the second boxes
+
+    Returns:
+        Tuple of (width, height) arrays, 0 where the boxes do not overlap
+    """
+    lo = np.maximum(bounds_a[..., :2], bounds_b[..., :2])
+    hi = np.minimum(bounds_a[..., 2:], bounds_b[..., 2:])
+    extent = np.maximum(hi - lo, 0)
+    return extent[..., 0], extent[..., 1]
+
 
 def find_longest_shared_boundary_neighbor(
     small_geom: Polygon,
     gdf: gpd.GeoDataFrame,
     small_idx: int,
     area_threshold: float,
+    areas: Optional[np.ndarray] = None,
 ) -> Optional[int]:
     """
     Find the neighbor with the longest shared boundary.
@@ -28,43 +77,41 @@ def find_longest_shared_boundary_neighbor(
         gdf: GeoDataFrame containing all polygons
         small_idx: Index of the small polygon in gdf
         area_threshold: Only consider neighbors larger than this
+        areas: Optional precomputed areas of all polygons in gdf
 
     Returns:
         Index of best neighbor, or None if no suitable neighbor found
     """
-    # Use spatial index to find potential neighbors
-    possible_matches = list(gdf.sindex.intersection(small_geom.bounds))
-
-    # Filter to actual neighbors (excluding self and other small polygons)
-    best_neighbor = None
-    max_shared_length = 0
+    if areas is None:
+        areas = np.asarray(gdf.geometry.area.values, dtype=np.float64)
 
-    for neighbor_idx in possible_matches:
-        if neighbor_idx == small_idx:
-            continue
-
-        neighbor_geom = gdf.iloc[neighbor_idx].geometry
+    # Use spatial index to find potential neighbors
+    possible_matches = gdf.sindex.query(small_geom)
 
-        # Skip if neighbor is also small (will be processed later)
-        if neighbor_geom.area <= area_threshold:
-            continue
+    # Filter to actual neighbors (excluding self and other small polygons,
+    # which will be processed later)
+    possible_matches = possible_matches[
+        (possible_matches != small_idx) & (areas[possible_matches] > area_threshold)
+    ]
 
-        # Check if geometries actually touch
-        if not small_geom.touches(neighbor_geom) and not small_geom.intersects(neighbor_geom):
-            continue
+    neighbor_geoms = gdf.geometry.values[possible_matches]
 
-        # Calculate shared boundary length
-        try:
-            intersection = small_geom.boundary.intersection(neighbor_geom.boundary)
-            shared_length = intersection.length if intersection else 0
-        except Exception:
-            continue
+    # Keep neighbors that actually intersect (touches implies intersects);
+    # neighbors go first so a prepared neighbor uses its cached index
+    adjacent = shapely.intersects(neighbor_geoms, small_geom)
+    possible_matches = possible_matches[adjacent]
+    if len(possible_matches) == 0:
+        return None
 
-        if shared_length > max_shared_length:
-            max_shared_length = shared_length
-            best_neighbor = neighbor_idx
+    # Shared boundary length with every neighbor in one call; first longest wins
+    shared = shared_boundary_lengths(
+        small_geom.boundary, shapely.boundary(neighbor_geoms[adjacent])
+    )
+    best = int(np.argmax(shared))
+    if shared[best] <= 0:
+        return None
 
-    return best_neighbor
+    return int(possible_matches[best])
 
 
 def eliminate_small_polygons(
@@ -87,11 +134,16 @@ def eliminate_small_polygons(
     Returns:
         GeoDataFrame with small polygons eliminated
     """
-    gdf = gdf.copy().reset_index(drop=True)
+    gdf = gdf.reset_index(drop=True)
+
+    # Large polygons stay prepared across iterations; merged targets are new
+    # geometries and get prepared in the iteration after their merge
+    prepared = []
 
     for iteration in range(max_iterations):
         # Identify small polygons
-        small_mask = gdf.geometry.area <= area_threshold
+        areas = np.asarray(gdf.geometry.area.values, dtype=np.float64)
+        small_mask = areas <= area_threshold
         n_small = small_mask.sum()
 
         if n_small == 0:
@@ -102,20 +154,21 @@ def eliminate_small_polygons(
         if progress:
             print(f"  Iteration {iteration + 1}: {n_small} polygons <= {area_threshold} m²")
 
-        # Rebuild spatial index
-        gdf = gdf.reset_index(drop=True)
-
         # Build merge map: small_idx -> target_idx
         merge_map = {}
-        small_indices = gdf[small_mask].index.tolist()
+        small_indices = np.flatnonzero(small_mask).tolist()
+
+        # Large polygons are tested against many small ones; prepare them once
+        geoms = np.asarray(gdf.geometry.array)
+        prepared.append(_prepare_unprepared(geoms[~small_mask]))
 
         iterator = tqdm(small_indices, desc=f"  Finding neighbors", leave=False) if progress else small_indices
 
         for idx in iterator:
-            small_geom = gdf.loc[idx, "geometry"]
+            small_geom = geoms[idx]
 
             best_neighbor = find_longest_shared_boundary_neighbor(
-                small_geom, gdf, idx, area_threshold
+                small_geom, gdf, idx, area_threshold, areas
             )
 
             if best_neighbor is not None:
@@ -132,9 +185,27 @@ def eliminate_small_polygons(
         if progress:
             print(f"  Merged {len(merge_map)} polygons, {len(gdf)} remaining")
 
+    for fresh in prepared:
+        shapely.destroy_prepared(fresh)
+
     return gdf
 
 
+def _prepare_unprepared(geoms: np.ndarray) -> np.ndarray:
+    """
+    Prepare the geometries that are not prepared yet.
+
+    Args:
+        geoms: Array of geometries
+
+    Returns:
+        The geometries this call prepared, for destroy_prepared later
+    """
+    fresh = geoms[~shapely.is_prepared(geoms)]
+    shapely.prepare(fresh)
+    return fresh
+
+
 def apply_merges(
     gdf: gpd.GeoDataFrame,
     merge_map: dict[int, int],
@@ -149,43 +220,15 @@ def apply_merges(
     Returns:
         GeoDataFrame with merges applied
     """
-    gdf = gdf.copy()
-
-    # Group merges by target
-    target_to_sources: dict[int, list[int]] = {}
-    for source, target in merge_map.items():
-        if target not in target_to_sources:
-            target_to_sources[target] = []
-        target_to_sources[target].append(source)
-
-    # Track indices to drop
-    indices_to_drop = set()
-
-    # Apply merges
-    for target, sources in target_to_sources.items():
-        # Skip if target was itself merged
-        if target in indices_to_drop:
-            continue
-
-        # Collect geometries to merge
-        geoms = [gdf.loc[target, "geometry"]]
-        for s in sources:
-            if s not in indices_to_drop:
-                geoms.append(gdf.loc[s, "geometry"])
-                indices_to_drop.add(s)
-
-        # Merge geometries
-        merged = unary_union(geoms)
-
-        # Handle potential MultiPolygon (take largest part)
-        if isinstance(merged, MultiPolygon):
-            merged = max(merged.geoms, key=lambda x: x.area)
-
-        gdf.loc[target, "geometry"] = merged
-
-    # Drop merged polygons
-    gdf = gdf.drop(list(indices_to_drop))
-    gdf = gdf.reset_index(drop=True)
+    geometries, indices_to_drop = merge_geometry_groups(
+        np.asarray(gdf.geometry.array), merge_map
+    )
+
+    # Drop merged polygons; taking the kept rows already gives a new frame
+    keep = np.ones(len(gdf), dtype=bool)
+    keep[indices_to_drop] = False
+    gdf = gdf.iloc[np.flatnonzero(keep)].reset_index(drop=True)
+    gdf["geometry"] = geometries[keep]
 
     # Recalculate area
     if "shape_area" in gdf.columns:
@@ -194,6 +237,51 @@ def apply_merges(
     return gdf
 
 
+def merge_geometry_groups(
+    geometries: np.ndarray,
+    merge_map: dict[int, int],
+) -> tuple[np.ndarray, list[int]]:
+    """
+    Union every merge target with its sources in batched GEOS calls.
+
+    Sources are polygons at or below the area threshold and targets are
+    above it, so no target is also a source and merges never chain.
+    Targets are grouped by their number of sources and each group size is
+    unioned with one row-wise ``shapely.union_all`` call.
+
+    Args:
+        geometries: Positional array of all geometries
+        merge_map: Dictionary mapping source indices to target indices
+
+    Returns:
+        Tuple of (updated copy of geometries, source indices to drop)
+    """
+    geometries = np.array(geometries, dtype=object)
+    if not merge_map:
+        return geometries, []
+
+    sources = np.fromiter(merge_map.keys(), dtype=np.intp, count=len(merge_map))
+    targets = np.fromiter(merge_map.values(), dtype=np.intp, count=len(merge_map))
+
+    # Sources grouped by target, keeping their merge_map order within a group
+    order = np.argsort(targets, kind="stable")
+    sources = sources[order]
+    group_targets, starts, counts = np.unique(
+        targets[order], return_index=True, return_counts=True
+    )
+
+    merged = np.empty(len(group_targets), dtype=object)
+    for size in np.unique(counts):
+        groups = np.flatnonzero(counts == size)
+        rows = starts[groups][:, None] + np.arange(size)
+        parts = np.column_stack([geometries[group_targets[groups]], geometries[sources[rows]]])
+        merged[groups] = shapely.union_all(parts, axis=1)
+
+    # Keep the largest part of any MultiPolygon result
+    geometries[group_targets] = largest_parts(merged)
+    return geometries, sources.tolist()
+
+
 def tiered_eliminate(
     gdf: gpd.GeoDataFrame,
     thresholds: Optional[list[float]] = None,
@@ -252,10 +340,15 @@ def eliminate_with_attribute_preservation(
     Returns:
         GeoDataFrame with small polygons eliminated
     """
-    gdf = gdf.copy().reset_index(drop=True)
+    gdf = gdf.reset_index(drop=True)
+
+    # Large polygons stay prepared across iterations; merged targets are new
+    # geometries and get prepared in the iteration after their merge
+    prepared = []
 
     for iteration in range(max_iterations):
-        small_mask = gdf.geometry.area <= area_threshold
+        areas = np.asarray(gdf.geometry.area.values, dtype=np.float64)
+        small_mask = areas <= area_threshold
         n_small = small_mask.sum()
 
         if n_small == 0:
@@ -264,36 +357,40 @@ def eliminate_with_attribute_preservation(
         if progress:
             print(f"  Iteration {iteration + 1}: {n_small} small polygons")
 
-        gdf = gdf.reset_index(drop=True)
         merge_map = {}
+        values = gdf[preserve_field].to_numpy()
 
-        for idx in gdf[small_mask].index:
-            small_geom = gdf.loc[idx, "geometry"]
-            small_value = gdf.loc[idx, preserve_field]
+        geoms = np.asarray(gdf.geometry.array)
+        bounds = shapely.bounds(geoms)
+        prepared.append(_prepare_unprepared(geoms[~small_mask]))
 
-            # Find neighbors
-            possible_matches = list(gdf.sindex.intersection(small_geom.bounds))
+        for idx in np.flatnonzero(small_mask).tolist():
+            small_geom = geoms[idx]
 
-            best_neighbor = None
-            max_shared_length = 0
+            # Find neighbors with the same attribute value that are not small
+            possible_matches = gdf.sindex.query(small_geom)
+            possible_matches = possible_matches[
+                (possible_matches != idx)
+                & (values[possible_matches] == values[idx])
+                & (areas[possible_matches] > area_threshold)
+            ]
 
-            for neighbor_idx in possible_matches:
-                if neighbor_idx == idx:
-                    continue
+            # Largest bounding-box overlap first: an enclosing neighbor is
+            # scored first and the perimeter check below stops the loop
+            width, height = bbox_overlap(bounds[idx], bounds[possible_matches])
+            possible_matches = possible_matches[np.argsort(-(width * height), kind="stable")]
 
-                neighbor_geom = gdf.iloc[neighbor_idx].geometry
-                neighbor_value = gdf.iloc[neighbor_idx][preserve_field]
+            best_neighbor = None
+            max_shared_length = 0
 
-                # Check attribute match
-                if neighbor_value != small_value:
-                    continue
+            # No neighbor can share more than the whole perimeter
+            small_perimeter = small_geom.length
 
-                # Check size
-                if neighbor_geom.area <= area_threshold:
-                    continue
+            for neighbor_idx in possible_matches:
+                neighbor_geom = geoms[neighbor_idx]
 
-                # Check adjacency
-                if not small_geom.touches(neighbor_geom) and not small_geom.intersects(neighbor_geom):
+                # Check adjacency (on the prepared neighbor)
+                if not neighbor_geom.intersects(small_geom):
                     continue
 
                 # Calculate shared boundary
@@ -307,6 +404,9 @@ def eliminate_with_attribute_preservation(
                     max_shared_length = shared_length
                     best_neighbor = neighbor_idx
 
+                    if shared_length >= small_perimeter - 1e-9:
+                        break
+
             if best_neighbor is not None:
                 merge_map[idx] = best_neighbor
 
@@ -315,4 +415,7 @@ def eliminate_with_attribute_preservation(
 
         gdf = apply_merges(gdf, merge_map)
 
+    for fresh in prepared:
+        shapely.destroy_prepared(fresh)
+
     return gdf
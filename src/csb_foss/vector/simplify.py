@@ -9,9 +9,30 @@ from typing import Optional
 
 import geopandas as gpd
 import numpy as np
-from shapely.geometry import Polygon, MultiPolygon
-from shapely.validation import make_valid
-from tqdm import tqdm
+import shapely
+
+
+def largest_parts(geoms: np.ndarray) -> np.ndarray:
+    """
+    Replace each MultiPolygon with its largest part.
+
+    Other geometries (and empty MultiPolygons) are returned unchanged; on
+    area ties the first part wins.
+
+    Args:
+        geoms: Array of geometries
+
+    Returns:
+        New array of geometries
+    """
+    geoms = np.array(geoms, dtype=object)
+    multi = np.flatnonzero((shapely.get_type_id(geoms) == 6) & ~shapely.is_empty(geoms))
+    if len(multi):
+        parts, owner = shapely.get_parts(geoms[multi], return_index=True)
+        by_area = np.lexsort((-shapely.area(parts), owner))
+        first = by_area[np.r_[True, np.diff(owner[by_area]) != 0]]
+        geoms[multi] = parts[first]
+    return geoms
 
 
 def simplify_polygons(
@@ -38,44 +59,28 @@ def simplify_polygons(
     Returns:
         GeoDataFrame with simplified polygons
     """
-    gdf = gdf.copy()
-
     if progress:
         print(f"Simplifying {len(gdf)} polygons with tolerance {tolerance}...")
 
-    simplified_geoms = []
-    valid_indices = []
-
-    iterator = tqdm(gdf.index, desc="Simplifying") if progress else gdf.index
+    geoms = np.asarray(gdf.geometry.array)
 
-    for idx in iterator:
-        geom = gdf.loc[idx, "geometry"]
+    # Simplify, then repair any invalid results
+    simplified = shapely.simplify(geoms, tolerance, preserve_topology=preserve_topology)
+    invalid = ~shapely.is_valid(simplified)
+    if invalid.any():
+        simplified[invalid] = shapely.make_valid(simplified[invalid])
 
-        # Simplify
-        simplified = geom.simplify(tolerance, preserve_topology=preserve_topology)
+    # Handle MultiPolygon - keep largest part
+    simplified = largest_parts(simplified)
 
-        # Validate and repair if needed
-        if not simplified.is_valid:
-            simplified = make_valid(simplified)
-
-        # Handle empty or invalid results
-        if simplified.is_empty:
-            continue
-
-        # Handle MultiPolygon - keep largest part
-        if isinstance(simplified, MultiPolygon):
-            simplified = max(simplified.geoms, key=lambda x: x.area)
-
-        # Area filter
-        if min_area is not None and simplified.area < min_area:
-            continue
-
-        simplified_geoms.append(simplified)
-        valid_indices.append(idx)
+    # Drop empty results and apply the area filter
+    keep = ~shapely.is_empty(simplified)
+    if min_area is not None:
+        keep &= shapely.area(simplified) >= min_area
 
     # Create result GeoDataFrame
-    result = gdf.loc[valid_indices].copy()
-    result["geometry"] = simplified_geoms
+    result = gdf[keep].copy()
+    result["geometry"] = simplified[keep]
 
     # Update area
     if "shape_area" in result.columns:
@@ -105,38 +110,24 @@ def smooth_polygons(
     Returns:
         GeoDataFrame with smoothed polygons
     """
-    gdf = gdf.copy()
-
     if progress:
         print(f"Smoothing {len(gdf)} polygons ({iterations} iterations)...")
 
-    smoothed_geoms = []
-    valid_indices = []
-
-    iterator = tqdm(gdf.index, desc="Smoothing") if progress else gdf.index
-
-    for idx in iterator:
-        geom = gdf.loc[idx, "geometry"]
-
-        # Apply buffer-based smoothing
-        smoothed = geom
-        for _ in range(iterations):
-            # Small positive buffer followed by same negative buffer
-            # This rounds sharp corners
-            smoothed = smoothed.buffer(1).buffer(-1)
-
-        if smoothed.is_empty:
-            continue
-
-        # Handle MultiPolygon
-        if isinstance(smoothed, MultiPolygon):
-            smoothed = max(smoothed.geoms, key=lambda x: x.area)
+    smoothed = np.asarray(gdf.geometry.array)
+    for _ in range(iterations):
+        # Small positive buffer followed by same negative buffer
+        # This rounds sharp corners (16 segments per quarter circle, as
+        # Geometry.buffer uses)
+        smoothed = shapely.buffer(
+            shapely.buffer(smoothed, 1, quad_segs=16), -1, quad_segs=16
+        )
 
-        smoothed_geoms.append(smoothed)
-        valid_indices.append(idx)
+    # Handle MultiPolygon
+    smoothed = largest_parts(smoothed)
 
-    result = gdf.loc[valid_indices].copy()
-    result["geometry"] = smoothed_geoms
+    keep = ~shapely.is_empty(smoothed)
+    result = gdf[keep].copy()
+    result["geometry"] = smoothed[keep]
 
     if "shape_area" in result.columns:
         result["shape_area"] = result.geometry.area
@@ -186,5 +177,6 @@ def calculate_boundary_roughness(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         GeoDataFrame with 'roughness' column added
     """
     gdf = gdf.copy()
-    gdf["roughness"] = gdf.geometry.length / np.sqrt(gdf.geometry.area)
+    geoms = np.asarray(gdf.geometry.array)
+    gdf["roughness"] = shapely.length(geoms) / np.sqrt(shapely.area(geoms))
     return gdf
@@ -5,27 +5,37 @@ Converts raster data to polygon features using rasterio.features.shapes().
 Replaces arcpy.RasterToPolygon_conversion().
 """
 
-import json
+import functools
+import itertools
 from pathlib import Path
 from typing import Optional
 
 import geopandas as gpd
 import numpy as np
+import pyogrio
 import rasterio
+import shapely
 from rasterio.features import shapes
-from shapely.geometry import shape
-from shapely.ops import unary_union
 from tqdm import tqdm
 
+from ..raster.combine import read_lookup_columns
+
+# Rasters opened by _open_raster, kept per process across windows
+_open_rasters: dict[Path, rasterio.io.DatasetReader] = {}
+
 
 def vectorize_raster(
-    raster_path: Path,
+    raster_path: Optional[Path] = None,
     output_path: Optional[Path] = None,
     lookup_path: Optional[Path] = None,
     mask_nodata: bool = True,
     simplify_tolerance: Optional[float] = None,
     min_area: Optional[float] = None,
     progress: bool = True,
+    array: Optional[np.ndarray] = None,
+    transform=None,
+    crs=None,
+    nodata=None,
 ) -> gpd.GeoDataFrame:
     """
     Convert a raster to polygon features.
@@ -33,57 +43,62 @@ def vectorize_raster(
     Replaces arcpy.RasterToPolygon_conversion().
 
     Args:
-        raster_path: Path to input raster
+        raster_path: Path to input raster (or pass ``array`` instead)
         output_path: Optional path to save output (GeoPackage or Shapefile)
         lookup_path: Optional path to lookup table JSON for attribute enrichment
         mask_nodata: Exclude nodata pixels from vectorization
         simplify_tolerance: Optional simplification tolerance in CRS units
         min_area: Optional minimum polygon area filter (in CRS units squared)
         progress: Show progress information
+        array: In-memory 2D raster to vectorize instead of reading a file
+        transform: Affine transform of ``array``
+        crs: CRS of ``array``
+        nodata: Nodata value of ``array``
 
     Returns:
         GeoDataFrame with vectorized polygons
     """
-    if progress:
-        print(f"Vectorizing {raster_path.name}...")
-
-    with rasterio.open(raster_path) as src:
-        data = src.read(1)
-        transform = src.transform
-        crs = src.crs
-        nodata = src.nodata
-
-        # rasterio.features.shapes requires int32 or smaller
-        # Cast uint32 to int32 for vectorization
-        if data.dtype == np.uint32:
-            data = data.astype(np.int32)
-
-        # Create mask for nodata
-        if mask_nodata and nodata is not None:
-            mask = data != nodata
-        else:
-            mask = None
+    if array is None:
+        if progress:
+            print(f"Vectorizing {raster_path.name}...")
 
-        # Vectorize
+        with rasterio.open(raster_path) as src:
+            data = src.read(1)
+            transform = src.transform
+            crs = src.crs
+            nodata = src.nodata
+    else:
         if progress:
-            print("  Extracting shapes...")
+            print("Vectorizing in-memory raster...")
+        data = array
+
+    # Create mask for nodata (before the view below changes the dtype)
+    mask = _nodata_mask(data, nodata) if mask_nodata else None
 
-        geometries = []
-        values = []
+    # rasterio.features.shapes requires int32 or smaller. Reinterpret
+    # uint32 as int32 in place: same result as astype, without the copy
+    if data.dtype == np.uint32:
+        data = data.view(np.int32)
 
-        for geom, val in shapes(data, mask=mask, transform=transform):
-            poly = shape(geom)
+    # Vectorize
+    if progress:
+        print("  Extracting shapes...")
+
+    # GDAL traces pixel edges, so neighbouring polygons share boundaries
+    # exactly, which elimination relies on. Contour tracers such as
+    # skimage.measure.find_contours cut across pixel corners instead.
+    geometries, values = polygons_from_shapes(shapes(data, mask=mask, transform=transform))
 
-            # Optional simplification during extraction
-            if simplify_tolerance is not None:
-                poly = poly.simplify(simplify_tolerance, preserve_topology=True)
+    # Optional simplification and area filter, on the whole array
+    if simplify_tolerance is not None:
+        geometries = shapely.simplify(geometries, simplify_tolerance, preserve_topology=True)
 
-            # Optional area filter
-            if min_area is not None and poly.area < min_area:
-                continue
+    # Areas serve both the filter and the shape_area column
+    areas = shapely.area(geometries)
 
-            geometries.append(poly)
-            values.append(int(val))
+    if min_area is not None:
+        keep = areas >= min_area
+        geometries, values, areas = geometries[keep], values[keep], areas[keep]
 
     if progress:
         print(f"  Extracted {len(geometries)} polygons")
@@ -99,20 +114,133 @@ def vectorize_raster(
     if lookup_path is not None and lookup_path.exists():
         gdf = enrich_from_lookup(gdf, lookup_path)
 
-    # Calculate area
-    gdf["shape_area"] = gdf.geometry.area
+    gdf["shape_area"] = areas
 
     # Save if output path provided
     if output_path is not None:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         driver = "GPKG" if output_path.suffix.lower() == ".gpkg" else "ESRI Shapefile"
-        gdf.to_file(output_path, driver=driver)
+        _write_vector(gdf, output_path, driver)
         if progress:
             print(f"  Saved to {output_path}")
 
     return gdf
 
 
+def vectorize_rasters(
+    raster_paths: list[Path],
+    output_dir: Optional[Path] = None,
+    n_jobs: int = -1,
+    progress: bool = True,
+    **kwargs,
+) -> list[gpd.GeoDataFrame]:
+    """
+    Vectorize several rasters concurrently.
+
+    Args:
+        raster_paths: Paths to input rasters
+        output_dir: Optional directory for one GeoPackage per raster
+        n_jobs: Number of threads (-1 for all cores)
+        progress: Show progress bar
+        **kwargs: Passed on to vectorize_raster
+
+    Returns:
+        GeoDataFrames in the order of ``raster_paths``
+    """
+    from joblib import Parallel, delayed
+
+    def output_path(raster_path: Path) -> Optional[Path]:
+        return None if output_dir is None else output_dir / f"{raster_path.stem}.gpkg"
+
+    # GDAL reads, shapes() tracing and GEOS calls release the GIL, so
+    # threads scale without pickling rasters or results between processes
+    results = Parallel(n_jobs=n_jobs, prefer="threads", return_as="generator")(
+        delayed(vectorize_raster)(
+            path, output_path=output_path(path), progress=False, **kwargs
+        )
+        for path in raster_paths
+    )
+    if progress:
+        results = tqdm(results, total=len(raster_paths), desc="Vectorizing rasters")
+
+    return list(results)
+
+
+def polygons_from_shapes(features) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build polygons from rasterio.features.shapes output in bulk.
+
+    Ring coordinates are gathered into one array and the rings and
+    polygons are constructed with shapely's vectorized constructors,
+    rather than one shape() call per feature.
+
+    Args:
+        features: Iterable of (GeoJSON polygon, value) pairs
+
+    Returns:
+        Tuple of (polygon array, value array)
+    """
+    coords = []
+    ring_sizes = []
+    ring_polygon = []
+    values = []
+
+    for i, (geom, val) in enumerate(features):
+        values.append(val)
+        for ring in geom["coordinates"]:
+            coords.extend(ring)
+            ring_sizes.append(len(ring))
+            ring_polygon.append(i)
+
+    if not values:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+
+    # The vertex count is known, so fill one preallocated buffer from the
+    # flattened pairs instead of converting a list of tuples
+    n_coords = sum(ring_sizes)
+    coords = np.fromiter(
+        itertools.chain.from_iterable(coords), dtype=np.float64, count=2 * n_coords
+    ).reshape(n_coords, 2)
+
+    rings = shapely.linearrings(
+        coords,
+        indices=np.repeat(np.arange(len(ring_sizes)), ring_sizes),
+    )
+    polygons = shapely.polygons(rings, indices=np.asarray(ring_polygon))
+
+    return polygons, np.asarray(values).astype(np.int64)
+
+
+@functools.lru_cache(maxsize=8)
+def _lookup_arrays(lookup_path: str, mtime_ns: int) -> tuple:
+    """
+    Lookup table columns as arrays sorted by code, cached per file version.
+
+    The modification time is part of the cache key, so a rewritten lookup
+    is read again.
+
+    Args:
+        lookup_path: Path to lookup table JSON
+        mtime_ns: Modification time of the file in nanoseconds
+
+    Returns:
+        Tuple of (years, codes, values (n_codes, n_years), count0, count45);
+        the arrays are read-only
+    """
+    columns = read_lookup_columns(Path(lookup_path))
+    years = tuple(columns["years"])
+    codes = np.asarray(columns["codes"], dtype=np.int64)
+    values = np.asarray(columns["values"], dtype=np.int64).reshape(len(codes), len(years))
+    count0 = np.asarray(columns["count0"], dtype=np.int64)
+    count45 = np.asarray(columns["count45"], dtype=np.int64)
+
+    order = np.argsort(codes)
+    arrays = (codes[order], values[order], count0[order], count45[order])
+    for array in arrays:
+        array.setflags(write=False)
+    return (years, *arrays)
+
+
 def enrich_from_lookup(
     gdf: gpd.GeoDataFrame,
     lookup_path: Path,
@@ -127,27 +255,32 @@ def enrich_from_lookup(
     Returns:
         Enriched GeoDataFrame
     """
-    with open(lookup_path) as f:
-        lookup = json.load(f)
+    years, codes, values, count0, count45 = _lookup_arrays(
+        str(lookup_path), lookup_path.stat().st_mtime_ns
+    )
 
-    # Get years from first entry
-    first_entry = next(iter(lookup.values()))
-    years = first_entry.get("years", [])
+    # Row of each gridcode in the lookup; codes without an entry get no
+    # year values and zero counts
+    gridcodes = gdf["gridcode"].to_numpy()
+    pos = np.searchsorted(codes, gridcodes)
+    found = pos < len(codes)
+    found[found] = codes[pos[found]] == gridcodes[found]
+    row = pos[found]
 
     # Add columns for each year
     for i, year in enumerate(years):
-        col_name = f"cdl_{year}"
-        gdf[col_name] = gdf["gridcode"].apply(
-            lambda x: lookup.get(str(x), {}).get("values", [None] * len(years))[i]
-        )
+        if found.all():
+            gdf[f"cdl_{year}"] = values[row, i]
+        else:
+            col = np.full(len(gdf), np.nan)
+            col[found] = values[row, i]
+            gdf[f"cdl_{year}"] = col
 
     # Add counts
-    gdf["count0"] = gdf["gridcode"].apply(
-        lambda x: lookup.get(str(x), {}).get("count0", 0)
-    )
-    gdf["count45"] = gdf["gridcode"].apply(
-        lambda x: lookup.get(str(x), {}).get("count45", 0)
-    )
+    for name, counts in (("count0", count0), ("count45", count45)):
+        col = np.zeros(len(gdf), dtype=np.int64)
+        col[found] = counts[row]
+        gdf[name] = col
 
     return gdf
 
@@ -165,24 +298,29 @@ def filter_by_crop_presence(
     (area >= min_area_single_year AND COUNT0 - COUNT45 >= 1)
 
     Args:
-        gdf: GeoDataFrame with count0, count45, and geometry columns
+        gdf: GeoDataFrame with count0, count45, and geometry columns; a
+             shape_area column, if present, is used as the polygon area
         min_crop_years: Minimum net crop years for inclusion
         min_area_single_year: Minimum area for single-year crop polygons
 
     Returns:
         Filtered GeoDataFrame
     """
-    gdf = gdf.copy()
-
     # Calculate net crop years
-    net_crop_years = gdf["count0"] - gdf["count45"]
+    net_crop_years = (gdf["count0"] - gdf["count45"]).to_numpy()
+
+    # Reuse the area stored at vectorization when available
+    if "shape_area" in gdf.columns:
+        area = gdf["shape_area"].to_numpy()
+    else:
+        area = gdf.geometry.area.to_numpy()
 
     # Apply filter
     mask = (net_crop_years >= min_crop_years) | (
-        (gdf.geometry.area >= min_area_single_year) & (net_crop_years >= 1)
+        (area >= min_area_single_year) & (net_crop_years >= 1)
     )
 
-    filtered = gdf[mask].copy()
+    filtered = gdf.iloc[np.flatnonzero(mask)]
 
     print(f"Filtered {len(gdf)} -> {len(filtered)} polygons")
 
@@ -197,12 +335,15 @@ def vectorize_windowed(
     lookup_path: Optional[Path] = None,
     simplify_tolerance: Optional[float] = None,
     progress: bool = True,
+    n_jobs: int = -1,
 ) -> gpd.GeoDataFrame:
     """
     Vectorize a large raster using windowed processing.
 
     Memory-efficient version for large rasters that don't fit in memory.
-    Handles merging of geometries at tile boundaries.
+    Polygons that cannot continue into another tile are written to
+    ``output_path`` as tiles finish; only tile-edge fragments are held in
+    memory and merged at the end.
 
     Args:
         raster_path: Path to input raster
@@ -212,61 +353,174 @@ def vectorize_windowed(
         lookup_path: Optional path to lookup table
         simplify_tolerance: Optional simplification tolerance
         progress: Show progress bar
+        n_jobs: Number of worker processes tracing tiles (-1 for all cores)
 
     Returns:
-        GeoDataFrame with vectorized polygons
+        GeoDataFrame with vectorized polygons, read back from ``output_path``
     """
-    from ..raster.io import generate_windows
+    from joblib import Parallel, delayed
 
-    with rasterio.open(raster_path) as src:
-        crs = src.crs
-        nodata = src.nodata
+    from ..raster.io import generate_windows
 
-    # Collect all geometries by gridcode
-    all_geoms: dict[int, list] = {}
+    src = _open_raster(raster_path)
+    crs = src.crs
+    nodata = src.nodata
 
+    # Tiles are traced independently in worker processes. Windows start on
+    # block boundaries (see generate_windows); workers keep GDAL
+    # single-threaded so n_jobs processes don't each spawn a thread pool
     windows = list(generate_windows(raster_path, tile_size=tile_size, overlap=overlap))
-    iterator = tqdm(windows, desc="Vectorizing tiles") if progress else windows
+    gdal_threads = 1 if n_jobs != 1 and len(windows) > 1 else "ALL_CPUS"
+    results = Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_vectorize_tile)(raster_path, window, nodata, overlap, gdal_threads)
+        for window, _ in windows
+    )
+    if progress:
+        results = tqdm(
+            results,
+            total=len(windows),
+            desc="Vectorizing tiles",
+            miniters=max(1, len(windows) // 100),
+            mininterval=0.5,
+        )
 
-    for window, (row_idx, col_idx) in iterator:
-        with rasterio.open(raster_path) as src:
-            data = src.read(1, window=window)
-            transform = src.window_transform(window)
+    # Polygons clear of their window's edges and overlap strips are complete
+    # and appear in no other tile: write them out as tiles finish and keep
+    # only the tile-edge fragments in memory for merging
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    n_written = 0
+    edge_geoms, edge_values = [], []
+
+    for geoms, values, edge in results:
+        n_written += _write_polygons(
+            geoms[~edge], values[~edge], output_path, crs, lookup_path,
+            simplify_tolerance, append=n_written > 0,
+        )
+        edge_geoms.append(geoms[edge])
+        edge_values.append(values[edge])
 
-            # rasterio.features.shapes requires int32 or smaller
-            if data.dtype == np.uint32:
-                data = data.astype(np.int32)
+    # Windows run in this process when n_jobs == 1
+    _close_rasters()
 
-            mask = data != nodata if nodata is not None else None
+    edge_geoms = np.concatenate([np.empty(0, dtype=object), *edge_geoms])
+    edge_values = np.concatenate([np.empty(0, dtype=np.int64), *edge_values])
 
-            for geom, val in shapes(data, mask=mask, transform=transform):
-                val = int(val)
-                if val not in all_geoms:
-                    all_geoms[val] = []
-                all_geoms[val].append(shape(geom))
+    # Same-gridcode fragments that intersect form connected components;
+    # lone fragments are complete and only components need a union
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    left, right = shapely.STRtree(edge_geoms).query(edge_geoms, predicate="intersects")
+    pair = (left < right) & (edge_values[left] == edge_values[right])
+    n = len(edge_geoms)
+    adjacency = coo_matrix(
+        (np.ones(pair.sum(), dtype=np.int8), (left[pair], right[pair])), shape=(n, n)
+    )
+    _, component = connected_components(adjacency, directed=False)
+    grouped = np.bincount(component, minlength=1)[component] > 1
+
+    order = np.flatnonzero(grouped)[np.argsort(component[grouped], kind="stable")]
+    groups = []
+    if grouped.any():
+        _, starts = np.unique(component[order], return_index=True)
+        groups = np.split(order, starts[1:])
 
     # Merge geometries that touch at tile boundaries
     if progress:
-        print("Merging geometries across tiles...")
+        print(f"Merging {len(order)} tile-edge geometries in {len(groups)} groups...")
+
+    geometries = [edge_geoms[~grouped]]
+    values = [edge_values[~grouped]]
+
+    # Unions are often quick; refresh the bar about 100 times in total
+    pbar = tqdm(
+        total=len(groups),
+        desc="Merging",
+        miniters=max(1, len(groups) // 100),
+        mininterval=0.5,
+        disable=not progress,
+    )
 
-    geometries = []
-    values = []
+    for group in groups:
+        parts = shapely.get_parts(shapely.union_all(edge_geoms[group]))
+        geometries.append(parts)
+        values.append(np.full(len(parts), edge_values[group[0]], dtype=np.int64))
+        pbar.update(1)
 
-    for val, geoms in tqdm(all_geoms.items(), desc="Merging") if progress else all_geoms.items():
-        merged = unary_union(geoms)
+    pbar.close()
 
-        # Handle MultiPolygon results
-        if merged.geom_type == "MultiPolygon":
-            for poly in merged.geoms:
-                if simplify_tolerance is not None:
-                    poly = poly.simplify(simplify_tolerance, preserve_topology=True)
-                geometries.append(poly)
-                values.append(val)
-        else:
-            if simplify_tolerance is not None:
-                merged = merged.simplify(simplify_tolerance, preserve_topology=True)
-            geometries.append(merged)
-            values.append(val)
+    # Written even when empty, so the output always exists
+    _write_polygons(
+        np.concatenate([np.empty(0, dtype=object), *geometries]),
+        np.concatenate([np.empty(0, dtype=np.int64), *values]),
+        output_path, crs, lookup_path, simplify_tolerance, append=n_written > 0,
+    )
+
+    gdf = pyogrio.read_dataframe(output_path, layer=output_path.stem)
+
+    if progress:
+        print(f"Saved {len(gdf)} polygons to {output_path}")
+
+    return gdf
+
+
+def _nodata_mask(data: np.ndarray, nodata) -> Optional[np.ndarray]:
+    """
+    Build the valid-pixel mask for shapes(), or None when nothing is nodata.
+
+    A nodata value the dtype cannot hold (e.g. -1 on uint16, or 0.5 on an
+    integer raster) never matches, so the full-array comparison is skipped.
+
+    Args:
+        data: Raster array in its original dtype
+        nodata: Nodata value, or None
+
+    Returns:
+        Boolean array, True for valid pixels, or None
+    """
+    if nodata is None:
+        return None
+
+    if np.issubdtype(data.dtype, np.integer):
+        info = np.iinfo(data.dtype)
+        if not (float(nodata).is_integer() and info.min <= nodata <= info.max):
+            return None
+    elif np.isnan(nodata):
+        return ~np.isnan(data)
+
+    return data != nodata
+
+
+def _write_polygons(
+    geometries: np.ndarray,
+    values: np.ndarray,
+    output_path: Path,
+    crs,
+    lookup_path: Optional[Path],
+    simplify_tolerance: Optional[float],
+    append: bool,
+) -> int:
+    """
+    Finish a batch of vectorize_windowed polygons and write it to the output.
+
+    Args:
+        geometries: Polygon array
+        values: Gridcode of each polygon
+        output_path: Output GeoPackage
+        crs: CRS of the polygons
+        lookup_path: Optional path to lookup table
+        simplify_tolerance: Optional simplification tolerance
+        append: Append to the output layer instead of replacing it
+
+    Returns:
+        Number of polygons written (nothing is written for an empty batch
+        that would append)
+    """
+    if append and len(geometries) == 0:
+        return 0
+
+    if simplify_tolerance is not None:
+        geometries = shapely.simplify(geometries, simplify_tolerance, preserve_topology=True)
 
     gdf = gpd.GeoDataFrame(
         {"gridcode": values},
@@ -279,13 +533,119 @@ def vectorize_windowed(
         gdf = enrich_from_lookup(gdf, lookup_path)
 
     # Calculate area
-    gdf["shape_area"] = gdf.geometry.area
+    gdf["shape_area"] = shapely.area(geometries)
 
-    # Save
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    gdf.to_file(output_path, driver="GPKG")
+    _write_vector(gdf, output_path, "GPKG", append=append)
+    return len(gdf)
 
-    if progress:
-        print(f"Saved {len(gdf)} polygons to {output_path}")
 
-    return gdf
+def _write_vector(
+    gdf: gpd.GeoDataFrame,
+    path: Path,
+    driver: str,
+    append: bool = False,
+) -> None:
+    """
+    Write polygons with pyogrio, through Arrow when GDAL supports it.
+
+    GeoPackages get a layer named after the file, so re-runs replace that
+    layer instead of adding new ones.
+
+    Args:
+        gdf: GeoDataFrame to write
+        path: Output path
+        driver: OGR driver name
+        append: Append to the existing layer
+    """
+    pyogrio.write_dataframe(
+        gdf,
+        path,
+        layer=path.stem if driver == "GPKG" else None,
+        driver=driver,
+        append=append,
+        use_arrow=pyogrio.__gdal_version__ >= (3, 8, 0),
+    )
+
+
+def _open_raster(raster_path: Path) -> rasterio.io.DatasetReader:
+    """
+    Open a raster once per process and reuse the handle across windows.
+
+    Args:
+        raster_path: Path to raster
+
+    Returns:
+        Open dataset
+    """
+    src = _open_rasters.get(raster_path)
+    if src is None or src.closed:
+        src = _open_rasters[raster_path] = rasterio.open(raster_path)
+    return src
+
+
+def _close_rasters() -> None:
+    """Close the rasters cached by _open_raster in this process."""
+    for src in _open_rasters.values():
+        src.close()
+    _open_rasters.clear()
+
+
+def _vectorize_tile(
+    raster_path: Path,
+    window,
+    nodata,
+    overlap: int = 0,
+    gdal_threads="ALL_CPUS",
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Trace the polygons of one raster window.
+
+    Args:
+        raster_path: Path to input raster
+        window: Window to read
+        nodata: Nodata value to mask, or None
+        overlap: Overlap with neighbouring windows in pixels
+        gdal_threads: GDAL_NUM_THREADS for decoding the window
+
+    Returns:
+        Tuple of (polygon array, value array, edge mask). The edge mask is
+        True for polygons within half a pixel of an inner window edge or
+        the overlap strip, which may continue into or repeat in another
+        tile.
+    """
+    src = _open_raster(raster_path)
+    with rasterio.Env(GDAL_NUM_THREADS=gdal_threads, VSI_CACHE=True):
+        data = src.read(1, window=window)
+    transform = src.window_transform(window)
+
+    mask = _nodata_mask(data, nodata)
+
+    # rasterio.features.shapes requires int32 or smaller (view, no copy)
+    if data.dtype == np.uint32:
+        data = data.view(np.int32)
+
+    geoms, values = polygons_from_shapes(shapes(data, mask=mask, transform=transform))
+
+    # Window bounds shrunk by the overlap plus half a pixel (north-up grid).
+    # Sides on the raster border have no neighbouring tile, so polygons
+    # touching them are still complete.
+    xres, yres = abs(transform.a), abs(transform.e)
+    left, top = transform.c, transform.f
+    right, bottom = left + data.shape[1] * xres, top - data.shape[0] * yres
+    mx, my = (overlap + 0.5) * xres, (overlap + 0.5) * yres
+    row_off, col_off = int(window.row_off), int(window.col_off)
+
+    min_x = left + mx if col_off > 0 else -np.inf
+    max_x = right - mx if col_off + data.shape[1] < src.width else np.inf
+    max_y = top - my if row_off > 0 else np.inf
+    min_y = bottom + my if row_off + data.shape[0] < src.height else -np.inf
+
+    bounds = shapely.bounds(geoms).reshape(-1, 4)
+    interior = (
+        (bounds[:, 0] > min_x)
+        & (bounds[:, 2] < max_x)
+        & (bounds[:, 1] > min_y)
+        & (bounds[:, 3] < max_y)
+    )
+
+    return geoms, values, ~interior
@@ -0,0 +1,47 @@
+"""Tests for csb_foss.experimental.watershed."""
+
+import numpy as np
+import pytest
+from scipy.ndimage import binary_dilation
+
+from csb_foss.experimental.watershed import remove_small_segments
+
+
+def _remove_small_segments_reference(labels: np.ndarray, min_size: int) -> np.ndarray:
+    """Original per-label loop that remove_small_segments must match."""
+    labels = labels.copy()
+    unique_labels = np.unique(labels)
+    unique_labels = unique_labels[unique_labels > 0]
+
+    for lbl in unique_labels:
+        mask = labels == lbl
+        if mask.sum() < min_size:
+            neighbors = labels[binary_dilation(mask) & ~mask]
+            neighbors = neighbors[(neighbors > 0) & (neighbors != lbl)]
+            if len(neighbors) > 0:
+                unique, counts = np.unique(neighbors, return_counts=True)
+                labels[mask] = unique[counts.argmax()]
+
+    return labels
+
+
+def test_absorbed_pixels_belong_to_the_growing_segment():
+    labels = np.array([[2, 2, 4], [1, 3, 3], [4, 3, 4]])
+
+    result = remove_small_segments(labels, min_size=4)
+
+    np.testing.assert_array_equal(result, _remove_small_segments_reference(labels, 4))
+    np.testing.assert_array_equal(result, np.full((3, 3), 4))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_reference_loop(seed):
+    rng = np.random.default_rng(seed)
+    shape = tuple(rng.integers(3, 16, size=2))
+    labels = rng.integers(0, rng.integers(2, 40), size=shape)
+    min_size = int(rng.integers(2, 8))
+
+    np.testing.assert_array_equal(
+        remove_small_segments(labels, min_size),
+        _remove_small_segments_reference(labels, min_size),
+    )